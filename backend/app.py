@@ -30,6 +30,12 @@ from backend.routes.ai_chat import ai_chat_bp
 from backend.routes.contact import contact_bp
 from backend.routes.metadata import metadata_bp
 from backend.models.db import init_db
+from backend.utils.flight_cache import warm_flight_index
+from backend.utils.connection_search import connection_graph, start_connection_worker
+from backend.utils.seat_reaper import start_seat_reaper
+from backend.utils.ticket_queue import start_ticket_worker
+from backend.utils.idempotency import start_idempotency_pruner
+from backend.utils.seat_push import register_seat_socket_handlers
 from backend.utils.email_service import init_mail
 from backend.config import BlockchainConfig
 
@@ -42,6 +48,7 @@ from backend.models.booking import Booking, BookingPassenger
 from backend.models.seats import Seat
 from backend.models.tickets import Ticket
 from backend.models.sky_voucher import SkyVoucher
+from backend.models.flight_fares import FlightDailyFare
 
 from os import getenv
 from sqlalchemy import create_engine
@@ -101,8 +108,10 @@ def bootstrap_database_scripts() -> None:
         'create_tables',
         'generate_fake_flights',
         'import_flights',
+        'refresh_daily_fares',
         'create_all_seats',
         'fix_seat_status_case',
+        'recount_seats_available',
         'add_booking_state_hash',
         'add_blockchain_idempotent_columns',
     ]
@@ -205,6 +214,42 @@ def create_app():
             if _is_render_environment():
                 raise
     
+    # Warm this worker's flight search index so first searches skip the DB
+    try:
+        warmed = warm_flight_index()
+        print(f"[FlightIndex] Warmed {warmed} route/date searches.")
+    except Exception as e:
+        print(f"[FlightIndex] Warm-up skipped: {e}")
+    try:
+        legs = connection_graph.rebuild()
+        print(f"[Connections] Graph built with {legs} upcoming flights.")
+    except Exception as e:
+        print(f"[Connections] Graph build skipped: {e}")
+    # Keep the graph fresh in the background so searches never rebuild it
+    try:
+        if start_connection_worker():
+            print("[Connections] Worker started.")
+    except Exception as e:
+        print(f"[Connections] Worker start skipped: {e}")
+    # Release expired seat holds in the background instead of inside requests
+    try:
+        if start_seat_reaper():
+            print("[SeatReaper] Started.")
+    except Exception as e:
+        print(f"[SeatReaper] Start skipped: {e}")
+    # Issue tickets for confirmed payments from the durable job queue
+    try:
+        if start_ticket_worker():
+            print("[TicketQueue] Worker started.")
+    except Exception as e:
+        print(f"[TicketQueue] Worker start skipped: {e}")
+    # Delete expired Idempotency-Key responses
+    try:
+        if start_idempotency_pruner():
+            print("[Idempotency] Pruner started.")
+    except Exception as e:
+        print(f"[Idempotency] Pruner start skipped: {e}")
+
     # Initialize email service
     try:
         init_mail(app)
@@ -228,6 +273,12 @@ def create_app():
     global socketio
     socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
+    # Per-flight seat map rooms (namespace /seats) fed from the seat change log
+    try:
+        register_seat_socket_handlers(socketio)
+    except Exception as e:
+        print(f"[SeatPush] Socket handlers not registered: {e}")
+
     # Socket.IO event handlers for support chat
     @socketio.on('connect')
     def _on_connect():
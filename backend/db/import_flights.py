@@ -23,6 +23,8 @@ try:
     from backend.models.payments import Payment
     from backend.models.seats import Seat
     from backend.models.tickets import Ticket
+    from backend.utils.flight_cache import invalidate_flight_index
+    from backend.utils.fare_calendar import refresh_daily_fares
 except ImportError as e:
     print(f"❌ Error importing models: {e}")
     print("Make sure you're running from the project root directory")
@@ -99,7 +101,7 @@ def import_flights():
                         departure_time=departure_time,
                         arrival_time=arrival_time,
                         price=float(row['price']),
-                        seats_available=180  # Default seat count
+                        seats_available=0  # Counted as seats are created (create_all_seats)
                     )
                     
                     imported_flights.append(flight)
@@ -114,8 +116,16 @@ def import_flights():
             # Bulk insert all new flights
             if imported_flights:
                 session.bulk_save_objects(imported_flights)
+                # bulk_save_objects bypasses flush hooks, so refresh the fare calendar explicitly
+                fare_keys = {
+                    (f.departure_airport, f.arrival_airport, f.departure_time.date())
+                    for f in imported_flights
+                }
+                fare_rows = refresh_daily_fares(session.connection(), fare_keys)
                 session.commit()
                 print(f"💾 Bulk inserted {len(imported_flights)} flights")
+                print(f"📅 Refreshed {fare_rows} daily fare rows")
+                invalidate_flight_index()
             
             # Final count check
             final_count = session.execute(text('SELECT COUNT(*) FROM flights')).scalar()
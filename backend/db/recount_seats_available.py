@@ -0,0 +1,18 @@
+"""Recompute flights.seats_available from the seats table."""
+
+from __future__ import annotations
+
+from backend.models.db import SessionLocal
+from backend.utils.seat_inventory import recount_seats_available
+
+
+def main() -> None:
+    with SessionLocal() as session:
+        updated = recount_seats_available(session)
+        session.commit()
+
+    print(f"[recount_seats_available] Done. Recounted {updated} flights")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+"""Rebuild the flight_daily_fares table used by /api/flights/price-trend."""
+
+from __future__ import annotations
+
+from backend.models.db import engine, Base
+from backend.models.flight_fares import FlightDailyFare
+from backend.utils.fare_calendar import rebuild_daily_fares
+
+
+def refresh_daily_fares() -> None:
+    Base.metadata.create_all(bind=engine, tables=[FlightDailyFare.__table__])
+
+    with engine.begin() as conn:
+        rows = rebuild_daily_fares(conn)
+
+    print(f"[refresh_daily_fares] Done. Materialized {rows} route/day fare rows")
+
+
+if __name__ == '__main__':
+    refresh_daily_fares()
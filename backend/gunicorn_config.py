@@ -5,7 +5,9 @@ import multiprocessing
 bind = "0.0.0.0:8000"
 backlog = 2048
 workers = max(2, multiprocessing.cpu_count())
-worker_class = "sync"
+# Threaded workers let identical concurrent flight searches coalesce in-process
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
 worker_connections = 1000
 
 # Critical: Timeout must be longer than blockchain operations (300s × 3 + retries)
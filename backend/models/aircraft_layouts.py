@@ -0,0 +1,165 @@
+"""Cabin layout templates per aircraft type.
+
+Each ``AircraftLayout`` is built once per process from its cabins and keeps
+the full seat template (seat number, class, price modifier, window/aisle
+flags) plus lookup tables, so seat generation, seat maps and the
+``Seat.is_window_seat``/``is_aisle_seat`` checks are dictionary lookups.
+
+Cabin columns are written with a space for each aisle, e.g. ``'ABC DEF'``:
+the outermost letters are window seats, letters next to a space aisle seats.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import NamedTuple
+
+
+DEFAULT_AIRCRAFT_TYPE = 'A320'
+WINDOW_PRICE_MODIFIER = 50000  # +50k VND for window seats
+
+CLASS_PRICE_MODIFIERS = {
+    'BUSINESS': 500000,
+    'PREMIUM': 200000,
+    'ECONOMY': 0,
+}
+
+
+class Cabin(NamedTuple):
+    seat_class: str
+    first_row: int
+    last_row: int
+    columns: str
+
+
+class SeatTemplate(NamedTuple):
+    seat_number: str
+    row: int
+    column: str
+    seat_class: str
+    price_modifier: float
+    is_window: bool
+    is_aisle: bool
+
+
+def _column_flags(columns: str) -> dict[str, tuple[bool, bool]]:
+    letters = columns.replace(' ', '')
+    flags = {}
+    for i, letter in enumerate(columns):
+        if letter == ' ':
+            continue
+        is_window = letter in (letters[0], letters[-1])
+        is_aisle = (i > 0 and columns[i - 1] == ' ') or (i + 1 < len(columns) and columns[i + 1] == ' ')
+        flags[letter] = (is_window, is_aisle)
+    return flags
+
+
+class AircraftLayout:
+    """Seat template and lookup tables for one aircraft type."""
+
+    def __init__(self, code: str, cabins: list[Cabin]):
+        self.code = code
+        self.cabins = tuple(cabins)
+        self.rows = max(cabin.last_row for cabin in cabins)
+
+        seats = []
+        # Per-column flags of the last (largest) cabin, for seat numbers off the template
+        self.column_flags: dict[str, tuple[bool, bool]] = {}
+        for cabin in cabins:
+            flags = _column_flags(cabin.columns)
+            self.column_flags.update(flags)
+            base_modifier = CLASS_PRICE_MODIFIERS[cabin.seat_class]
+            for row in range(cabin.first_row, cabin.last_row + 1):
+                for column, (is_window, is_aisle) in flags.items():
+                    seats.append(SeatTemplate(
+                        f"{row}{column}", row, column, cabin.seat_class,
+                        base_modifier + (WINDOW_PRICE_MODIFIER if is_window else 0),
+                        is_window, is_aisle,
+                    ))
+        self.seats: tuple[SeatTemplate, ...] = tuple(seats)
+        self.by_number: dict[str, SeatTemplate] = {seat.seat_number: seat for seat in seats}
+        self.columns: list[str] = sorted({seat.column for seat in seats})
+
+        self.class_rows: dict[str, list[int]] = {}
+        self.row_cabins: dict[int, Cabin] = {}
+        for cabin in cabins:
+            self.class_rows.setdefault(cabin.seat_class, []).extend(range(cabin.first_row, cabin.last_row + 1))
+            self.row_cabins.update(dict.fromkeys(range(cabin.first_row, cabin.last_row + 1), cabin))
+        self.layout_info = self.layout_info_for(self.rows)
+
+    def __repr__(self) -> str:
+        return f"<AircraftLayout {self.code} {len(self.seats)} seats>"
+
+    def seat(self, seat_number: str) -> SeatTemplate | None:
+        return self.by_number.get(seat_number)
+
+    def cabin_for(self, row: int) -> Cabin:
+        """Cabin of ``row``; rows past the template belong to the last cabin."""
+        return self.row_cabins.get(row, self.cabins[-1])
+
+    def flags(self, seat_number: str) -> tuple[bool, bool]:
+        """(is_window, is_aisle) for a seat number, by column when off the template."""
+        template = self.by_number.get(seat_number)
+        if template is not None:
+            return template.is_window, template.is_aisle
+        return self.column_flags.get(seat_number[-1:], (False, False))
+
+    def layout_info_for(self, total_rows: int) -> dict:
+        """Seat map layout info for a flight seated with ``total_rows`` rows.
+
+        Rows past the template (older seat data) belong to the last cabin.
+        """
+        if total_rows == getattr(self, 'layout_info', {}).get('total_rows'):
+            return self.layout_info
+        class_rows = {seat_class: [row for row in rows if row <= total_rows]
+                      for seat_class, rows in self.class_rows.items()}
+        last_class = self.cabins[-1].seat_class
+        class_rows[last_class] = class_rows[last_class] + list(range(self.rows + 1, total_rows + 1))
+        return {
+            'aircraft_type': self.code,
+            'total_rows': total_rows,
+            'columns': self.columns,
+            'seats_per_row': len(self.columns),
+            'business_rows': class_rows.get('BUSINESS', []),
+            'premium_rows': class_rows.get('PREMIUM', []),
+            'economy_rows': class_rows.get('ECONOMY', []),
+        }
+
+
+AIRCRAFT_LAYOUTS: dict[str, AircraftLayout] = {layout.code: layout for layout in (
+    AircraftLayout('A320', [
+        Cabin('BUSINESS', 1, 3, 'ABC DEF'),
+        Cabin('PREMIUM', 4, 8, 'ABC DEF'),
+        Cabin('ECONOMY', 9, 28, 'ABC DEF'),
+    ]),
+    AircraftLayout('A321', [
+        Cabin('BUSINESS', 1, 4, 'AC DF'),
+        Cabin('PREMIUM', 5, 9, 'ABC DEF'),
+        Cabin('ECONOMY', 10, 36, 'ABC DEF'),
+    ]),
+    AircraftLayout('B787', [
+        Cabin('BUSINESS', 1, 7, 'A DG K'),
+        Cabin('PREMIUM', 8, 12, 'AC DEG HK'),
+        Cabin('ECONOMY', 13, 40, 'ABC DEG HJK'),
+    ]),
+    AircraftLayout('ATR72', [
+        Cabin('ECONOMY', 1, 18, 'AC DF'),
+    ]),
+)}
+
+_ALIASES = {
+    'A320NEO': 'A320',
+    'A321NEO': 'A321',
+    '787': 'B787',
+    'B7879': 'B787',
+    'B78710': 'B787',
+    'ATR': 'ATR72',
+    'ATR72600': 'ATR72',
+}
+
+
+@lru_cache(maxsize=None)
+def get_aircraft_layout(aircraft_type: str | None = None) -> AircraftLayout:
+    """Layout for an aircraft type such as 'A321neo' or 'B787-9' (A320 if unknown)."""
+    code = ''.join(ch for ch in (aircraft_type or '').upper() if ch.isalnum())
+    code = _ALIASES.get(code, code)
+    return AIRCRAFT_LAYOUTS.get(code) or AIRCRAFT_LAYOUTS[DEFAULT_AIRCRAFT_TYPE]
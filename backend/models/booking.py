@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Enum, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Enum, Boolean, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -73,6 +73,11 @@ class Booking(Base):
     payments = relationship("Payment", back_populates="booking", cascade="all, delete-orphan")
     tickets = relationship("Ticket", back_populates="booking", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index('idx_bookings_outbound_flight_status', 'outbound_flight_id', 'status'),
+        Index('idx_bookings_inbound_flight_status', 'inbound_flight_id', 'status'),
+    )
+
     def as_dict(self):
         # Provide a richer representation expected by the frontend
         outbound = None
@@ -190,12 +195,9 @@ class Booking(Base):
 
     @staticmethod
     def generate_booking_code():
-        """Generate unique booking code like SP202610001 using cryptographically secure random"""
-        import secrets
-        year = datetime.now().year
-        # Use secrets for cryptographically secure random number (not predictable)
-        random_suffix = str(secrets.randbelow(90000) + 10000)  # Range: 10000-99999
-        return f"SP{year}{random_suffix}"
+        """Allocate a unique booking code like SP20260384751 (see utils/code_allocator)."""
+        from backend.utils.code_allocator import next_booking_code
+        return next_booking_code()
 
 
 class BookingPassenger(Base):
@@ -71,6 +71,8 @@ def init_db():
 	from .flights import Flight  # noqa: F401
 	from .passenger import Passenger  # noqa: F401
 	from .sky_voucher import SkyVoucher  # noqa: F401
+	from .flight_fares import FlightDailyFare  # noqa: F401
+	from .idempotency import IdempotencyKey  # noqa: F401
 	Base.metadata.create_all(bind=engine)
 	
 	# Apply migrations/alter tables if needed
@@ -229,3 +231,175 @@ def _apply_migrations():
 				except:
 					pass
 
+		# Composite index for route + departure_time searches
+		if 'flights' in inspector.get_table_names():
+			flight_indexes = [idx['name'] for idx in inspector.get_indexes('flights')]
+			if 'idx_flights_route_departure' not in flight_indexes:
+				try:
+					conn.execute(text(
+						"CREATE INDEX IF NOT EXISTS idx_flights_route_departure "
+						"ON flights(departure_airport, arrival_airport, departure_time)"
+					))
+					conn.commit()
+					print("[DB Migration] Added idx_flights_route_departure index to flights table")
+				except Exception as e:
+					print(f"[DB Migration] idx_flights_route_departure index already exists or error: {e}")
+					try:
+						conn.rollback()
+					except:
+						pass
+
+		# Canonical uppercase seat status (legacy rows were mixed case), enforced
+		# by a CHECK constraint; the normalizing UPDATE only runs until it exists
+		if 'seats' in inspector.get_table_names():
+			seat_constraints = [ck['name'] for ck in inspector.get_check_constraints('seats')]
+			if 'ck_seats_status' not in seat_constraints:
+				normalized = False
+				try:
+					result = conn.execute(text("UPDATE seats SET status = UPPER(status) WHERE status <> UPPER(status)"))
+					conn.commit()
+					normalized = True
+					print(f"[DB Migration] Normalized status of {result.rowcount} seats to uppercase")
+				except Exception as e:
+					print(f"[DB Migration] seat status normalization failed: {e}")
+					try:
+						conn.rollback()
+					except:
+						pass
+				if normalized:
+					try:
+						conn.execute(text(
+							"ALTER TABLE seats ADD CONSTRAINT ck_seats_status "
+							"CHECK (status IN ('AVAILABLE', 'TEMPORARILY_RESERVED', 'CONFIRMED', 'BLOCKED'))"
+						))
+						conn.commit()
+						print("[DB Migration] Added ck_seats_status constraint to seats table")
+					except Exception as e:
+						print(f"[DB Migration] ck_seats_status constraint already exists or error: {e}")
+						try:
+							conn.rollback()
+						except:
+							pass
+
+			# Partial indexes over temporary holds
+			seat_indexes = [idx['name'] for idx in inspector.get_indexes('seats')]
+			for index_name, columns in (
+				('idx_seats_flight_held', 'flight_id, reserved_until'),
+				('idx_seats_held_until', 'reserved_until'),
+			):
+				if index_name in seat_indexes:
+					continue
+				try:
+					conn.execute(text(
+						f"CREATE INDEX IF NOT EXISTS {index_name} ON seats({columns}) "
+						"WHERE status = 'TEMPORARILY_RESERVED'"
+					))
+					conn.commit()
+					print(f"[DB Migration] Added {index_name} index to seats table")
+				except Exception as e:
+					print(f"[DB Migration] {index_name} index already exists or error: {e}")
+					try:
+						conn.rollback()
+					except:
+						pass
+
+		# Per-flight seat map version used by the seat change log
+		if 'flights' in inspector.get_table_names():
+			flights_columns = [col['name'] for col in inspector.get_columns('flights')]
+			if 'seat_map_version' not in flights_columns:
+				try:
+					conn.execute(text("ALTER TABLE flights ADD COLUMN seat_map_version BIGINT NOT NULL DEFAULT 0"))
+					conn.commit()
+					print("[DB Migration] Added seat_map_version column to flights table")
+				except Exception as e:
+					print(f"[DB Migration] seat_map_version column already exists or error: {e}")
+					try:
+						conn.rollback()
+					except:
+						pass
+
+		# Per-flight booking lookups (seat map confirmed seats)
+		if 'bookings' in inspector.get_table_names():
+			booking_indexes = [idx['name'] for idx in inspector.get_indexes('bookings')]
+			for index_name, column in (
+				('idx_bookings_outbound_flight_status', 'outbound_flight_id'),
+				('idx_bookings_inbound_flight_status', 'inbound_flight_id'),
+			):
+				if index_name in booking_indexes:
+					continue
+				try:
+					conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON bookings({column}, status)"))
+					conn.commit()
+					print(f"[DB Migration] Added {index_name} index to bookings table")
+				except Exception as e:
+					print(f"[DB Migration] {index_name} index already exists or error: {e}")
+					try:
+						conn.rollback()
+					except:
+						pass
+
+		# Version counter bumped by statement-level trigger on schedule/price changes,
+		# used for flight response ETags and cross-worker cache invalidation
+		if 'flights' in inspector.get_table_names():
+			try:
+				conn.execute(text("""
+					CREATE TABLE IF NOT EXISTS table_versions (
+						name VARCHAR(50) PRIMARY KEY,
+						version BIGINT NOT NULL DEFAULT 0,
+						updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+					)
+				"""))
+				conn.execute(text("INSERT INTO table_versions (name, version) VALUES ('flights', 1) ON CONFLICT (name) DO NOTHING"))
+				conn.execute(text("""
+					CREATE OR REPLACE FUNCTION bump_flights_version() RETURNS trigger AS $$
+					BEGIN
+						UPDATE table_versions SET version = version + 1, updated_at = NOW() WHERE name = 'flights';
+						RETURN NULL;
+					END;
+					$$ LANGUAGE plpgsql
+				"""))
+				conn.execute(text("DROP TRIGGER IF EXISTS trg_flights_version ON flights"))
+				conn.execute(text("""
+					CREATE TRIGGER trg_flights_version
+					AFTER INSERT OR DELETE OR TRUNCATE
+						OR UPDATE OF flight_number, airline, departure_airport, arrival_airport,
+							departure_time, arrival_time, price, aircraft_type
+					ON flights
+					FOR EACH STATEMENT EXECUTE FUNCTION bump_flights_version()
+				"""))
+				conn.commit()
+			except Exception as e:
+				print(f"[DB Migration] flights version trigger failed: {e}")
+				try:
+					conn.rollback()
+				except:
+					pass
+
+		# Sequences behind permuted booking and ticket codes (utils/code_allocator)
+		try:
+			conn.execute(text("CREATE SEQUENCE IF NOT EXISTS booking_code_seq"))
+			conn.execute(text("CREATE SEQUENCE IF NOT EXISTS ticket_code_seq"))
+			conn.commit()
+		except Exception as e:
+			print(f"[DB Migration] code sequence creation failed: {e}")
+			try:
+				conn.rollback()
+			except:
+				pass
+
+		# Backfill the materialized fare calendar on databases that predate it
+		if 'flight_daily_fares' in inspector.get_table_names():
+			try:
+				has_fares = conn.execute(text("SELECT 1 FROM flight_daily_fares LIMIT 1")).first()
+				has_flights = conn.execute(text("SELECT 1 FROM flights LIMIT 1")).first()
+				if has_flights and not has_fares:
+					from backend.utils.fare_calendar import rebuild_daily_fares
+					rows = rebuild_daily_fares(conn)
+					conn.commit()
+					print(f"[DB Migration] Backfilled flight_daily_fares with {rows} rows")
+			except Exception as e:
+				print(f"[DB Migration] flight_daily_fares backfill failed: {e}")
+				try:
+					conn.rollback()
+				except:
+					pass
@@ -0,0 +1,32 @@
+"""Materialized daily minimum fare per route, maintained from the flights table."""
+from __future__ import annotations
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Date, Numeric, PrimaryKeyConstraint
+
+from .db import Base
+
+
+class FlightDailyFare(Base):
+    __tablename__ = "flight_daily_fares"
+
+    departure_airport = Column(String(10), nullable=False)
+    arrival_airport = Column(String(10), nullable=False)
+    flight_date = Column(Date, nullable=False)
+    min_price = Column(Numeric(12, 2), nullable=False)
+    flight_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Route + date primary key keeps a price-trend window a contiguous index range
+    __table_args__ = (
+        PrimaryKeyConstraint('departure_airport', 'arrival_airport', 'flight_date', name='pk_flight_daily_fares'),
+    )
+
+    def as_dict(self):
+        return {
+            "departure_airport": self.departure_airport,
+            "arrival_airport": self.arrival_airport,
+            "date": self.flight_date.isoformat() if self.flight_date else None,
+            "min_price": float(self.min_price) if self.min_price is not None else None,
+            "flight_count": int(self.flight_count or 0),
+        }
@@ -2,9 +2,10 @@
 from __future__ import annotations
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Numeric
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, Numeric, Index
 from sqlalchemy.orm import relationship
 from .db import Base
+from .aircraft_layouts import get_aircraft_layout
 
 class Flight(Base):
     __tablename__ = "flights"
@@ -19,10 +20,16 @@ class Flight(Base):
     price = Column(Numeric(12, 2), nullable=False)
     seats_available = Column(Integer, nullable=False, default=0)
     aircraft_type = Column(String(20), nullable=False, default="A320")  # Aircraft type (A320, B777, etc.)
+    seat_map_version = Column(BigInteger, nullable=False, default=0, server_default='0')  # Bumped per seat change batch (utils/seat_changes)
     
     # Relationships - use lazy loading to avoid initialization issues
     seats = relationship("Seat", back_populates="flight", cascade="all, delete-orphan", lazy="select")
 
+    # Search filters on route + departure_time range; one composite index avoids bitmap-ANDs
+    __table_args__ = (
+        Index('idx_flights_route_departure', 'departure_airport', 'arrival_airport', 'departure_time'),
+    )
+
     def as_dict(self):
         return {
             "id": self.id,
@@ -40,44 +47,19 @@ class Flight(Base):
         }
     
     def get_available_seat_count(self):
-        """Get number of available seats."""
-        from .seats import SeatStatus
-        return len([s for s in self.seats if s.status == SeatStatus.AVAILABLE.value])
+        """Get number of available seats (maintained counter, see utils/seat_inventory)."""
+        return self.seats_available or 0
     
-    def initialize_seats_for_aircraft(self, aircraft_type="A320"):
-        """Initialize seat layout for this flight."""
-        from .seats import Seat, SeatClass
-        
-        seats = []
-        
-        # A320 configuration: 28 rows, 6 seats per row (A,B,C,D,E,F)  
-        if aircraft_type == "A320":
-            for row in range(1, 29):  # Rows 1-28
-                for letter in ['A', 'B', 'C', 'D', 'E', 'F']:
-                    seat_number = f"{row}{letter}"
-                    
-                    # Determine seat class based on row
-                    if row <= 3:
-                        seat_class = SeatClass.BUSINESS.value
-                        price_modifier = 500000  # +500k for business
-                    elif row <= 8:
-                        seat_class = SeatClass.PREMIUM.value  
-                        price_modifier = 200000  # +200k for premium
-                    else:
-                        seat_class = SeatClass.ECONOMY.value
-                        price_modifier = 0
-                    
-                    # Window seats cost extra
-                    if letter in ['A', 'F']:
-                        price_modifier += 50000  # +50k for window
-                    
-                    seat = {
-                        'flight_id': self.id,
-                        'seat_number': seat_number,
-                        'seat_class': seat_class,
-                        'price_modifier': price_modifier,
-                        'status': 'AVAILABLE'
-                    }
-                    seats.append(seat)
-        
-        return seats
+    def initialize_seats_for_aircraft(self, aircraft_type=None):
+        """Seat rows for this flight from its aircraft layout template."""
+        layout = get_aircraft_layout(aircraft_type or self.aircraft_type)
+        return [
+            {
+                'flight_id': self.id,
+                'seat_number': template.seat_number,
+                'seat_class': template.seat_class,
+                'price_modifier': template.price_modifier,
+                'status': 'AVAILABLE'
+            }
+            for template in layout.seats
+        ]
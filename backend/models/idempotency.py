@@ -0,0 +1,26 @@
+"""Stored responses of creation requests sent with an Idempotency-Key header."""
+from __future__ import annotations
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, PrimaryKeyConstraint
+
+from .db import Base
+
+
+class IdempotencyKey(Base):
+    """One client key per endpoint scope (see utils/idempotency)."""
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String(50), nullable=False)  # e.g. "bookings.create"
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # sha256 of caller + request body
+    status = Column(String(20), nullable=False, default="IN_PROGRESS")  # IN_PROGRESS, COMPLETED
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('scope', 'key', name='pk_idempotency_keys'),
+        Index('idx_idempotency_keys_expires_at', 'expires_at'),
+    )
@@ -2,11 +2,12 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, CheckConstraint, Column, Integer, String, DateTime, Numeric, ForeignKey, Index, text
+from sqlalchemy.orm import relationship, validates
 import enum
 
 from .db import Base
+from .aircraft_layouts import get_aircraft_layout
 
 
 class SeatStatus(enum.Enum):
@@ -51,12 +52,38 @@ class Seat(Base):
         Index('idx_seats_flight_status', 'flight_id', 'status'),
         Index('idx_seats_reserved_until', 'reserved_until'),
         Index('idx_seats_reserved_by', 'reserved_by'),
+        # Holds are a small slice of all seats; partial indexes keep hold lookups tiny
+        Index('idx_seats_flight_held', 'flight_id', 'reserved_until', postgresql_where=text("status = 'TEMPORARILY_RESERVED'")),
+        Index('idx_seats_held_until', 'reserved_until', postgresql_where=text("status = 'TEMPORARILY_RESERVED'")),
+        CheckConstraint(
+            "status IN ('AVAILABLE', 'TEMPORARILY_RESERVED', 'CONFIRMED', 'BLOCKED')",
+            name='ck_seats_status',
+        ),
     )
 
+    @validates('status')
+    def _canonical_status(self, key, value):
+        # Stored status is always the uppercase SeatStatus value (see ck_seats_status)
+        return value.upper() if isinstance(value, str) else value
+
     @property
     def normalized_status(self):
         """Return seat status normalized to uppercase string."""
         return (self.status or "").upper()
+
+    @property
+    def hold_expired(self):
+        """True for a temporary hold past (or missing) its expiry, not yet reaped."""
+        if self.normalized_status != SeatStatus.TEMPORARILY_RESERVED.value:
+            return False
+        return self.reserved_until is None or datetime.utcnow() > self.reserved_until
+
+    @property
+    def effective_status(self):
+        """Status as clients should see it: expired holds read as AVAILABLE."""
+        if self.hold_expired:
+            return SeatStatus.AVAILABLE.value
+        return self.normalized_status
     
     def is_available_for_user(self, user_id):
         """Check if seat is available for selection by this user."""
@@ -67,7 +94,7 @@ class Seat(Base):
             # Available if reserved by same user or reservation expired
             if self.reserved_by == user_id:
                 return True
-            if self.reserved_until and datetime.utcnow() > self.reserved_until:
+            if self.hold_expired:
                 return True
         return False
     
@@ -94,26 +121,61 @@ class Seat(Base):
         self.reserved_until = None
         self.confirmed_booking_id = None
     
+    def layout_flags(self, layout=None):
+        """(is_window, is_aisle) from ``layout``, else from the flight's aircraft.
+
+        Seats not attached to a flight (e.g. built from raw rows) have no known
+        aircraft, so both flags are False unless a layout is passed in.
+        """
+        if layout is None:
+            # Many-to-one by primary key: served from the identity map after the first seat
+            flight = self.flight
+            if flight is None:
+                return False, False
+            layout = get_aircraft_layout(flight.aircraft_type)
+        return layout.flags(self.seat_number)
+    
     @property
     def is_window_seat(self):
         """Check if this is a window seat."""
-        return self.seat_number[-1] in ['A', 'F']  # Basic detection
+        return self.layout_flags()[0]
     
     @property
     def is_aisle_seat(self):
         """Check if this is an aisle seat."""
-        return self.seat_number[-1] in ['C', 'D']  # Basic detection
+        return self.layout_flags()[1]
     
-    def as_dict(self):
+    def as_dict(self, layout=None):
+        is_window, is_aisle = self.layout_flags(layout)
         return {
             "id": self.id,
             "flight_id": self.flight_id,
             "seat_number": self.seat_number,
             "seat_class": self.seat_class,
-            "status": self.normalized_status,
+            "status": self.effective_status,
             "price_modifier": float(self.price_modifier or 0),
             "reserved_until": self.reserved_until.isoformat() if self.reserved_until else None,
-            "is_window": self.is_window_seat,
-            "is_aisle": self.is_aisle_seat,
+            "is_window": is_window,
+            "is_aisle": is_aisle,
             "reserved_by_current_user": False  # Will be set by API
-        }
\ No newline at end of file
+        }
+
+
+class SeatChange(Base):
+    """One seat's new state in a flight's seat change log (see utils/seat_changes)."""
+    __tablename__ = "seat_changes"
+
+    id = Column(BigInteger, primary_key=True)
+    flight_id = Column(Integer, nullable=False)
+    version = Column(BigInteger, nullable=False)  # flights.seat_map_version after this change
+    seat_id = Column(Integer, nullable=False)
+    seat_number = Column(String(10), nullable=False)
+    status = Column(String(20), nullable=False)
+    reserved_by = Column(Integer, nullable=True)
+    reserved_until = Column(DateTime, nullable=True)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('idx_seat_changes_flight_version', 'flight_id', 'version'),
+        Index('idx_seat_changes_changed_at', 'changed_at'),
+    )
@@ -2,10 +2,8 @@
 from __future__ import annotations
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship
-import random
-import string
 
 from .db import Base
 
@@ -59,47 +57,39 @@ class Ticket(Base):
     
     @classmethod
     def generate_ticket_code(cls, flight_id: int) -> str:
-        """Generate unique ticket code format: SKY + YYMMDD + 6 random chars."""
-        date_part = datetime.now().strftime("%y%m%d")
-        random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        return f"SKY{date_part}{random_part}"
+        """Allocate a unique ticket code format: SKY + YYMMDD + 6 chars (see utils/code_allocator)."""
+        from backend.utils.code_allocator import next_ticket_codes
+        return next_ticket_codes(1)[0]
+    
+    @classmethod
+    def ticket_values(cls, booking_id: int, passenger_id: int, flight_id: int,
+                      seat_id: int, passenger_name: str, base_price: float,
+                      seat_fee: float = 0, **passenger_info) -> dict:
+        """Column values of a new ticket, without its code."""
+        return {
+            'booking_id': booking_id,
+            'passenger_id': passenger_id,
+            'flight_id': flight_id,
+            'seat_id': seat_id,
+            'passenger_name': passenger_name,
+            'passenger_phone': passenger_info.get('phone'),
+            'passenger_email': passenger_info.get('email'),
+            'passenger_id_number': passenger_info.get('id_number'),
+            'base_price': base_price,
+            'seat_fee': seat_fee,
+            'total_price': base_price + seat_fee,
+            'status': "ISSUED",
+        }
     
     @classmethod
     def create_ticket(cls, booking_id: int, passenger_id: int, flight_id: int, 
                      seat_id: int, passenger_name: str, base_price: float, 
                      seat_fee: float = 0, **passenger_info) -> 'Ticket':
         """Create new ticket with unique code."""
-        ticket_code = cls.generate_ticket_code(flight_id)
-        
-        # Ensure unique ticket code
-        max_attempts = 10
-        attempt = 0
-        while attempt < max_attempts:
-            from .db import get_session
-            session = get_session()
-            try:
-                existing = session.query(cls).filter_by(ticket_code=ticket_code).first()
-                if not existing:
-                    break
-                ticket_code = cls.generate_ticket_code(flight_id)
-                attempt += 1
-            finally:
-                session.close()
-        
         return cls(
-            ticket_code=ticket_code,
-            booking_id=booking_id,
-            passenger_id=passenger_id,
-            flight_id=flight_id,
-            seat_id=seat_id,
-            passenger_name=passenger_name,
-            passenger_phone=passenger_info.get('phone'),
-            passenger_email=passenger_info.get('email'),
-            passenger_id_number=passenger_info.get('id_number'),
-            base_price=base_price,
-            seat_fee=seat_fee,
-            total_price=base_price + seat_fee,
-            status="ISSUED"
+            ticket_code=cls.generate_ticket_code(flight_id),
+            **cls.ticket_values(booking_id, passenger_id, flight_id, seat_id,
+                                passenger_name, base_price, seat_fee, **passenger_info)
         )
     
     def cancel_ticket(self) -> None:
@@ -136,4 +126,20 @@ class Ticket(Base):
         }
     
     def __repr__(self):
-        return f"<Ticket {self.ticket_code} for {self.passenger_name} on Flight {self.flight_id}>"
\ No newline at end of file
+        return f"<Ticket {self.ticket_code} for {self.passenger_name} on Flight {self.flight_id}>"
+
+class TicketIssuanceJob(Base):
+    """Pending ticket issuance for a paid booking (see utils/ticket_queue)."""
+    __tablename__ = "ticket_issuance_jobs"
+
+    booking_id = Column(Integer, ForeignKey('bookings.id', ondelete='CASCADE'), primary_key=True)
+    status = Column(String(20), default="PENDING", nullable=False)  # PENDING, DONE, FAILED
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # next attempt
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('idx_ticket_jobs_status_available', 'status', 'available_at'),
+    )
@@ -2,8 +2,6 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta
 from decimal import Decimal
-import re
-import unicodedata
 from flask import Blueprint, request, jsonify, current_app
 from backend.utils.blockchain_admin import run_post_payment_blockchain_flow
 from web3 import Web3
@@ -16,7 +14,11 @@ from backend.models.tickets import Ticket
 from backend.models.sky_voucher import SkyVoucher
 from sqlalchemy.orm import joinedload
 from backend.models.flights import Flight
+from backend.models.seats import Seat
 from backend.utils.blockchain import generate_booking_hash_simple, generate_booking_state_hash
+from backend.utils.code_allocator import next_booking_code
+from backend.utils.idempotency import idempotent
+from backend.utils.ticket_issuance import booking_is_effectively_paid, issue_missing_tickets, normalize_passenger_name
 from backend.utils.blockchain_verifier import (
 	verify_transaction_receipt,
 	check_booking_recorded,
@@ -31,18 +33,8 @@ SKY_TO_VND_RATE = Decimal('100')
 SKY_REDEEM_VOUCHER_EXPIRY_DAYS = 30
 
 
-def _normalize_name_for_match(value: str) -> str:
-	text = (value or '').strip().lower()
-	if not text:
-		return ''
-	text = unicodedata.normalize('NFD', text)
-	text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
-	text = re.sub(r'\s+', ' ', text)
-	return text
-
-
 def _name_signature_for_match(value: str) -> str:
-	normalized = _normalize_name_for_match(value)
+	normalized = normalize_passenger_name(value)
 	if not normalized:
 		return ''
 	tokens = [token for token in normalized.split(' ') if token]
@@ -88,11 +80,11 @@ def _find_ticket_for_checkin(session, booking: Booking, matched_bp: BookingPasse
 	if len(booking_tickets) == 1:
 		return booking_tickets[0]
 
-	normalized_target = _normalize_name_for_match(matched_name)
+	normalized_target = normalize_passenger_name(matched_name)
 	signature_target = _name_signature_for_match(matched_name)
 
 	for candidate_ticket in booking_tickets:
-		if _normalize_name_for_match(candidate_ticket.passenger_name) == normalized_target:
+		if normalize_passenger_name(candidate_ticket.passenger_name) == normalized_target:
 			return candidate_ticket
 
 	for candidate_ticket in booking_tickets:
@@ -102,117 +94,6 @@ def _find_ticket_for_checkin(session, booking: Booking, matched_bp: BookingPasse
 	return None
 
 
-def _booking_has_successful_payment(session, booking_id: int) -> bool:
-	return session.query(Payment.id).filter(
-		Payment.booking_id == booking_id,
-		Payment.status == 'SUCCESS'
-	).first() is not None
-
-
-def _booking_is_effectively_paid(session, booking: Booking) -> bool:
-	return (
-		_booking_has_successful_payment(session, booking.id)
-		or bool(getattr(booking, 'confirmed_at', None))
-		or bool(getattr(booking, 'onchain_recorded', False))
-		or bool(getattr(booking, 'nft_minted', False))
-		or bool(getattr(booking, 'sky_minted', False))
-	)
-
-
-def _auto_issue_missing_tickets_for_checkin(session, booking: Booking) -> list[str]:
-	has_successful_payment = _booking_is_effectively_paid(session, booking)
-	if booking.status not in [BookingStatus.CONFIRMED, BookingStatus.COMPLETED] and not has_successful_payment:
-		return []
-
-	if has_successful_payment and booking.status == BookingStatus.PENDING:
-		booking.status = BookingStatus.CONFIRMED
-		if not booking.confirmed_at:
-			booking.confirmed_at = datetime.utcnow()
-		session.add(booking)
-
-	existing_tickets = session.query(Ticket).filter_by(booking_id=booking.id).all()
-	existing_passenger_ids = set()
-	existing_seat_ids = set()
-	existing_name_norm = set()
-
-	for ticket in existing_tickets:
-		if ticket.passenger_id is not None:
-			existing_passenger_ids.add(ticket.passenger_id)
-		if ticket.seat_id is not None:
-			existing_seat_ids.add(ticket.seat_id)
-		existing_name_norm.add(_normalize_name_for_match(ticket.passenger_name))
-
-	flight = booking.outbound_flight
-	if not flight and booking.outbound_flight_id:
-		flight = session.query(Flight).filter_by(id=booking.outbound_flight_id).first()
-
-	generated_codes: list[str] = []
-	for booking_passenger in booking.passengers or []:
-		passenger = booking_passenger.passenger
-		passenger_name = f"{getattr(passenger, 'firstname', '') or ''} {getattr(passenger, 'lastname', '') or ''}".strip() or f"Passenger {booking_passenger.id}"
-		normalized_name = _normalize_name_for_match(passenger_name)
-
-		if (
-			booking_passenger.id in existing_passenger_ids
-			or booking_passenger.passenger_id in existing_passenger_ids
-			or (booking_passenger.seat_id and booking_passenger.seat_id in existing_seat_ids)
-			or normalized_name in existing_name_norm
-		):
-			continue
-
-		seat = booking_passenger.seat
-		base_price = float(flight.price) if (flight and getattr(flight, 'price', None) is not None) else float(booking.total_amount or 0)
-		seat_fee = float(seat.price_modifier) if (seat and getattr(seat, 'price_modifier', None) is not None) else 0
-
-		ticket = Ticket.create_ticket(
-			booking_id=booking.id,
-			passenger_id=booking_passenger.id,
-			flight_id=flight.id if flight else booking.outbound_flight_id,
-			seat_id=seat.id if seat else None,
-			passenger_name=passenger_name,
-			base_price=base_price,
-			seat_fee=seat_fee,
-			phone=getattr(passenger, 'phone_number', None),
-			email=getattr(passenger, 'email', None),
-			id_number=getattr(passenger, 'cccd', None),
-		)
-
-		session.add(ticket)
-		generated_codes.append(ticket.ticket_code)
-
-		if seat:
-			seat.status = 'CONFIRMED'
-			seat.confirmed_booking_id = booking.id
-
-		if booking_passenger.id is not None:
-			existing_passenger_ids.add(booking_passenger.id)
-		if booking_passenger.passenger_id is not None:
-			existing_passenger_ids.add(booking_passenger.passenger_id)
-		if seat and seat.id is not None:
-			existing_seat_ids.add(seat.id)
-		existing_name_norm.add(normalized_name)
-
-	if generated_codes:
-		session.flush()
-
-	return generated_codes
-
-
-def _ensure_booking_tickets_if_eligible(session, booking: Booking) -> bool:
-	"""Ensure eligible booking has tickets. Returns True if new tickets were issued."""
-	generated_codes = _auto_issue_missing_tickets_for_checkin(session, booking)
-	return bool(generated_codes)
-
-
-def _ensure_tickets_for_bookings_if_eligible(session, bookings: list[Booking]) -> int:
-	"""Ensure tickets for a booking list. Returns number of bookings repaired."""
-	repaired_count = 0
-	for booking in bookings or []:
-		if _ensure_booking_tickets_if_eligible(session, booking):
-			repaired_count += 1
-	return repaired_count
-
-
 def _get_user_id_from_bearer() -> int | None:
 	auth_header = request.headers.get('Authorization')
 	if not auth_header or not auth_header.startswith('Bearer '):
@@ -326,7 +207,72 @@ def create_or_update_passenger():
 		return jsonify({'success': True, 'passenger': passenger.as_dict()}), 201
 
 
+def _resolve_seat_ids(session, flight_id: int, entries: list[dict]) -> dict[str, int]:
+	"""Seat ids by seat number for entries that name a seat without its id, in one query."""
+	seat_numbers = {entry['seat_number'] for entry in entries if entry.get('seat_number') and not entry.get('seat_id')}
+	if not seat_numbers:
+		return {}
+	rows = session.query(Seat.seat_number, Seat.id).filter(
+		Seat.flight_id == flight_id,
+		Seat.seat_number.in_(seat_numbers),
+	).all()
+	return {seat_number: seat_id for seat_number, seat_id in rows}
+
+
+def _create_booking_records(session, *, booking_code: str, user_id: int | None, trip_type: TripType,
+							fare_class: FareClass, outbound_flight: Flight, inbound_flight: Flight | None,
+							total_amount: Decimal, wallet_address: str | None,
+							passengers: list[Passenger], passenger_entries: list[dict]) -> Booking:
+	"""Insert a booking and its passengers with a single flush.
+
+	Seat numbers are resolved in one query and the state hash is computed once
+	from the request data; it covers the same fields generate_booking_state_hash
+	reads back from a stored booking, so it needs no re-read.
+	"""
+	entries = passenger_entries or [{'id': p.id, 'seat_number': None, 'seat_id': None} for p in passengers]
+	passenger_map = {p.id: p for p in passengers}
+	entries = [entry for entry in entries if int(entry.get('id')) in passenger_map]
+	seat_ids = _resolve_seat_ids(session, outbound_flight.id, entries)
+
+	booking_state_hash = generate_booking_state_hash({
+		'booking_code': booking_code,
+		'trip_type': trip_type,
+		'fare_class': fare_class,
+		'outbound_flight_id': outbound_flight.id,
+		'inbound_flight_id': inbound_flight.id if inbound_flight else None,
+		'total_amount': total_amount,
+		'passengers': entries,
+	})
+
+	booking = Booking(
+		booking_code=booking_code,
+		user_id=user_id,
+		status=BookingStatus.PENDING,
+		trip_type=trip_type,
+		fare_class=fare_class,
+		outbound_flight=outbound_flight,
+		inbound_flight=inbound_flight,
+		total_amount=total_amount,
+		booking_hash=booking_state_hash,
+		booking_state_hash=booking_state_hash,
+		wallet_address=wallet_address,
+	)
+	# Attached through the relationship so one flush inserts them as a batch
+	# and booking.as_dict() serializes them without lazy loads
+	for entry in entries:
+		seat_number = entry.get('seat_number') or None
+		booking.passengers.append(BookingPassenger(
+			passenger=passenger_map[int(entry.get('id'))],
+			seat_id=entry.get('seat_id') or seat_ids.get(seat_number),
+			seat_number=seat_number,
+		))
+	session.add(booking)
+	session.flush()
+	return booking
+
+
 @bookings_bp.route('/create', methods=['POST'])
+@idempotent('bookings.create')
 def create_booking():
 	"""Create a new booking with flight details and passenger information.
 	Supports both authenticated users and guest bookings.
@@ -470,15 +416,17 @@ def create_booking():
 
 		# Keep all DB work in one transaction scope to avoid race/session inconsistencies.
 		with session_scope() as session:
-			# Validate flights exist inside the same transaction scope.
-			outbound_flight = session.query(Flight).get(outbound_flight_id)
+			# Validate flights exist inside the same transaction scope (both legs in one query).
+			flight_ids = [outbound_flight_id] + ([inbound_flight_id] if inbound_flight_id else [])
+			flights = {flight.id: flight for flight in session.query(Flight).filter(Flight.id.in_(flight_ids))}
+			outbound_flight = flights.get(outbound_flight_id)
 			if not outbound_flight:
 				current_app.logger.warning(f"[bookings.create] outbound flight not found id={outbound_flight_id}")
 				return jsonify({'success': False, 'message': 'Outbound flight not found'}), 404
 
 			inbound_flight = None
 			if inbound_flight_id:
-				inbound_flight = session.query(Flight).get(inbound_flight_id)
+				inbound_flight = flights.get(inbound_flight_id)
 				if not inbound_flight:
 					current_app.logger.warning(f"[bookings.create] inbound flight not found id={inbound_flight_id}")
 					return jsonify({'success': False, 'message': 'Return flight not found'}), 404
@@ -660,100 +608,31 @@ def create_booking():
 					return jsonify({'success': False, 'message': 'Failed to calculate booking total'}), 500
 				final_total = total_amount
 
-			# Generate unique booking code (retry if duplicate)
-			booking_code = None
-			max_retries = 10
-			for attempt in range(max_retries):
-				proposed_code = Booking.generate_booking_code()
-				existing = session.query(Booking).filter_by(booking_code=proposed_code).first()
-				if not existing:
-					booking_code = proposed_code
-					break
-			if not booking_code:
-				current_app.logger.error(f"[bookings.create] failed generating unique booking code after {max_retries} attempts")
-				return jsonify({'success': False, 'message': 'Failed to generate unique booking code'}), 500
+			# Sequence-backed, permuted code: unique without probing bookings
+			booking_code = next_booking_code(session.connection())
 
 			# Extract wallet address if provided (optional)
 			wallet_address = data.get('wallet_address') or data.get('walletAddress') or None
 			if wallet_address and not wallet_address.startswith('0x'):
 				wallet_address = None
 			
-			# Generate blockchain hash from booking code
-			booking_state_hash = generate_booking_state_hash({
-				'booking_code': booking_code,
-				'trip_type': trip_type,
-				'fare_class': fare_class,
-				'outbound_flight_id': outbound_flight_id,
-				'inbound_flight_id': inbound_flight_id,
-				'total_amount': final_total,
-				'wallet_address': wallet_address,
-				'passengers': passenger_entries if passenger_entries else [{'id': p.id, 'seat_number': None} for p in passengers],
-			})
-			booking_hash = booking_state_hash
-			current_app.logger.info(f"[bookings.create] generated booking_hash for {booking_code}")
-
-			# Create booking
-			booking = Booking(
+			booking = _create_booking_records(
+				session,
 				booking_code=booking_code,
 				user_id=user_id,
-				status=BookingStatus.PENDING,
 				trip_type=trip_type,
 				fare_class=fare_class,
-				outbound_flight_id=outbound_flight_id,
-				inbound_flight_id=inbound_flight_id,
+				outbound_flight=outbound_flight,
+				inbound_flight=inbound_flight,
 				total_amount=final_total,
-				booking_hash=booking_hash,
-				booking_state_hash=booking_state_hash,
-				wallet_address=wallet_address
+				wallet_address=wallet_address,
+				passengers=passengers,
+				passenger_entries=passenger_entries,
 			)
-			session.add(booking)
-			session.flush()  # Get booking ID
 			current_app.logger.info(
 				f"[bookings.create] created booking code={booking_code} id={booking.id} user_id={user_id}"
 			)
 
-			# Create booking-passenger relationships and persist seat selections when available
-			for entry in (passenger_entries if passenger_entries else [{'id': p.id, 'seat_number': None, 'seat_id': None} for p in passengers]):
-				pid = int(entry.get('id'))
-				pp = next((p for p in passengers if p.id == pid), None)
-				if not pp:
-					continue
-				
-				seat_number = entry.get('seat_number') or entry.get('seatNumber') or None
-				seat_id = entry.get('seat_id') if entry.get('seat_id') else None
-				
-				if seat_number and not seat_id:
-					from backend.models.seats import Seat
-					seat = session.query(Seat).filter_by(
-						flight_id=outbound_flight_id,
-						seat_number=seat_number
-					).first()
-					if seat:
-						seat_id = seat.id
-				
-				bp = BookingPassenger(
-					booking_id=booking.id,
-					passenger_id=pp.id,
-					seat_id=seat_id,
-					seat_number=seat_number
-				)
-				session.add(bp)
-
-			session.flush()
-
-			booking.booking_state_hash = generate_booking_state_hash(booking)
-			booking.booking_hash = booking.booking_state_hash
-			session.flush()
-			current_app.logger.info(f"[bookings.create] booking committed code={booking_code} user_id={user_id}")
-			
-			verify_booking = session.query(Booking).filter_by(booking_code=booking_code, user_id=user_id).first()
-			if verify_booking:
-				current_app.logger.debug(
-					f"[bookings.create] verified booking exists code={verify_booking.booking_code} id={verify_booking.id} user_id={verify_booking.user_id}"
-				)
-			else:
-				current_app.logger.warning(f"[bookings.create] booking not found after creation code={booking_code}")
-
 			return jsonify({
 				'success': True,
 				'booking': booking.as_dict(),
@@ -794,8 +673,6 @@ def get_booking(booking_code):
 		if not booking:
 			return jsonify({'success': False, 'message': 'Booking not found'}), 404
 
-		_ensure_booking_tickets_if_eligible(session, booking)
-
 		return jsonify({
 			'success': True,
 			'booking': booking.as_dict()
@@ -833,7 +710,7 @@ def lookup_booking_for_checkin():
 				'message': f'Booking ở trạng thái {booking.status.value}, không thể check-in'
 			}), 400
 
-		normalized_input = _normalize_name_for_match(full_name)
+		normalized_input = normalize_passenger_name(full_name)
 		matched_bp = None
 		matched_name = ''
 
@@ -846,7 +723,7 @@ def lookup_booking_for_checkin():
 			candidates = [full_name_forward, full_name_reverse]
 
 			for candidate in candidates:
-				if _normalize_name_for_match(candidate) == normalized_input:
+				if normalize_passenger_name(candidate) == normalized_input:
 					matched_bp = bp
 					matched_name = full_name_forward
 					break
@@ -869,14 +746,14 @@ def lookup_booking_for_checkin():
 		ticket_obj = _find_ticket_for_checkin(session, booking, matched_bp, matched_name)
 		auto_generated_ticket_codes: list[str] = []
 		if not ticket_obj:
-			auto_generated_ticket_codes = _auto_issue_missing_tickets_for_checkin(session, booking)
+			auto_generated_ticket_codes = issue_missing_tickets(session, booking)
 			if auto_generated_ticket_codes:
 				ticket_obj = _find_ticket_for_checkin(session, booking, matched_bp, matched_name)
 				booking_data = booking.as_dict()
 				outbound = booking_data.get('outbound_flight') or {}
 
 		ticket_code = ticket_obj.ticket_code if ticket_obj else None
-		has_successful_payment = _booking_is_effectively_paid(session, booking)
+		has_successful_payment = booking_is_effectively_paid(session, booking)
 		is_checkin_status_allowed = booking.status in [BookingStatus.CONFIRMED, BookingStatus.COMPLETED] or has_successful_payment
 		can_checkin = bool(ticket_code) and is_checkin_status_allowed
 
@@ -971,8 +848,6 @@ def list_user_bookings():
 			joinedload(Booking.inbound_flight)
 		).filter_by(user_id=user_id).order_by(Booking.created_at.desc()).all()
 
-		_ensure_tickets_for_bookings_if_eligible(session, bookings)
-
 		return jsonify({
 			'success': True,
 			'bookings': [booking.as_dict() for booking in bookings]
@@ -1098,8 +973,6 @@ def get_booking_status(booking_code):
 		if not booking:
 			return jsonify({'success': False, 'message': 'Booking not found'}), 404
 
-		_ensure_booking_tickets_if_eligible(session, booking)
-
 		return jsonify({
 			'success': True,
 			'booking': booking.as_dict()
@@ -1143,8 +1016,6 @@ def get_my_trips():
 			query = query.filter(Booking.wallet_address == wallet_address)
 		
 		bookings = query.order_by(Booking.created_at.desc()).all()
-		_ensure_tickets_for_bookings_if_eligible(session, bookings)
-		
 		# Build response with status filtering support
 		response_bookings = []
 		for booking in bookings:
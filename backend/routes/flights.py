@@ -1,37 +1,388 @@
 from flask import Blueprint, request, jsonify
 from backend.models.db import session_scope
 from backend.models.flights import Flight
-from sqlalchemy import and_, func
+from backend.models.flight_fares import FlightDailyFare
+from backend.utils.flight_cache import flight_index, flights_version, search_key
+from backend.utils.http_cache import response_cache, versioned_response
+import backend.utils.fare_calendar  # noqa: F401  registers fare calendar maintenance hooks
+from backend.utils.connection_search import connection_graph
+from backend.utils.request_coalescing import coalesce_requests, flight_requests
+from sqlalchemy import and_, or_, func, tuple_
 from datetime import datetime, timedelta
+from decimal import Decimal
+import base64
+import heapq
+import json
 
 flights_bp = Blueprint('flights', __name__)
 
+# Columns that ?fields= may project, keyed by response name (aliases included)
+FLIGHT_FIELDS = {
+    'id': Flight.id,
+    'flight_number': Flight.flight_number,
+    'airline': Flight.airline,
+    'airline_name': Flight.airline,
+    'departure_airport': Flight.departure_airport,
+    'arrival_airport': Flight.arrival_airport,
+    'origin_code': Flight.departure_airport,
+    'destination_code': Flight.arrival_airport,
+    'departure_time': Flight.departure_time,
+    'arrival_time': Flight.arrival_time,
+    'price': Flight.price,
+    'seats_available': Flight.seats_available,
+}
+
+SORT_COLUMNS = {
+    'departure_time': Flight.departure_time,
+    'price': Flight.price,
+}
+
+# Departure hour buckets as [start, end) hours
+TIME_OF_DAY_BUCKETS = {
+    'night': (0, 5),
+    'morning': (5, 12),
+    'afternoon': (12, 18),
+    'evening': (18, 24),
+}
+
+PAGINATION_PARAMS = ('limit', 'cursor', 'sort', 'fields', 'min_price', 'max_price', 'airline', 'time_of_day')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _apply_route_filters(query, from_value, to_value, date):
+    # Frontend gửi mã IATA trực tiếp từ dropdown, không cần map
+    if from_value:
+        query = query.filter(Flight.departure_airport == from_value)
+    if to_value:
+        query = query.filter(Flight.arrival_airport == to_value)
+    if date:
+        query = query.filter(Flight.departure_time.between(f'{date} 00:00:00', f'{date} 23:59:59'))
+    return query
+
+
+def _serialize_field(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _encode_cursor(sort_value, flight_id):
+    raw = json.dumps([_serialize_field(sort_value), flight_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, sort):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    sort_value, flight_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if sort == 'departure_time':
+        sort_value = datetime.fromisoformat(sort_value)
+    else:
+        sort_value = Decimal(str(sort_value))
+    return sort_value, int(flight_id)
+
+
+def _overlay_seats_available(payload):
+    """Replace cached ``seats_available`` values with the current counters.
+
+    Returns the (id, seats) pairs read, which the response ETag is built on.
+    """
+    legs = list(payload.get('flights') or [])
+    for combination in payload.get('combinations') or []:
+        legs.extend((combination['outbound'], combination['inbound']))
+    legs = [leg for leg in legs if 'id' in leg and 'seats_available' in leg]
+    if not legs:
+        return ()
+
+    with session_scope() as session:
+        seats = dict(
+            session.query(Flight.id, Flight.seats_available)
+            .filter(Flight.id.in_({leg['id'] for leg in legs}))
+            .all()
+        )
+    for leg in legs:
+        leg['seats_available'] = seats.get(leg['id'], leg['seats_available'])
+    return tuple(sorted(seats.items()))
+
+
 @flights_bp.route('/api/flights', methods=['GET'])
+@versioned_response(flights_version, overlay=_overlay_seats_available)
+@coalesce_requests()
 def get_flights():
     """API trả về danh sách chuyến bay theo điều kiện from, to, date"""
     from_value = request.args.get('from')
     to_value = request.args.get('to')
     date = request.args.get('date')  # dạng yyyy-mm-dd
 
+    if any(param in request.args for param in PAGINATION_PARAMS):
+        return _get_flights_page(from_value, to_value, date)
+
+    def _load_flights():
+        with session_scope() as session:
+            query = _apply_route_filters(session.query(Flight), from_value, to_value, date)
+            return [f.as_dict() for f in query.order_by(Flight.departure_time).all()]
+
+    flights = flight_index.get_or_load(search_key(from_value, to_value, date), _load_flights)
+    return jsonify({
+        'flights': flights,
+        'count': len(flights)
+    })
+
+
+def _get_flights_page(from_value, to_value, date):
+    """Keyset-paginated, filtered and projected variant of get_flights."""
+    args = request.args
+
+    sort = args.get('sort', 'departure_time')
+    if sort not in SORT_COLUMNS:
+        return jsonify({'error': f'sort must be one of: {", ".join(SORT_COLUMNS)}'}), 400
+    sort_column = SORT_COLUMNS[sort]
+
+    fields = [name.strip() for name in (args.get('fields') or '').split(',') if name.strip()]
+    unknown = [name for name in fields if name not in FLIGHT_FIELDS]
+    if unknown:
+        return jsonify({'error': f'Unknown fields: {", ".join(unknown)}'}), 400
+    if not fields:
+        fields = list(FLIGHT_FIELDS)
+    if 'seats_available' in fields and 'id' not in fields:
+        # Needed to refresh the cached counter, see _overlay_seats_available
+        fields.insert(0, 'id')
+
+    try:
+        limit = max(1, min(int(args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+        min_price = Decimal(args['min_price']) if args.get('min_price') else None
+        max_price = Decimal(args['max_price']) if args.get('max_price') else None
+    except (ValueError, ArithmeticError):
+        return jsonify({'error': 'limit, min_price and max_price must be numeric'}), 400
+
+    buckets = [name.strip() for name in (args.get('time_of_day') or '').split(',') if name.strip()]
+    if any(name not in TIME_OF_DAY_BUCKETS for name in buckets):
+        return jsonify({'error': f'time_of_day must be among: {", ".join(TIME_OF_DAY_BUCKETS)}'}), 400
+    airlines = [name.strip() for name in (args.get('airline') or '').split(',') if name.strip()]
+
+    cursor = None
+    if args.get('cursor'):
+        try:
+            cursor = _decode_cursor(args['cursor'], sort)
+        except (ValueError, TypeError, ArithmeticError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    # Select only the distinct columns needed (projection plus the keyset columns)
+    columns = {'id': Flight.id, sort: sort_column}
+    for name in fields:
+        columns.setdefault(FLIGHT_FIELDS[name].key, FLIGHT_FIELDS[name])
+    column_names = list(columns)
+
     with session_scope() as session:
-        query = session.query(Flight)
-        
-        # Frontend gửi mã IATA trực tiếp từ dropdown, không cần map
-        if from_value:
-            query = query.filter(Flight.departure_airport == from_value)
-        if to_value:
-            query = query.filter(Flight.arrival_airport == to_value)
-        if date:
-            query = query.filter(Flight.departure_time.between(f'{date} 00:00:00', f'{date} 23:59:59'))
-        
-        flights = query.order_by(Flight.departure_time).all()
-        return jsonify({
-            'flights': [f.as_dict() for f in flights],
-            'count': len(flights)
-        })
+        query = _apply_route_filters(
+            session.query(*[columns[name].label(name) for name in column_names]),
+            from_value, to_value, date,
+        )
+        if min_price is not None:
+            query = query.filter(Flight.price >= min_price)
+        if max_price is not None:
+            query = query.filter(Flight.price <= max_price)
+        if airlines:
+            query = query.filter(Flight.airline.in_(airlines))
+        if buckets:
+            hour = func.extract('hour', Flight.departure_time)
+            query = query.filter(or_(*[
+                and_(hour >= TIME_OF_DAY_BUCKETS[name][0], hour < TIME_OF_DAY_BUCKETS[name][1])
+                for name in buckets
+            ]))
+        if cursor:
+            query = query.filter(tuple_(sort_column, Flight.id) > tuple_(*cursor))
+
+        rows = query.order_by(sort_column, Flight.id).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    flights = []
+    for row in rows:
+        values = row._mapping
+        flights.append({name: _serialize_field(values[FLIGHT_FIELDS[name].key]) for name in fields})
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]._mapping
+        next_cursor = _encode_cursor(last[sort], last['id'])
+
+    return jsonify({
+        'flights': flights,
+        'count': len(flights),
+        'has_more': has_more,
+        'next_cursor': next_cursor,
+        'sort': sort,
+    })
+
+
+def _cheapest_pairs(outbound, inbound, limit):
+    """Top-``limit`` (outbound, inbound) pairs by total price.
+
+    Both lists must be sorted by price. Walks the pair grid lazily with a
+    heap frontier, so only pairs cheaper than the last result are examined
+    instead of the full cross product. Pairs where the return departs
+    before the outbound arrives are skipped.
+    """
+    if not outbound or not inbound:
+        return []
+
+    heap = [(outbound[0].price + inbound[0].price, 0, 0)]
+    pairs = []
+    while heap and len(pairs) < limit:
+        total, i, j = heapq.heappop(heap)
+        if j + 1 < len(inbound):
+            heapq.heappush(heap, (outbound[i].price + inbound[j + 1].price, i, j + 1))
+        if j == 0 and i + 1 < len(outbound):
+            heapq.heappush(heap, (outbound[i + 1].price + inbound[0].price, i + 1, 0))
+        if inbound[j].departure_time <= outbound[i].arrival_time:
+            continue
+        pairs.append((total, outbound[i], inbound[j]))
+    return pairs
+
+
+@flights_bp.route('/api/flights/roundtrip', methods=['GET'])
+@versioned_response(flights_version, overlay=_overlay_seats_available)
+@coalesce_requests()
+def get_roundtrip_flights():
+    """Cheapest outbound/inbound combinations for a round trip, by total price."""
+    from_value = request.args.get('from')
+    to_value = request.args.get('to')
+    depart_date = _parse_date(request.args.get('depart_date') or request.args.get('date'))
+    return_date = _parse_date(request.args.get('return_date'))
+
+    if not from_value or not to_value or depart_date is None or return_date is None:
+        return jsonify({'error': 'Missing required params: from, to, depart_date, return_date'}), 400
+    if return_date < depart_date:
+        return jsonify({'error': 'return_date must not be before depart_date'}), 400
+
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+    except ValueError:
+        limit = 20
+
+    depart_start = datetime.combine(depart_date, datetime.min.time())
+    return_start = datetime.combine(return_date, datetime.min.time())
+
+    with session_scope() as session:
+        # One query for both directions, cheapest first
+        flights = (
+            session.query(Flight)
+            .filter(
+                or_(
+                    and_(
+                        Flight.departure_airport == from_value,
+                        Flight.arrival_airport == to_value,
+                        Flight.departure_time >= depart_start,
+                        Flight.departure_time < depart_start + timedelta(days=1),
+                    ),
+                    and_(
+                        Flight.departure_airport == to_value,
+                        Flight.arrival_airport == from_value,
+                        Flight.departure_time >= return_start,
+                        Flight.departure_time < return_start + timedelta(days=1),
+                    ),
+                )
+            )
+            .order_by(Flight.price, Flight.departure_time)
+            .all()
+        )
+
+    outbound = [f for f in flights if f.departure_airport == from_value]
+    inbound = [f for f in flights if f.departure_airport == to_value]
+    pairs = _cheapest_pairs(outbound, inbound, limit)
+
+    return jsonify({
+        'from': from_value,
+        'to': to_value,
+        'depart_date': depart_date.isoformat(),
+        'return_date': return_date.isoformat(),
+        'combinations': [
+            {
+                'total_price': float(total),
+                'outbound': out_flight.as_dict(),
+                'inbound': in_flight.as_dict(),
+            }
+            for total, out_flight, in_flight in pairs
+        ],
+        'count': len(pairs),
+        'outbound_count': len(outbound),
+        'inbound_count': len(inbound),
+        'currency': 'VND',
+    })
+
+
+@flights_bp.route('/api/flights/connections', methods=['GET'])
+@coalesce_requests()
+def get_connecting_flights():
+    """Search direct, 1-stop and 2-stop itineraries for a route and day."""
+    from_value = request.args.get('from')
+    to_value = request.args.get('to')
+    day = _parse_date(request.args.get('date'))
+
+    if not from_value or not to_value or day is None:
+        return jsonify({'error': 'Missing required params: from, to, date (YYYY-MM-DD)'}), 400
+    if from_value == to_value:
+        return jsonify({'error': 'from and to must differ'}), 400
+
+    try:
+        max_stops = max(0, min(int(request.args.get('max_stops', 2)), 2))
+        min_layover = max(0, int(request.args.get('min_layover', 45)))
+        max_layover = max(min_layover, min(int(request.args.get('max_layover', 360)), 24 * 60))
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+    except ValueError:
+        return jsonify({'error': 'max_stops, min_layover, max_layover and limit must be integers'}), 400
+
+    connection_graph.ensure_fresh()
+    day_start = datetime.combine(day, datetime.min.time())
+    itineraries = connection_graph.search(
+        from_value,
+        to_value,
+        day_start,
+        day_start + timedelta(days=1),
+        max_stops=max_stops,
+        min_layover=timedelta(minutes=min_layover),
+        max_layover=timedelta(minutes=max_layover),
+        limit=limit,
+    )
+    return jsonify({
+        'from': from_value,
+        'to': to_value,
+        'date': day.isoformat(),
+        'itineraries': itineraries,
+        'count': len(itineraries),
+        'currency': 'VND',
+    })
+
+
+@flights_bp.route('/api/flights/cache-stats', methods=['GET'])
+def get_flight_cache_stats():
+    """Hit/miss counters of this worker's flight search index and request coalescing."""
+    return jsonify({
+        **flight_index.stats(),
+        'coalescing': flight_requests.stats(),
+        'responses': response_cache.stats(),
+        'flights_version': flights_version.current(),
+    })
+
+
+def _parse_date(raw):
+    """Parse YYYY-MM-DD (or dd/MM/YYYY, dd-MM-YYYY) into a date, else None."""
+    if not raw:
+        return None
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    return None
 
 
 @flights_bp.route('/api/flights/price-trend', methods=['GET'])
+@versioned_response(flights_version)
+@coalesce_requests()
 def get_price_trend():
     """Return daily minimum fare around a selected center date for a route."""
     from_value = request.args.get('from')
@@ -44,14 +395,7 @@ def get_price_trend():
             'error': 'Missing required params: from, to, center_date'
         }), 400
 
-    center_date = None
-    for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
-        try:
-            center_date = datetime.strptime(center_date_raw, fmt).date()
-            break
-        except ValueError:
-            continue
-
+    center_date = _parse_date(center_date_raw)
     if center_date is None:
         return jsonify({'error': 'center_date must be in YYYY-MM-DD (or dd/MM/YYYY) format'}), 400
 
@@ -63,26 +407,18 @@ def get_price_trend():
     start_date = center_date - timedelta(days=window_days)
     end_date = center_date + timedelta(days=window_days)
 
-    start_dt = datetime.combine(start_date, datetime.min.time())
-    end_dt = datetime.combine(end_date, datetime.max.time())
-
     with session_scope() as session:
         rows = (
-            session.query(
-                func.date(Flight.departure_time).label('flight_date'),
-                func.min(Flight.price).label('min_price'),
-                func.count(Flight.id).label('flight_count')
-            )
+            session.query(FlightDailyFare)
             .filter(
                 and_(
-                    Flight.departure_airport == from_value,
-                    Flight.arrival_airport == to_value,
-                    Flight.departure_time >= start_dt,
-                    Flight.departure_time <= end_dt,
+                    FlightDailyFare.departure_airport == from_value,
+                    FlightDailyFare.arrival_airport == to_value,
+                    FlightDailyFare.flight_date >= start_date,
+                    FlightDailyFare.flight_date <= end_date,
                 )
             )
-            .group_by(func.date(Flight.departure_time))
-            .order_by(func.date(Flight.departure_time))
+            .order_by(FlightDailyFare.flight_date)
             .all()
         )
 
@@ -119,3 +455,102 @@ def get_price_trend():
         'points': points,
         'currency': 'VND',
     })
+
+
+MAX_MATRIX_ROUTES = 20
+MAX_MATRIX_DAYS = 63
+
+
+@flights_bp.route('/api/flights/fare-matrix', methods=['GET', 'POST'])
+@versioned_response(flights_version)
+@coalesce_requests()
+def get_fare_matrix():
+    """Return a route x day minimum-fare matrix for several routes at once.
+
+    Routes come as ``routes=HAN-SGN,SGN-DAD`` (GET) or a JSON list of
+    ``{"from": ..., "to": ...}`` objects (POST). The window is either
+    ``start_date``/``end_date`` or ``center_date``/``window_days``.
+    """
+    if request.method == 'POST':
+        params = request.get_json(silent=True) or {}
+        raw_routes = params.get('routes') or []
+    else:
+        params = request.args
+        raw_routes = [item for item in (params.get('routes') or '').split(',') if item]
+
+    routes = []
+    for item in raw_routes:
+        if isinstance(item, dict):
+            pair = (item.get('from'), item.get('to'))
+        else:
+            pair = tuple(str(item).split('-', 1)) if '-' in str(item) else (None, None)
+        # Same airport codes for GET and POST, e.g. 'han' -> 'HAN'
+        pair = tuple(str(code).strip().upper() if code else None for code in pair)
+        if not pair[0] or not pair[1]:
+            return jsonify({'error': f'Invalid route: {item}'}), 400
+        if pair not in routes:
+            routes.append(pair)
+
+    if not routes:
+        return jsonify({'error': 'Missing required param: routes'}), 400
+    if len(routes) > MAX_MATRIX_ROUTES:
+        return jsonify({'error': f'At most {MAX_MATRIX_ROUTES} routes per request'}), 400
+
+    start_date = _parse_date(params.get('start_date'))
+    end_date = _parse_date(params.get('end_date'))
+    if start_date is None or end_date is None:
+        center_date = _parse_date(params.get('center_date'))
+        if center_date is None:
+            return jsonify({
+                'error': 'Provide start_date and end_date, or center_date (YYYY-MM-DD)'
+            }), 400
+        try:
+            window_days = max(1, min(int(params.get('window_days', 15)), 31))
+        except (TypeError, ValueError):
+            window_days = 15
+        start_date = center_date - timedelta(days=window_days)
+        end_date = center_date + timedelta(days=window_days)
+
+    if end_date < start_date:
+        return jsonify({'error': 'end_date must not be before start_date'}), 400
+    if (end_date - start_date).days + 1 > MAX_MATRIX_DAYS:
+        return jsonify({'error': f'Date window is limited to {MAX_MATRIX_DAYS} days'}), 400
+
+    with session_scope() as session:
+        rows = (
+            session.query(FlightDailyFare)
+            .filter(
+                tuple_(FlightDailyFare.departure_airport, FlightDailyFare.arrival_airport).in_(routes),
+                FlightDailyFare.flight_date >= start_date,
+                FlightDailyFare.flight_date <= end_date,
+            )
+            .all()
+        )
+
+    days = []
+    cursor = start_date
+    while cursor <= end_date:
+        days.append(cursor)
+        cursor += timedelta(days=1)
+    day_index = {day: idx for idx, day in enumerate(days)}
+
+    matrix = {
+        pair: {'min_price': [None] * len(days), 'flight_count': [0] * len(days)}
+        for pair in routes
+    }
+    for row in rows:
+        cells = matrix[(row.departure_airport, row.arrival_airport)]
+        idx = day_index[row.flight_date]
+        cells['min_price'][idx] = float(row.min_price) if row.min_price is not None else None
+        cells['flight_count'][idx] = int(row.flight_count or 0)
+
+    return jsonify({
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'dates': [day.isoformat() for day in days],
+        'routes': [
+            {'from': from_code, 'to': to_code, **matrix[(from_code, to_code)]}
+            for from_code, to_code in routes
+        ],
+        'currency': 'VND',
+    })
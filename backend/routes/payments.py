@@ -8,10 +8,13 @@ from backend.models.db import session_scope
 from backend.models.payments import Payment
 from backend.models.booking import Booking, BookingStatus
 from backend.models.user import User
-from backend.models.tickets import Ticket
 from backend.models.sky_voucher import SkyVoucher
 from backend.config import VNPayConfig
 from backend.utils.blockchain_admin import run_post_payment_blockchain_flow
+from backend.utils.idempotency import idempotent
+from backend.utils.ticket_issuance import confirm_booking_seats
+from backend.utils.ticket_queue import enqueue_ticket_issuance
+import backend.utils.seat_inventory  # noqa: F401  keeps flights.seats_available in step with seat status
 from web3 import Web3
 import urllib.parse
 import hashlib
@@ -79,49 +82,6 @@ def _run_blockchain_post_payment(booking):
 		}
 
 
-def _ensure_tickets_generated(session, booking) -> list[str]:
-	"""Ensure tickets exist for all passengers in a confirmed booking."""
-	existing_tickets = session.query(Ticket).filter_by(booking_id=booking.id).all()
-	if existing_tickets:
-		return [t.ticket_code for t in existing_tickets]
-
-	generated_codes: list[str] = []
-	flight = booking.outbound_flight
-
-	for booking_passenger in booking.passengers or []:
-		passenger = booking_passenger.passenger
-		if not passenger:
-			continue
-
-		seat = booking_passenger.seat
-		base_price = float(flight.price) if (flight and getattr(flight, 'price', None) is not None) else float(booking.total_amount or 0)
-		seat_fee = float(seat.price_modifier) if (seat and getattr(seat, 'price_modifier', None) is not None) else 0
-		passenger_name = f"{passenger.firstname or ''} {passenger.lastname or ''}".strip() or f"Passenger {booking_passenger.id}"
-
-		ticket = Ticket.create_ticket(
-			booking_id=booking.id,
-			passenger_id=booking_passenger.id,
-			flight_id=flight.id if flight else booking.outbound_flight_id,
-			seat_id=seat.id if seat else None,
-			passenger_name=passenger_name,
-			base_price=base_price,
-			seat_fee=seat_fee,
-			phone=passenger.phone_number,
-			email=passenger.email,
-			id_number=passenger.cccd,
-		)
-
-		session.add(ticket)
-		generated_codes.append(ticket.ticket_code)
-
-		if seat:
-			seat.status = 'CONFIRMED'
-			seat.confirmed_booking_id = booking.id
-
-	session.flush()
-	return generated_codes
-
-
 @payment_bp.route('/vnpay/create', methods=['POST'])
 def create_vnpay_payment():
 	try:
@@ -225,7 +185,6 @@ def vnpay_return():
 			# Find and update payment record
 			with session_scope() as session:
 				blockchain_result = None
-				tickets_generated = []
 				payment = session.query(Payment).options(
 					joinedload(Payment.booking).joinedload(Booking.user).joinedload(User.bookings)
 				).filter_by(booking_code=vnp_txn_ref).first()
@@ -268,11 +227,8 @@ def vnpay_return():
 									seat.confirmed_booking_id = payment.booking.id
 									session.add(seat)
 
-						try:
-							tickets_generated = _ensure_tickets_generated(session, payment.booking)
-							print(f"[vnpay] Tickets ensured for {vnp_txn_ref}: {tickets_generated}")
-						except Exception as ticket_exc:
-							print(f"[vnpay] Ticket generation failed for {vnp_txn_ref}: {ticket_exc}")
+						# Tickets are issued by the ticket worker once this commits
+						enqueue_ticket_issuance(session, payment.booking.id)
 
 						# Trigger blockchain flow (record -> mint NFT -> mint SKY)
 						blockchain_result = _run_blockchain_post_payment(payment.booking)
@@ -323,6 +279,7 @@ def _get_user_id_from_bearer() -> int | None:
 
 
 @payment_bp.route('/create', methods=['POST'])
+@idempotent('payment.create')
 def create_payment():
 	"""Create a payment record for a booking. Supports both authenticated users and guest bookings."""
 	user_id = _get_user_id_from_bearer()  # Optional - can be None for guest bookings
@@ -434,7 +391,6 @@ def confirm_payment():
 			payment.transaction_id = transaction_id
 
 		# Update booking status based on payment result
-		tickets_generated = []
 		blockchain_result = None
 		if status == 'SUCCESS':
 			payment.booking.status = BookingStatus.CONFIRMED
@@ -447,15 +403,9 @@ def confirm_payment():
 				# ignore failures here - booking status/tickets should not be blocked
 				pass
 
-			# AUTO-GENERATE TICKETS after successful payment
-			try:
-				tickets_generated = _ensure_tickets_generated(session, payment.booking)
-				print(f"✅ Tickets ensured: {tickets_generated}")
-
-			except Exception as e:
-				print(f"❌ Error generating tickets: {e}")
-				# Don't fail the payment confirmation, just log the error
-				# Tickets can be generated manually later if needed
+			# Tickets are issued by the ticket worker once this commits (retried on failure)
+			confirm_booking_seats(payment.booking)
+			enqueue_ticket_issuance(session, payment.booking.id)
 
 			# Trigger blockchain flow (record -> mint NFT -> mint SKY)
 			blockchain_result = _run_blockchain_post_payment(payment.booking)
@@ -474,7 +424,7 @@ def confirm_payment():
 			'payment': payment.as_dict(),
 			'booking_status': payment.booking.status.value,
 			'booking_code': payment.booking.booking_code,
-			'tickets_generated': tickets_generated if status == 'SUCCESS' else [],
+			'tickets_queued': status == 'SUCCESS',
 			'blockchain': blockchain_result,
 			'can_retry': status == 'FAILED',  # Cho frontend biết có thể retry
 			'retry_count': len(payment.booking.payments)  # Số lần đã thử thanh toán
@@ -602,11 +552,9 @@ def mark_paid():
 		booking.confirmed_at = datetime.utcnow()
 		session.add(booking)
 
-		try:
-			tickets_generated = _ensure_tickets_generated(session, booking)
-			print(f"[mark-paid] Tickets ensured for {booking.booking_code}: {tickets_generated}")
-		except Exception as ticket_exc:
-			print(f"[mark-paid] Ticket generation failed for {booking.booking_code}: {ticket_exc}")
+		# Tickets are issued by the ticket worker once this commits
+		confirm_booking_seats(booking)
+		enqueue_ticket_issuance(session, booking.id)
 
 		# Trigger blockchain flow (record -> mint NFT -> mint SKY)
 		blockchain_result = _run_blockchain_post_payment(booking)
@@ -703,12 +651,9 @@ def blockchain_confirm_payment():
 						booking.confirmed_at = datetime.utcnow()
 						booking_id_for_chain = booking.id
 
-						# Auto-generate tickets
-						try:
-							tickets = _ensure_tickets_generated(session, booking)
-							print(f"[blockchain] confirm: tickets generated: {tickets}")
-						except Exception as te:
-							print(f"[blockchain] confirm: ticket gen failed (non-fatal): {te}")
+						# Tickets are issued by the ticket worker once this commits
+						confirm_booking_seats(booking)
+						enqueue_ticket_issuance(session, booking.id)
 
 					elif status == 'failed':
 						booking.status = BookingStatus.PAYMENT_FAILED
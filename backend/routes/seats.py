@@ -1,22 +1,42 @@
 """Seat management routes for flight seat selection and reservation."""
 from __future__ import annotations
 
+import time
 from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
-from sqlalchemy import func
+from sqlalchemy import or_
 try:
     from backend.models.db import session_scope
     from backend.models.seats import Seat, SeatStatus, SeatClass
+    from backend.models.aircraft_layouts import get_aircraft_layout
     from backend.models.flights import Flight
     from backend.models.user import User
+    import backend.utils.seat_inventory  # noqa: F401  keeps flights.seats_available in step with seat status
+    from backend.utils.seat_reaper import reap_expired_holds
+    from backend.utils.seat_map import seat_maps
+    from backend.utils.seat_changes import read_seat_changes
+    from backend.utils.seat_reservation import FlightBusy, hold_seats
+    from backend.utils.seat_allocation import MAX_PARTY_SIZE, find_seat_block
+    from backend.utils.seat_generation import generate_seats
 except ImportError:
     from models.db import session_scope
     from models.seats import Seat, SeatStatus, SeatClass
+    from models.aircraft_layouts import get_aircraft_layout
     from models.flights import Flight
     from models.user import User
+    from utils.seat_reaper import reap_expired_holds
+    from utils.seat_map import seat_maps
+    from utils.seat_changes import read_seat_changes
+    from utils.seat_reservation import FlightBusy, hold_seats
+    from utils.seat_allocation import MAX_PARTY_SIZE, find_seat_block
+    from utils.seat_generation import generate_seats
 
 seats_bp = Blueprint('seats', __name__)
 
+# Seat map refreshes /allocate makes when its pick loses a race
+ALLOCATE_ATTEMPTS = 3
+ALLOCATE_BUSY_BACKOFF_SECONDS = 0.05
+
 
 @seats_bp.route('/test', methods=['GET'])
 def test_seats():
@@ -52,28 +72,71 @@ def _get_user_id_from_bearer() -> int | None:
 
 @seats_bp.route('/flight/<int:flight_id>/seats', methods=['GET'])
 def get_flight_seats(flight_id):
-    """Get all seats for a flight with their availability status."""
+    """Get all seats for a flight with their availability status.
+
+    ``?format=compact`` returns the seat map as one status character per
+    grid cell (see backend/utils/seat_map.py); add ``layout=0`` to leave out
+    the static layout once the client has it.
+
+    ``?since_version=N`` returns only the seats changed after version N, or
+    the full seat map with ``full: true`` when the change log cannot cover it.
+    """
     user_id = _get_user_id_from_bearer()
     
+    since_version = request.args.get('since_version', type=int)
+    if since_version is not None:
+        with session_scope() as session:
+            delta = read_seat_changes(session.connection(), flight_id, since_version)
+        if delta is None:
+            return jsonify({'success': False, 'message': 'Flight not found'}), 404
+        version, changes = delta
+        if changes is not None:
+            return jsonify({
+                'success': True,
+                'flight_id': flight_id,
+                'since_version': since_version,
+                'version': version,
+                'full': False,
+                'changes': [_seat_change_dict(change, user_id) for change in changes]
+            }), 200
+    
+    seat_map = seat_maps.get(flight_id)
+    if seat_map is None:
+        seat_map = _load_seat_map(flight_id)
+        if seat_map is None:
+            return jsonify({'success': False, 'message': 'Flight not found'}), 404
+    
+    if request.args.get('format') == 'compact':
+        include_layout = request.args.get('layout', '1') != '0'
+        payload = seat_map.to_compact(user_id, include_layout)
+        if since_version is not None:
+            payload['full'] = True
+        return jsonify({'success': True, **payload}), 200
+    
+    seats_data = seat_map.to_seat_list(user_id)
+    return jsonify({
+        'success': True,
+        'flight_id': flight_id,
+        'version': seat_map.version,
+        **({'full': True} if since_version is not None else {}),
+        'seats': seats_data,
+        'total_seats': len(seats_data),
+        'available_count': len([s for s in seats_data if s['status'] == 'AVAILABLE']),
+        'layout_info': seat_map.layout_info
+    }), 200
+
+
+def _load_seat_map(flight_id):
+    """Build the cached seat map for a flight from the database (None if no flight)."""
     with session_scope() as session:
         flight = session.query(Flight).get(flight_id)
         if not flight:
-            return jsonify({'success': False, 'message': 'Flight not found'}), 404
-        
-        # Auto-release expired reservations before returning seats
-        expired_seats = session.query(Seat).filter(
-            Seat.flight_id == flight_id,
-            func.upper(Seat.status) == SeatStatus.TEMPORARILY_RESERVED.value,
-            Seat.reserved_until < datetime.utcnow()
-        ).all()
+            return None
+        # Read before the seats so the map is never older than its version
+        version = flight.seat_map_version or 0
         
-        for seat in expired_seats:
-            seat.release_reservation()
-        
-        if expired_seats:
-            session.flush()
-        
-        # Get all seats for flight  
+        # Expired holds are released by the seat reaper; until then the seat
+        # map reports them as AVAILABLE.
         seats = session.query(Seat).filter_by(flight_id=flight_id).order_by(
             Seat.seat_number
         ).all()
@@ -82,61 +145,45 @@ def get_flight_seats(flight_id):
         if not seats:
             seats = initialize_flight_seats(session, flight)
         
-        # Get all confirmed bookings for this flight to mark seats as CONFIRMED
-        from backend.models.booking import Booking, BookingPassenger, BookingStatus
-        confirmed_bookings = session.query(Booking).filter(
-            Booking.outbound_flight_id == flight_id,
-            Booking.status == BookingStatus.CONFIRMED
-        ).all()
-        
-        # Build a set of confirmed seat numbers from BookingPassenger
-        confirmed_seat_numbers = set()
-        confirmed_seat_ids = set()
-        for booking in confirmed_bookings:
-            for bp in booking.passengers:
-                if bp.seat_number:
-                    confirmed_seat_numbers.add(bp.seat_number)
-                if bp.seat_id:
-                    confirmed_seat_ids.add(bp.seat_id)
-        
-        # Also check inbound flights for round trips
-        inbound_confirmed_bookings = session.query(Booking).filter(
-            Booking.inbound_flight_id == flight_id,
-            Booking.status == BookingStatus.CONFIRMED
-        ).all()
-        for booking in inbound_confirmed_bookings:
-            for bp in booking.passengers:
-                if bp.seat_number:
-                    confirmed_seat_numbers.add(bp.seat_number)
-                if bp.seat_id:
-                    confirmed_seat_ids.add(bp.seat_id)
-        
-        # Add user-specific availability info and update status based on confirmed bookings
-        seats_data = []
-        for seat in seats:
-            seat_dict = seat.as_dict()
-            
-            # If seat is in confirmed bookings, mark it as CONFIRMED
-            if seat.seat_number in confirmed_seat_numbers or seat.id in confirmed_seat_ids:
-                if seat.status != SeatStatus.CONFIRMED.value:
-                    seat.status = SeatStatus.CONFIRMED.value
-                    session.add(seat)
-            
-            seat_dict['status'] = seat.status  # Update status in response
-            seat_dict['available_for_user'] = seat.is_available_for_user(user_id) if user_id else False
-            seat_dict['reserved_by_current_user'] = (seat.reserved_by == user_id) if user_id else False
-            seats_data.append(seat_dict)
-        
-        session.flush()  # Commit seat status updates
+        # Seats held by confirmed bookings on either leg, in one joined query;
+        # they are reported as CONFIRMED without writing during the GET
+        confirmed_seat_ids, confirmed_seat_numbers = _confirmed_seat_refs(session, flight_id)
+        layout = get_aircraft_layout(flight.aircraft_type)
+        layout_info = get_seat_layout_info([{'seat_number': seat.seat_number} for seat in seats], layout)
         
-        return jsonify({
-            'success': True,
-            'flight_id': flight_id,
-            'seats': seats_data,
-            'total_seats': len(seats_data),
-            'available_count': len([s for s in seats_data if s['status'] == 'AVAILABLE']),
-            'layout_info': get_seat_layout_info(seats_data)
-        }), 200
+        return seat_maps.load(
+            flight_id, version, seats, confirmed_seat_ids, confirmed_seat_numbers, layout_info, layout
+        )
+
+
+def _seat_change_dict(change, user_id):
+    """One entry of a seat map delta, with expired holds shown as AVAILABLE."""
+    status = change.effective_status
+    held = status == SeatStatus.TEMPORARILY_RESERVED.value
+    mine = bool(user_id) and held and change.reserved_by == user_id
+    return {
+        'id': change.seat_id,
+        'seat_number': change.seat_number,
+        'status': status,
+        'reserved_until': change.reserved_until.isoformat() if held else None,
+        'reserved_by_current_user': mine,
+        'available_for_user': bool(user_id) and (status == SeatStatus.AVAILABLE.value or mine),
+    }
+
+
+def _confirmed_seat_refs(session, flight_id):
+    """Return (seat ids, seat numbers) taken by confirmed bookings on this flight."""
+    from backend.models.booking import Booking, BookingPassenger, BookingStatus
+    rows = session.query(BookingPassenger.seat_id, BookingPassenger.seat_number).join(
+        Booking, Booking.id == BookingPassenger.booking_id
+    ).filter(
+        Booking.status == BookingStatus.CONFIRMED,
+        or_(Booking.outbound_flight_id == flight_id, Booking.inbound_flight_id == flight_id)
+    ).all()
+    
+    seat_ids = {seat_id for seat_id, _ in rows if seat_id}
+    seat_numbers = {seat_number for _, seat_number in rows if seat_number}
+    return seat_ids, seat_numbers
 
 
 @seats_bp.route('/reserve', methods=['POST'])
@@ -147,12 +194,7 @@ def reserve_seats():
     data = request.get_json(silent=True) or {}
     seat_ids = data.get('seat_ids', [])
     flight_id = data.get('flight_id')
-    hold_minutes_raw = data.get('hold_minutes', 5)
-    try:
-        hold_minutes = int(hold_minutes_raw)
-    except (TypeError, ValueError):
-        hold_minutes = 5
-    hold_minutes = max(1, min(hold_minutes, 15))  # Clamp 1..15 minutes
+    hold_minutes = _hold_minutes(data)
     
     if not seat_ids or not flight_id:
         return jsonify({'success': False, 'message': 'seat_ids and flight_id required'}), 400
@@ -170,126 +212,204 @@ def reserve_seats():
         except Exception:
             pass
 
-        # Release stale temporary reservations for this flight (expired, orphaned, or malformed legacy rows)
-        # Include: expired holds, NULL reserved_until, NULL reserved_by (corrupted state)
-        stale_temp = session.query(Seat).filter(
-            Seat.flight_id == flight_id,
-            func.upper(Seat.status) == SeatStatus.TEMPORARILY_RESERVED.value,
-            (
-                (Seat.reserved_until < datetime.utcnow()) |
-                (Seat.reserved_until.is_(None)) |
-                (Seat.reserved_by.is_(None))
-            )
-        ).all()
-
-        if stale_temp:
-            for s in stale_temp:
-                try:
-                    print(f"[DEBUG] Releasing stale hold on seat id={s.id} number={s.seat_number} reserved_by={s.reserved_by} reserved_until={s.reserved_until}")
-                except Exception:
-                    pass
-                s.release_reservation()
-            session.flush()
-
-        # Get requested seats and enforce seat-flight consistency
-        seats_query = session.query(Seat).filter(
-            Seat.id.in_(seat_ids),
-            Seat.flight_id == flight_id
-        )
-        
-        # Try to use FOR UPDATE lock if DB supports it; fall back gracefully
+        # One conditional UPDATE takes every requested seat or none; seats held
+        # or locked by a concurrent request make it fail fast instead of waiting
         try:
-            seats = seats_query.with_for_update().all()
-        except Exception:
-            # Fall back to non-locked query if DB doesn't support FOR UPDATE
-            seats = seats_query.all()
-
-        if len(seats) != len(seat_ids):
-            found_ids = {seat.id for seat in seats}
-            missing_ids = [seat_id for seat_id in seat_ids if seat_id not in found_ids]
-            return jsonify({
-                'success': False,
-                'message': 'Some seats not found for this flight',
-                'missing_seat_ids': missing_ids,
-                'flight_id': flight_id
-            }), 404
-        
-        # For authenticated users: check if seats are available for them
-        if user_id:
-            unavailable_seats = []
-            conflict_details = []
-            for seat in seats:
-                if not seat.is_available_for_user(user_id):
-                    unavailable_seats.append(seat.seat_number)
-                    conflict_details.append({
-                        'seat_id': seat.id,
-                        'seat_number': seat.seat_number,
-                        'status': seat.status,
-                        'reserved_by': seat.reserved_by,
-                        'reserved_until': seat.reserved_until.isoformat() if seat.reserved_until else None
-                    })
-            
-            if unavailable_seats:
-                try:
-                    print(f"[DEBUG] reserve conflict user_id={user_id} flight_id={flight_id} details={conflict_details}")
-                except Exception:
-                    pass
-                return jsonify({
-                    'success': False,
-                    'message': f'Seats not available: {", ".join(unavailable_seats)}',
-                    'unavailable_seats': unavailable_seats,
-                    'conflict_details': conflict_details
-                }), 409
-            
-            # Release any existing reservations by this user on this flight
-            existing_reservations = session.query(Seat).filter(
-                Seat.flight_id == flight_id,
-                Seat.reserved_by == user_id,
-                func.upper(Seat.status) == SeatStatus.TEMPORARILY_RESERVED.value
-            ).all()
-            
-            for existing_seat in existing_reservations:
-                if existing_seat.id not in seat_ids:  # Don't release seats being re-selected
-                    existing_seat.release_reservation()
-        else:
-            # For guest users: just check if seats are available (not reserved/occupied)
-            unavailable_seats = []
-            conflict_details = []
-            for seat in seats:
-                status = seat.normalized_status
-                if status == SeatStatus.CONFIRMED.value or status == SeatStatus.TEMPORARILY_RESERVED.value:
-                    unavailable_seats.append(seat.seat_number)
-                    conflict_details.append({
-                        'seat_id': seat.id,
-                        'seat_number': seat.seat_number,
-                        'status': status,
-                        'reserved_by': seat.reserved_by,
-                        'reserved_until': seat.reserved_until.isoformat() if seat.reserved_until else None
-                    })
-            
-            if unavailable_seats:
-                return jsonify({
-                    'success': False,
-                    'message': f'Seats not available: {", ".join(unavailable_seats)}',
-                    'unavailable_seats': unavailable_seats,
-                    'conflict_details': conflict_details
-                }), 409
-        
-        # Reserve the new seats
-        for seat in seats:
-            seat.reserve_temporarily(user_id, hold_minutes)
-        
-        session.flush()
+            held = hold_seats(session, flight_id, seat_ids, user_id, hold_minutes)
+        except FlightBusy:
+            session.rollback()
+            return _flight_busy_response(flight_id)
+        if held is None:
+            session.rollback()
+            return _reserve_conflict_response(session, flight_id, seat_ids, user_id)
         
+        layout = _flight_layout(session, flight_id)
+        reserved_seats = [_held_seat_dict(row, layout) for row in held]
         return jsonify({
             'success': True,
-            'reserved_seats': [seat.as_dict() for seat in seats],
-            'reserved_until': seats[0].reserved_until.isoformat() if seats else None,
+            'reserved_seats': reserved_seats,
+            'reserved_until': reserved_seats[0]['reserved_until'] if reserved_seats else None,
             'hold_duration_minutes': hold_minutes,
             'message': f'Seats reserved for {hold_minutes} minutes'
         }), 200
 
 
+def _hold_minutes(data):
+    hold_minutes_raw = data.get('hold_minutes', 5)
+    try:
+        hold_minutes = int(hold_minutes_raw)
+    except (TypeError, ValueError):
+        hold_minutes = 5
+    return max(1, min(hold_minutes, 15))  # Clamp 1..15 minutes
+
+
+def _flight_layout(session, flight_id):
+    """Aircraft layout of a flight, from its cached seat map when there is one."""
+    seat_map = seat_maps.get(flight_id)
+    if seat_map is not None:
+        return seat_map.layout
+    aircraft_type = session.query(Flight.aircraft_type).filter(Flight.id == flight_id).scalar()
+    return get_aircraft_layout(aircraft_type)
+
+
+def _held_seat_dict(row, layout):
+    """Seat.as_dict() shape for a row returned by hold_seats, flagged from ``layout``."""
+    return Seat(
+        id=row.id,
+        flight_id=row.flight_id,
+        seat_number=row.seat_number,
+        seat_class=row.seat_class,
+        status=row.status,
+        price_modifier=row.price_modifier,
+        reserved_by=row.reserved_by,
+        reserved_at=row.reserved_at,
+        reserved_until=row.reserved_until,
+    ).as_dict(layout)
+
+
+def _flight_busy_response(flight_id):
+    """409 for a hold that lost the flight row to a concurrent seat change; safe to retry."""
+    response = jsonify({
+        'success': False,
+        'message': 'Seats of this flight are being updated, please retry',
+        'retryable': True,
+        'flight_id': flight_id
+    })
+    response.status_code = 409
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def _reserve_conflict_response(session, flight_id, seat_ids, user_id):
+    """Explain a failed hold: 404 for seats not on the flight, else 409 with details."""
+    seats = session.query(Seat).filter(
+        Seat.id.in_(seat_ids),
+        Seat.flight_id == flight_id
+    ).all()
+    
+    if len(seats) != len(set(seat_ids)):
+        found_ids = {seat.id for seat in seats}
+        missing_ids = [seat_id for seat_id in seat_ids if seat_id not in found_ids]
+        return jsonify({
+            'success': False,
+            'message': 'Some seats not found for this flight',
+            'missing_seat_ids': missing_ids,
+            'flight_id': flight_id
+        }), 404
+    
+    def is_free(seat):
+        if user_id:
+            return seat.is_available_for_user(user_id)
+        return seat.effective_status == SeatStatus.AVAILABLE.value
+    
+    taken = [seat for seat in seats if not is_free(seat)]
+    unavailable_seats = [seat.seat_number for seat in taken]
+    # Every seat looked free, so a concurrent request had some of them locked
+    conflict_details = [{
+        'seat_id': seat.id,
+        'seat_number': seat.seat_number,
+        'status': seat.effective_status if taken else 'LOCKED',
+        'reserved_by': seat.reserved_by,
+        'reserved_until': seat.reserved_until.isoformat() if seat.reserved_until else None
+    } for seat in (taken or seats)]
+    
+    try:
+        print(f"[DEBUG] reserve conflict user_id={user_id} flight_id={flight_id} details={conflict_details}")
+    except Exception:
+        pass
+    return jsonify({
+        'success': False,
+        'message': f'Seats not available: {", ".join(unavailable_seats) or "being reserved by another request"}',
+        'unavailable_seats': unavailable_seats,
+        'conflict_details': conflict_details
+    }), 409
+
+
+@seats_bp.route('/allocate', methods=['POST'])
+def allocate_seats():
+    """Pick and hold seats for a whole party in one request.
+
+    Body: ``flight_id``, ``passengers`` (1-9), optional ``seat_class``,
+    ``hold_minutes`` and ``preferences`` ``{window, aisle, together}``
+    (``together`` defaults to true). The best block is chosen from the cached
+    seat map (see backend/utils/seat_allocation.py) and held atomically like
+    ``/reserve``; if another request takes one of its seats first, the map is
+    refreshed and the next best block is tried. A hold that finds the flight
+    busy (see ``hold_seats``) is retried after a short pause.
+    """
+    user_id = _get_user_id_from_bearer()
+    
+    data = request.get_json(silent=True) or {}
+    preferences = data.get('preferences') or {}
+    hold_minutes = _hold_minutes(data)
+    try:
+        flight_id = int(data.get('flight_id'))
+        passengers = int(data.get('passengers', 1))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'flight_id and passengers must be integers'}), 400
+    if not 1 <= passengers <= MAX_PARTY_SIZE:
+        return jsonify({'success': False, 'message': f'passengers must be between 1 and {MAX_PARTY_SIZE}'}), 400
+    
+    seat_class = (data.get('seat_class') or '').upper() or None
+    if seat_class and seat_class not in {c.value for c in SeatClass}:
+        return jsonify({'success': False, 'message': f'Invalid seat_class: {seat_class}'}), 400
+    
+    tried = set()
+    busy = False
+    for _ in range(ALLOCATE_ATTEMPTS):
+        busy = False
+        seat_map = seat_maps.get(flight_id) or _load_seat_map(flight_id)
+        if seat_map is None:
+            return jsonify({'success': False, 'message': 'Flight not found'}), 404
+        
+        block = find_seat_block(
+            seat_map, passengers, seat_class,
+            window=bool(preferences.get('window')),
+            aisle=bool(preferences.get('aisle')),
+            together=preferences.get('together', True) is not False,
+            user_id=user_id,
+            exclude=tried,
+        )
+        if block is None:
+            break
+        
+        seat_ids = [seat['id'] for seat in block.seats]
+        with session_scope() as session:
+            try:
+                held = hold_seats(session, flight_id, seat_ids, user_id, hold_minutes)
+            except FlightBusy:
+                held, busy = None, True
+            if held is not None:
+                reserved_seats = sorted((_held_seat_dict(row, seat_map.layout) for row in held), key=lambda seat: seat['id'])
+                return jsonify({
+                    'success': True,
+                    'reserved_seats': reserved_seats,
+                    'seat_numbers': [seat['seat_number'] for seat in block.seats],
+                    'together': block.together,
+                    'reserved_until': reserved_seats[0]['reserved_until'],
+                    'hold_duration_minutes': hold_minutes,
+                    'message': f'{passengers} seats reserved for {hold_minutes} minutes'
+                }), 200
+            session.rollback()
+        
+        if busy:
+            # The flight row was locked by another seat change; the block may still be free
+            time.sleep(ALLOCATE_BUSY_BACKOFF_SECONDS)
+            continue
+        # Lost a race for one of these seats: reload the map and skip them
+        tried.update(seat_ids)
+        seat_maps.invalidate(flight_id)
+    
+    if busy:
+        return _flight_busy_response(flight_id)
+    return jsonify({
+        'success': False,
+        'message': f'Not enough available seats for {passengers} passengers',
+        'passengers': passengers,
+        'seat_class': seat_class
+    }), 409
+
+
 @seats_bp.route('/release', methods=['POST'])  
 def release_seats():
     """Release temporarily reserved seats."""
@@ -307,20 +427,20 @@ def release_seats():
             seats = session.query(Seat).filter(
                 Seat.id.in_(seat_ids),
                 Seat.reserved_by == user_id,
-                func.upper(Seat.status) == SeatStatus.TEMPORARILY_RESERVED.value
+                Seat.status == SeatStatus.TEMPORARILY_RESERVED.value
             ).all()
         elif flight_id:
             # Release all user's temporary reservations for this flight
             seats = session.query(Seat).filter(
                 Seat.flight_id == flight_id,
                 Seat.reserved_by == user_id,
-                func.upper(Seat.status) == SeatStatus.TEMPORARILY_RESERVED.value
+                Seat.status == SeatStatus.TEMPORARILY_RESERVED.value
             ).all()
         else:
             # Release all user's temporary reservations
             seats = session.query(Seat).filter(
                 Seat.reserved_by == user_id,
-                func.upper(Seat.status) == SeatStatus.TEMPORARILY_RESERVED.value
+                Seat.status == SeatStatus.TEMPORARILY_RESERVED.value
             ).all()
         
         for seat in seats:
@@ -339,74 +459,35 @@ def release_seats():
 @seats_bp.route('/cleanup-expired', methods=['POST'])
 def cleanup_expired_reservations():
     """Admin endpoint to cleanup expired seat reservations."""
-    # This could be called by a background job
-    
-    with session_scope() as session:
-        expired_seats = session.query(Seat).filter(
-            func.upper(Seat.status) == SeatStatus.TEMPORARILY_RESERVED.value,
-            Seat.reserved_until < datetime.utcnow()
-        ).all()
-        
-        released_count = 0
-        for seat in expired_seats:
-            seat.release_reservation()
-            released_count += 1
-        
-        session.flush()
-        
-        return jsonify({
-            'success': True,
-            'released_count': released_count,
-            'message': f'Released {released_count} expired seat reservations'
-        }), 200
+    # The seat reaper runs this in the background; the endpoint forces a pass
+    released_count = reap_expired_holds()
+
+    return jsonify({
+        'success': True,
+        'released_count': released_count,
+        'message': f'Released {released_count} expired seat reservations'
+    }), 200
 
 
 def initialize_flight_seats(session, flight):
     """Initialize seats for a flight if they don't exist."""
-    seat_data_list = flight.initialize_seats_for_aircraft("A320")
-    
-    seats = []
-    for seat_data in seat_data_list:
-        seat = Seat(
-            flight_id=seat_data['flight_id'],
-            seat_number=seat_data['seat_number'],
-            seat_class=seat_data['seat_class'],
-            price_modifier=seat_data['price_modifier'],
-            status=seat_data['status']
-        )
-        session.add(seat)
-        seats.append(seat)
-    
-    session.flush()
-    return seats
+    # One INSERT ... SELECT from the aircraft template (also sets seats_available)
+    generate_seats(session.connection(), flight_ids=[flight.id])
+    session.expire(flight, ['seats_available'])
+    return session.query(Seat).filter_by(flight_id=flight.id).order_by(Seat.seat_number).all()
 
 
-def get_seat_layout_info(seats_data):
+def get_seat_layout_info(seats_data, layout=None):
     """Get layout information for frontend rendering."""
     if not seats_data:
         return {}
     
-    rows = set()
-    columns = set()
-    
-    for seat in seats_data:
-        seat_number = seat['seat_number']
-        row = ''.join(filter(str.isdigit, seat_number))
-        col = ''.join(filter(str.isalpha, seat_number))
-        
-        if row:
-            rows.add(int(row))
-        if col:
-            columns.add(col)
-    
-    return {
-        'total_rows': max(rows) if rows else 0,
-        'columns': sorted(list(columns)),
-        'seats_per_row': len(columns) if columns else 0,
-        'business_rows': list(range(1, 4)),      # Rows 1-3
-        'premium_rows': list(range(4, 9)),       # Rows 4-8  
-        'economy_rows': list(range(9, max(rows) + 1)) if rows else []
-    }
+    # Class boundaries come from the aircraft template; only the row count
+    # is taken from the seats (older flights were seated with more rows)
+    layout = layout or get_aircraft_layout()
+    rows = (''.join(filter(str.isdigit, seat['seat_number'])) for seat in seats_data)
+    total_rows = max((int(row) for row in rows if row), default=0)
+    return layout.layout_info_for(total_rows)
 
 
 @seats_bp.route('/book', methods=['POST'])
@@ -11,6 +11,7 @@ try:
     from backend.models.seats import Seat
     from backend.models.payments import Payment
     from backend.utils.email_service import send_checkin_confirmation_email
+    from backend.utils.ticket_issuance import issue_tickets
 except ImportError:
     from models.db import session_scope
     from models.tickets import Ticket
@@ -19,6 +20,7 @@ except ImportError:
     from models.seats import Seat
     from models.payments import Payment
     from utils.email_service import send_checkin_confirmation_email
+    from utils.ticket_issuance import issue_tickets
 
 tickets_bp = Blueprint('tickets', __name__)
 
@@ -60,8 +62,8 @@ def generate_tickets():
                     'tickets': [ticket.get_ticket_info() for ticket in existing_tickets]
                 })
             
-            # Generate tickets for each passenger
-            generated_tickets = []
+            # Collect ticket rows for each passenger
+            ticket_values = []
             
             for booking_passenger in booking.passengers:
                 passenger = booking_passenger.passenger
@@ -73,8 +75,7 @@ def generate_tickets():
                 seat_fee = float(seat.price_modifier) if seat else 0
                 passenger_name = f"{getattr(passenger, 'firstname', '')} {getattr(passenger, 'lastname', '')}".strip() or f"Passenger {booking_passenger.id}"
                 
-                # Create ticket
-                ticket = Ticket.create_ticket(
+                ticket_values.append(Ticket.ticket_values(
                     booking_id=booking.id,
                     passenger_id=booking_passenger.id,
                     flight_id=flight.id if flight else booking.outbound_flight_id,
@@ -85,10 +86,7 @@ def generate_tickets():
                     phone=getattr(passenger, 'phone_number', None),
                     email=getattr(passenger, 'email', None),
                     id_number=getattr(passenger, 'cccd', None)
-                )
-                
-                session.add(ticket)
-                generated_tickets.append(ticket)
+                ))
                 
                 # Confirm seat reservation
                 if seat:
@@ -99,7 +97,11 @@ def generate_tickets():
             booking.status = 'CONFIRMED'
             booking.confirmed_at = datetime.utcnow()
             
-            session.flush()  # Ensure all IDs are assigned
+            session.flush()
+            
+            # One sequence round trip for the codes, one INSERT for the tickets
+            codes = issue_tickets(session, booking, ticket_values)
+            generated_tickets = session.query(Ticket).filter(Ticket.ticket_code.in_(codes)).order_by(Ticket.id).all()
             
             # Return ticket information
             ticket_info = []
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# Tests run from the repository root; backend.* imports need it on the path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# backend.models.db builds its engine at import time (it does not connect)
+os.environ.setdefault('DATABASE_URL', 'postgresql://localhost/skyplan_test')
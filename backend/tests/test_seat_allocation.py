@@ -0,0 +1,87 @@
+"""find_seat_block on each cabin shape of the registered aircraft layouts."""
+from types import SimpleNamespace
+
+import pytest
+
+from backend.models.aircraft_layouts import get_aircraft_layout
+from backend.utils.seat_allocation import find_seat_block
+from backend.utils.seat_map import SeatMap
+
+
+def make_seat_map(aircraft_type, taken=()):
+    """Seat map of a fresh flight with the seat numbers in ``taken`` confirmed."""
+    layout = get_aircraft_layout(aircraft_type)
+    seats = [
+        SimpleNamespace(
+            id=i, flight_id=1, seat_number=seat.seat_number, seat_class=seat.seat_class,
+            price_modifier=seat.price_modifier, reserved_by=None, reserved_until=None,
+            normalized_status='CONFIRMED' if seat.seat_number in taken else 'AVAILABLE',
+        )
+        for i, seat in enumerate(layout.seats, start=1)
+    ]
+    return SeatMap(1, seats, layout=layout)
+
+
+def seat_numbers(block):
+    return [seat['seat_number'] for seat in block.seats]
+
+
+@pytest.mark.parametrize('aircraft_type, seat_class, count, expected', [
+    # 3-3
+    ('A320', 'ECONOMY', 3, ['9A', '9B', '9C']),
+    ('A320', 'BUSINESS', 2, ['1A', '1B']),
+    # 2-2
+    ('A321', 'BUSINESS', 2, ['1A', '1C']),
+    ('ATR72', 'ECONOMY', 2, ['1A', '1C']),
+    # 1-2-1
+    ('B787', 'BUSINESS', 2, ['1D', '1G']),
+    # 2-3-2
+    ('B787', 'PREMIUM', 3, ['8D', '8E', '8G']),
+    ('B787', 'PREMIUM', 2, ['8A', '8C']),
+    # 3-3-3
+    ('B787', 'ECONOMY', 3, ['13A', '13B', '13C']),
+])
+def test_block_stays_within_seats_between_aisles(aircraft_type, seat_class, count, expected):
+    block = find_seat_block(make_seat_map(aircraft_type), count, seat_class)
+
+    assert block.together
+    assert seat_numbers(block) == expected
+
+
+@pytest.mark.parametrize('aircraft_type, seat_class, count, expected', [
+    # 2-2: four across the aisle in one row beats two rows of two
+    ('A321', 'BUSINESS', 4, ['1A', '1C', '1D', '1F']),
+    # 1-2-1: one aisle crossing beats two
+    ('B787', 'BUSINESS', 3, ['1A', '1D', '1G']),
+    # 3-3-3
+    ('B787', 'ECONOMY', 4, ['13A', '13B', '13C', '13D']),
+])
+def test_block_crosses_as_few_aisles_as_possible(aircraft_type, seat_class, count, expected):
+    block = find_seat_block(make_seat_map(aircraft_type), count, seat_class)
+
+    assert seat_numbers(block) == expected
+
+
+def test_taken_seat_breaks_adjacency_in_its_cabin():
+    # 1D taken: 1G+1K straddle an aisle, 2D+2G do not
+    block = find_seat_block(make_seat_map('B787', taken={'1D'}), 2, 'BUSINESS')
+
+    assert seat_numbers(block) == ['2D', '2G']
+
+
+def test_window_preference_uses_cabin_windows():
+    # In the 2-3-2 premium cabin C is next to the aisle, A and K at the windows
+    block = find_seat_block(make_seat_map('B787', taken={'8A'}), 1, 'PREMIUM', window=True)
+
+    assert seat_numbers(block) == ['8K']
+    assert block.seats[0]['is_window'] and not block.seats[0]['is_aisle']
+
+
+def test_seat_map_flags_follow_the_aircraft():
+    seat_map = make_seat_map('B787')
+    flags = {seat['seat_number']: (seat['is_window'], seat['is_aisle']) for seat in seat_map.seats if seat}
+
+    assert flags['13K'] == (True, False)
+    assert flags['13G'] == (False, True)
+    assert flags['13H'] == (False, True)
+    assert flags['1A'] == (True, True)
@@ -0,0 +1,175 @@
+"""Booking creation benchmark: DB round trips per booking, before and after.
+
+Usage:
+    python -m backend.tools.benchmark_booking_creation [--bookings 200] [--passengers 4]
+
+This script:
+1. Picks two flights with seats (a round trip) and, per booking, creates
+   ``--passengers`` scratch passengers with a seat number each
+2. Runs the previous creation steps (a flight lookup per leg, a seat lookup per
+   passenger, a flush for the booking and one for its passengers, a second
+   hash over the stored booking and a verification re-read) and the current
+   pipeline (``_create_booking_records``) on the same input
+3. Counts statements sent to the database during those steps and times them
+4. Rolls every booking back, so the database is left unchanged (apart from
+   consumed booking_code_seq values)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import event, func
+
+from backend.models.db import SessionLocal, engine
+from backend.models.user import User  # noqa: F401
+from backend.models.booking import Booking, BookingPassenger, BookingStatus, FareClass, TripType
+from backend.models.flights import Flight
+from backend.models.passenger import Passenger
+from backend.models.seats import Seat
+from backend.routes.bookings import _create_booking_records
+from backend.utils.blockchain import generate_booking_state_hash
+from backend.utils.code_allocator import next_booking_code
+
+
+def _legacy_create(session, booking_code, outbound_flight_id, inbound_flight_id, total_amount, passengers, entries):
+    """The creation steps as create_booking ran them before the batched pipeline."""
+    session.get(Flight, outbound_flight_id)
+    session.get(Flight, inbound_flight_id)
+    booking = Booking(
+        booking_code=booking_code,
+        status=BookingStatus.PENDING,
+        trip_type=TripType.ROUND_TRIP,
+        fare_class=FareClass.ECONOMY,
+        outbound_flight_id=outbound_flight_id,
+        inbound_flight_id=inbound_flight_id,
+        total_amount=total_amount,
+    )
+    booking.booking_state_hash = generate_booking_state_hash({
+        'booking_code': booking_code,
+        'trip_type': booking.trip_type,
+        'fare_class': booking.fare_class,
+        'outbound_flight_id': outbound_flight_id,
+        'inbound_flight_id': inbound_flight_id,
+        'total_amount': total_amount,
+        'passengers': entries,
+    })
+    session.add(booking)
+    session.flush()
+
+    for entry in entries:
+        passenger = next(p for p in passengers if p.id == entry['id'])
+        seat = session.query(Seat).filter_by(flight_id=outbound_flight_id, seat_number=entry['seat_number']).first()
+        session.add(BookingPassenger(
+            booking_id=booking.id,
+            passenger_id=passenger.id,
+            seat_id=seat.id if seat else None,
+            seat_number=entry['seat_number'],
+        ))
+    session.flush()
+
+    booking.booking_state_hash = generate_booking_state_hash(booking)
+    booking.booking_hash = booking.booking_state_hash
+    session.flush()
+    session.query(Booking).filter_by(booking_code=booking_code, user_id=None).first()
+    return booking
+
+
+def _batched_create(session, booking_code, outbound_flight_id, inbound_flight_id, total_amount, passengers, entries):
+    flights = {flight.id: flight for flight in session.query(Flight).filter(Flight.id.in_([outbound_flight_id, inbound_flight_id]))}
+    return _create_booking_records(
+        session,
+        booking_code=booking_code,
+        user_id=None,
+        trip_type=TripType.ROUND_TRIP,
+        fare_class=FareClass.ECONOMY,
+        outbound_flight=flights[outbound_flight_id],
+        inbound_flight=flights[inbound_flight_id],
+        total_amount=total_amount,
+        wallet_address=None,
+        passengers=passengers,
+        passenger_entries=entries,
+    )
+
+
+def _run(create, bookings: int, passenger_count: int, flight_ids: list[int], seat_numbers: list[str]) -> dict:
+    statements = []
+    count = lambda *args: statements.append(1)  # noqa: E731
+    round_trips, timings, state_hashes = [], [], set()
+
+    for i in range(bookings):
+        session = SessionLocal()
+        try:
+            passengers = [
+                Passenger(lastname='Bench', firstname=f'P{i}-{n}', cccd=f'BENCH{n}', dob=date(1990, 1, 1),
+                          gender='M', phone_number='0900000000', email='bench@skyplan.test',
+                          address='-', city='-', nationality='VN')
+                for n in range(passenger_count)
+            ]
+            session.add_all(passengers)
+            session.flush()
+            entries = [
+                {'id': passenger.id, 'seat_number': seat_numbers[n % len(seat_numbers)], 'seat_id': None}
+                for n, passenger in enumerate(passengers)
+            ]
+            booking_code = next_booking_code(session.connection())
+
+            statements.clear()
+            event.listen(engine, 'before_cursor_execute', count)
+            started = time.perf_counter()
+            try:
+                booking = create(session, booking_code, flight_ids[0], flight_ids[1], Decimal('2500000.00'), passengers, entries)
+                booking.as_dict()
+            finally:
+                timings.append((time.perf_counter() - started) * 1000)
+                event.remove(engine, 'before_cursor_execute', count)
+            round_trips.append(len(statements))
+            state_hashes.add(booking.booking_state_hash == generate_booking_state_hash(booking))
+        finally:
+            session.rollback()
+            session.close()
+
+    return {
+        'round_trips_per_booking': statistics.mean(round_trips),
+        'ms_p50': round(statistics.median(timings), 2),
+        'ms_mean': round(statistics.mean(timings), 2),
+        'state_hash_matches_stored_booking': state_hashes == {True},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Booking creation round-trip benchmark")
+    parser.add_argument('--bookings', type=int, default=200)
+    parser.add_argument('--passengers', type=int, default=4, help="Passengers (with a seat each) per booking")
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        flight_ids = [row[0] for row in session.query(Seat.flight_id).group_by(Seat.flight_id)
+                      .having(func.count(Seat.id) >= args.passengers).order_by(Seat.flight_id).limit(2)]
+        if len(flight_ids) < 2:
+            print("Need two flights with seats; run backend/db/create_all_seats.py first")
+            sys.exit(1)
+        seat_numbers = [row[0] for row in session.query(Seat.seat_number).filter_by(flight_id=flight_ids[0])
+                        .order_by(Seat.id).limit(args.passengers)]
+
+    report = {'bookings': args.bookings, 'passengers_per_booking': args.passengers}
+    report['legacy'] = _run(_legacy_create, args.bookings, args.passengers, flight_ids, seat_numbers)
+    report['batched'] = _run(_batched_create, args.bookings, args.passengers, flight_ids, seat_numbers)
+    report['round_trips_saved_per_booking'] = (
+        report['legacy']['round_trips_per_booking'] - report['batched']['round_trips_per_booking']
+    )
+
+    failures = [name for name in ('legacy', 'batched') if not report[name]['state_hash_matches_stored_booking']]
+    report['failures'] = failures
+    print(json.dumps(report, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""Query-plan and latency regression benchmark for flight search.
+
+Usage:
+    python -m backend.tools.benchmark_flight_search [--rows 1000000] [--keep]
+
+This script:
+1. Creates a scratch schema and seeds it with synthetic flights via generate_series
+2. Builds flight_daily_fares from those flights
+3. EXPLAINs the get_flights and get_price_trend queries and asserts they use
+   the route indexes (no sequential scan, no BitmapAnd)
+4. Times repeated runs of both queries and asserts on p95 latency
+5. Drops the scratch schema (unless --keep)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from backend.models.db import engine
+from backend.models.user import User  # noqa: F401
+from backend.models.flights import Flight
+from backend.models.flight_fares import FlightDailyFare
+from backend.models.seats import Seat  # noqa: F401
+from backend.utils.fare_calendar import rebuild_daily_fares
+
+
+SCHEMA = 'bench_flight_search'
+AIRPORTS = ['HAN', 'SGN', 'DAD', 'CXR', 'HPH', 'VCA', 'VII', 'DLI', 'HUI', 'BMV', 'PQC', 'UIH']
+AIRLINES = ['Vietnam Airlines', 'Vietjet Air', 'Bamboo Airways']
+
+
+def _seed(conn, rows: int, start: date, days: int) -> None:
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"SET search_path TO {SCHEMA}"))
+    Flight.__table__.create(bind=conn)
+    FlightDailyFare.__table__.create(bind=conn)
+
+    airports = "ARRAY[" + ",".join(f"'{code}'" for code in AIRPORTS) + "]"
+    airlines = "ARRAY[" + ",".join(f"'{name}'" for name in AIRLINES) + "]"
+    n = len(AIRPORTS)
+    conn.execute(text(f"""
+        INSERT INTO flights (flight_number, airline, departure_airport, arrival_airport,
+                             departure_time, arrival_time, price, seats_available, aircraft_type)
+        SELECT 'VN' || (g % 9000 + 1000),
+               ({airlines})[g % {len(AIRLINES)} + 1],
+               ({airports})[g % {n} + 1],
+               ({airports})[(g % {n} + 1 + (g / {n}) % ({n} - 1)) % {n} + 1],
+               dep,
+               dep + INTERVAL '2 hours',
+               500000 + (g::bigint * 7919) % 2500000,
+               180,
+               'A320'
+        FROM (
+            SELECT g, :start + (random() * :days * 1440) * INTERVAL '1 minute' AS dep
+            FROM generate_series(1, :rows) AS g
+        ) s
+    """), {'start': datetime.combine(start, datetime.min.time()), 'days': days, 'rows': rows})
+    rebuild_daily_fares(conn)
+    conn.execute(text("ANALYZE flights"))
+    conn.execute(text("ANALYZE flight_daily_fares"))
+
+
+def _flights_query(session, from_code, to_code, day):
+    return (
+        session.query(Flight)
+        .filter(Flight.departure_airport == from_code)
+        .filter(Flight.arrival_airport == to_code)
+        .filter(Flight.departure_time.between(f'{day} 00:00:00', f'{day} 23:59:59'))
+        .order_by(Flight.departure_time)
+    )
+
+
+def _price_trend_query(session, from_code, to_code, day, window_days=31):
+    return (
+        session.query(FlightDailyFare)
+        .filter(
+            and_(
+                FlightDailyFare.departure_airport == from_code,
+                FlightDailyFare.arrival_airport == to_code,
+                FlightDailyFare.flight_date >= day - timedelta(days=window_days),
+                FlightDailyFare.flight_date <= day + timedelta(days=window_days),
+            )
+        )
+        .order_by(FlightDailyFare.flight_date)
+    )
+
+
+def _plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+def _explain(conn, query) -> dict:
+    compiled = query.statement.compile(dialect=postgresql.dialect())
+    row = conn.exec_driver_sql("EXPLAIN (ANALYZE, FORMAT JSON) " + str(compiled), compiled.params).scalar()
+    plan = row if isinstance(row, list) else json.loads(row)
+    return plan[0]['Plan']
+
+
+def _check_plan(name: str, plan: dict, expected_index: str) -> list[str]:
+    failures = []
+    nodes = list(_plan_nodes(plan))
+    node_types = {node['Node Type'] for node in nodes}
+    indexes = {node.get('Index Name') for node in nodes if node.get('Index Name')}
+    if 'Seq Scan' in node_types:
+        failures.append(f"{name}: plan contains a Seq Scan")
+    if 'BitmapAnd' in node_types:
+        failures.append(f"{name}: plan contains a BitmapAnd")
+    if expected_index not in indexes:
+        failures.append(f"{name}: expected index {expected_index}, plan used {sorted(indexes) or 'none'}")
+    return failures
+
+
+def _time(conn, make_query, samples: int) -> dict:
+    timings = []
+    for i in range(samples):
+        query = make_query(i)
+        compiled = query.statement.compile(dialect=postgresql.dialect())
+        started = time.perf_counter()
+        conn.exec_driver_sql(str(compiled), compiled.params).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+        'max_ms': round(timings[-1], 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Flight search query-plan/latency benchmark")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Synthetic flights to seed")
+    parser.add_argument('--days', type=int, default=365, help="Schedule span in days")
+    parser.add_argument('--samples', type=int, default=200, help="Timed runs per query")
+    parser.add_argument('--max-p95-ms', type=float, default=20.0, help="Fail if p95 latency exceeds this")
+    parser.add_argument('--keep', action='store_true', help="Keep the scratch schema afterwards")
+    args = parser.parse_args()
+
+    start = date.today()
+    failures = []
+    report = {'rows': args.rows}
+
+    with engine.connect() as conn:
+        try:
+            seed_started = time.perf_counter()
+            _seed(conn, args.rows, start, args.days)
+            conn.commit()
+            conn.execute(text(f"SET search_path TO {SCHEMA}"))
+            report['seed_seconds'] = round(time.perf_counter() - seed_started, 2)
+
+            session = Session(bind=conn)
+            probe_day = start + timedelta(days=args.days // 2)
+
+            flights_plan = _explain(conn, _flights_query(session, 'HAN', 'SGN', probe_day))
+            trend_plan = _explain(conn, _price_trend_query(session, 'HAN', 'SGN', probe_day))
+            failures += _check_plan('get_flights', flights_plan, 'idx_flights_route_departure')
+            failures += _check_plan('get_price_trend', trend_plan, 'pk_flight_daily_fares')
+
+            def _route(i):
+                return AIRPORTS[i % len(AIRPORTS)], AIRPORTS[(i + 1) % len(AIRPORTS)]
+
+            report['get_flights'] = _time(
+                conn,
+                lambda i: _flights_query(session, *_route(i), start + timedelta(days=i % args.days)),
+                args.samples,
+            )
+            report['get_price_trend'] = _time(
+                conn,
+                lambda i: _price_trend_query(session, *_route(i), start + timedelta(days=i % args.days)),
+                args.samples,
+            )
+            for name in ('get_flights', 'get_price_trend'):
+                if report[name]['p95_ms'] > args.max_p95_ms:
+                    failures.append(f"{name}: p95 {report[name]['p95_ms']} ms > {args.max_p95_ms} ms")
+            session.close()
+        finally:
+            conn.rollback()
+            if not args.keep:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+                conn.commit()
+
+    report['failures'] = failures
+    print(json.dumps(report, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
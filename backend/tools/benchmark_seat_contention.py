@@ -0,0 +1,255 @@
+"""Concurrent seat reservation benchmark: row-lock + Python check vs conditional UPDATE.
+
+Usage:
+    python -m backend.tools.benchmark_seat_contention [--threads 32] [--attempts 50] [--keep]
+
+This script:
+1. Creates a scratch schema with one flight of 180 seats
+2. Runs ``--threads`` users that repeatedly reserve 2 random seats out of a
+   hot block of ``--hot-seats`` and release them again (the release is not
+   timed), first with the legacy
+   ``SELECT ... FOR UPDATE`` + ``is_available_for_user`` + ORM update flow,
+   then with ``hold_seats``
+3. Reports throughput, successful/conflicting/busy attempts and latency
+   percentiles for both, and checks after each run that no user holds more
+   seats than one request asked for, that ``seats_available`` matches
+   the AVAILABLE seats and that the change log has every version
+4. Drops the scratch schema (unless --keep)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from backend.models.db import engine
+from backend.models.user import User  # noqa: F401
+from backend.models.flights import Flight
+from backend.models.seats import Seat, SeatChange, SeatStatus
+from backend.utils.seat_reservation import FlightBusy, hold_seats
+
+
+SCHEMA = 'bench_seat_contention'
+SEATS_PER_REQUEST = 2
+HOLD_MINUTES = 5
+
+
+def _seed(conn) -> int:
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"SET search_path TO {SCHEMA}"))
+    Flight.__table__.create(bind=conn)
+    Seat.__table__.create(bind=conn)
+    SeatChange.__table__.create(bind=conn)
+    flight_id = conn.execute(text("""
+        INSERT INTO flights (flight_number, airline, departure_airport, arrival_airport,
+                             departure_time, arrival_time, price, seats_available, aircraft_type)
+        VALUES ('VN1', 'Vietnam Airlines', 'HAN', 'SGN', :now, :now + INTERVAL '2 hours', 1000000, 180, 'A320')
+        RETURNING id
+    """), {'now': datetime.utcnow()}).scalar()
+    conn.execute(text("""
+        INSERT INTO seats (flight_id, seat_number, seat_class, status, price_modifier, created_at)
+        SELECT :flight_id, r || l, 'ECONOMY', 'AVAILABLE', 0, NOW()
+        FROM generate_series(1, 30) AS r
+        CROSS JOIN unnest(ARRAY['A','B','C','D','E','F']) AS l
+        ORDER BY r, l
+    """), {'flight_id': flight_id})
+    return flight_id
+
+
+def _reset(conn, flight_id: int) -> None:
+    conn.execute(text("""
+        UPDATE seats SET status = 'AVAILABLE', reserved_by = NULL, reserved_at = NULL, reserved_until = NULL
+        WHERE flight_id = :flight_id
+    """), {'flight_id': flight_id})
+    conn.execute(text("DELETE FROM seat_changes"))
+    conn.execute(text("UPDATE flights SET seats_available = 180, seat_map_version = 0 WHERE id = :flight_id"),
+                 {'flight_id': flight_id})
+
+
+def _legacy_reserve(session, flight_id: int, seat_ids: list[int], user_id: int) -> bool:
+    """The reserve flow before hold_seats: lock, check in Python, update via the ORM."""
+    seats = session.query(Seat).filter(
+        Seat.id.in_(seat_ids),
+        Seat.flight_id == flight_id
+    ).with_for_update().all()
+    if len(seats) != len(seat_ids) or not all(seat.is_available_for_user(user_id) for seat in seats):
+        return False
+    existing = session.query(Seat).filter(
+        Seat.flight_id == flight_id,
+        Seat.reserved_by == user_id,
+        Seat.status == SeatStatus.TEMPORARILY_RESERVED.value
+    ).all()
+    for seat in existing:
+        if seat.id not in seat_ids:
+            seat.release_reservation()
+    for seat in seats:
+        seat.reserve_temporarily(user_id, HOLD_MINUTES)
+    session.flush()
+    return True
+
+
+def _atomic_reserve(session, flight_id: int, seat_ids: list[int], user_id: int) -> bool:
+    return hold_seats(session, flight_id, seat_ids, user_id, HOLD_MINUTES) is not None
+
+
+def _release(Session, flight_id: int, user_id: int) -> None:
+    """Give the seats back (the user moved on), untimed, so the hot block keeps churning."""
+    for _ in range(3):
+        session = Session()
+        try:
+            for seat in session.query(Seat).filter(
+                Seat.flight_id == flight_id,
+                Seat.reserved_by == user_id,
+                Seat.status == SeatStatus.TEMPORARILY_RESERVED.value
+            ).order_by(Seat.id).with_for_update().all():
+                seat.release_reservation()
+            session.commit()
+            return
+        except Exception:
+            session.rollback()
+        finally:
+            session.close()
+
+
+def _run(Session, reserve, flight_id: int, hot_ids: list[int], threads: int, attempts: int) -> dict:
+    timings: list[float] = []
+    outcomes = {'held': 0, 'conflict': 0, 'busy': 0, 'error': 0}
+    errors: dict[str, int] = {}
+    lock = threading.Lock()
+    start = threading.Barrier(threads + 1)
+
+    def worker(user_id: int) -> None:
+        rng = random.Random(user_id)
+        start.wait()
+        for _ in range(attempts):
+            seat_ids = sorted(rng.sample(hot_ids, SEATS_PER_REQUEST))
+            session = Session()
+            started = time.perf_counter()
+            try:
+                ok = reserve(session, flight_id, seat_ids, user_id)
+                if ok:
+                    session.commit()
+                else:
+                    session.rollback()
+                outcome = 'held' if ok else 'conflict'
+            except FlightBusy:
+                session.rollback()
+                outcome = 'busy'
+            except Exception as e:
+                session.rollback()
+                outcome = 'error'
+                with lock:
+                    kind = type(getattr(e, 'orig', e)).__name__
+                    errors[kind] = errors.get(kind, 0) + 1
+            finally:
+                session.close()
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                timings.append(elapsed)
+                outcomes[outcome] += 1
+            if outcome == 'held':
+                _release(Session, flight_id, user_id)
+
+    workers = [threading.Thread(target=worker, args=(user_id,)) for user_id in range(1, threads + 1)]
+    for thread in workers:
+        thread.start()
+    started = time.perf_counter()
+    start.wait()
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        **outcomes,
+        'errors': errors,
+        'requests_per_second': round(len(timings) / wall, 1),
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 2),
+        'max_ms': round(timings[-1], 2),
+    }
+
+
+def _check(conn, name: str, flight_id: int) -> list[str]:
+    failures = []
+    overheld = conn.execute(text("""
+        SELECT reserved_by, COUNT(*) FROM seats
+        WHERE flight_id = :flight_id AND status = 'TEMPORARILY_RESERVED'
+        GROUP BY reserved_by HAVING COUNT(*) > :per_request
+    """), {'flight_id': flight_id, 'per_request': SEATS_PER_REQUEST}).fetchall()
+    if overheld:
+        failures.append(f"{name}: users holding more than one request's seats: {overheld}")
+    counter, available = conn.execute(text("""
+        SELECT f.seats_available, (SELECT COUNT(*) FROM seats s WHERE s.flight_id = f.id AND s.status = 'AVAILABLE')
+        FROM flights f WHERE f.id = :flight_id
+    """), {'flight_id': flight_id}).fetchone()
+    if counter != available:
+        failures.append(f"{name}: seats_available={counter} but {available} seats are AVAILABLE")
+    version, logged = conn.execute(text("""
+        SELECT f.seat_map_version, (SELECT COUNT(DISTINCT version) FROM seat_changes c WHERE c.flight_id = f.id)
+        FROM flights f WHERE f.id = :flight_id
+    """), {'flight_id': flight_id}).fetchone()
+    if version != logged:
+        failures.append(f"{name}: seat_map_version={version} but {logged} versions logged")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent seat reservation benchmark")
+    parser.add_argument('--threads', type=int, default=32, help="Concurrent users")
+    parser.add_argument('--attempts', type=int, default=50, help="Reservations per user")
+    parser.add_argument('--hot-seats', type=int, default=40, help="Seats the users compete for")
+    parser.add_argument('--keep', action='store_true', help="Keep the scratch schema afterwards")
+    args = parser.parse_args()
+
+    bench_engine = create_engine(
+        engine.url,
+        pool_size=args.threads,
+        max_overflow=0,
+        connect_args={'options': f'-csearch_path={SCHEMA}'},
+    )
+    Session = sessionmaker(bind=bench_engine, expire_on_commit=False)
+    failures = []
+    report = {'threads': args.threads, 'attempts_per_thread': args.attempts, 'hot_seats': args.hot_seats}
+
+    try:
+        with engine.begin() as conn:
+            flight_id = _seed(conn)
+        with bench_engine.connect() as conn:
+            hot_ids = [row[0] for row in conn.execute(
+                text("SELECT id FROM seats WHERE flight_id = :flight_id ORDER BY id LIMIT :n"),
+                {'flight_id': flight_id, 'n': args.hot_seats},
+            )]
+
+        for name, reserve in (('legacy_lock_and_check', _legacy_reserve), ('conditional_update', _atomic_reserve)):
+            with bench_engine.begin() as conn:
+                _reset(conn, flight_id)
+            report[name] = _run(Session, reserve, flight_id, hot_ids, args.threads, args.attempts)
+            with bench_engine.connect() as conn:
+                failures += _check(conn, name, flight_id)
+            # Legacy deadlocks are part of what is measured; the new path must not raise
+            if reserve is _atomic_reserve and report[name]['error']:
+                failures.append(f"{name}: {report[name]['error']} attempts raised")
+    finally:
+        bench_engine.dispose()
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+    report['failures'] = failures
+    print(json.dumps(report, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
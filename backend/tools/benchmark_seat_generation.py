@@ -0,0 +1,139 @@
+"""Seat generation benchmark: per-seat inserts vs set-based INSERT ... SELECT.
+
+Usage:
+    python -m backend.tools.benchmark_seat_generation [--flights 100000] [--legacy-flights 200] [--keep]
+
+This script:
+1. Creates a scratch schema with ``--flights`` seatless flights over the
+   registered aircraft types
+2. Seats ``--legacy-flights`` of them the old way (one INSERT per seat, as
+   create_all_seats.py did) and extrapolates to the whole schedule
+3. Seats the rest with ``generate_all_seats`` and reports time, rows and
+   batches
+4. Checks every flight got its template's seats and a matching
+   ``seats_available``, then drops the scratch schema (unless --keep)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+
+from backend.models.db import engine
+from backend.models.user import User  # noqa: F401
+from backend.models.aircraft_layouts import AIRCRAFT_LAYOUTS, get_aircraft_layout
+from backend.models.flights import Flight
+from backend.models.seats import Seat
+from backend.utils.seat_generation import SEAT_GENERATION_BATCH_FLIGHTS, generate_all_seats
+
+
+SCHEMA = 'bench_seat_generation'
+
+
+def _seed(conn, flights: int) -> None:
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"SET search_path TO {SCHEMA}"))
+    Flight.__table__.create(bind=conn)
+    Seat.__table__.create(bind=conn)
+    conn.execute(text("""
+        INSERT INTO flights (flight_number, airline, departure_airport, arrival_airport,
+                             departure_time, arrival_time, price, seats_available, aircraft_type)
+        SELECT 'VN' || g, 'Vietnam Airlines', 'HAN', 'SGN',
+               :now + g * INTERVAL '1 hour', :now + g * INTERVAL '1 hour' + INTERVAL '2 hours',
+               1000000, 0, (CAST(:types AS TEXT[]))[1 + g % cardinality(CAST(:types AS TEXT[]))]
+        FROM generate_series(1, :flights) AS g
+    """), {'flights': flights, 'now': datetime.utcnow(), 'types': list(AIRCRAFT_LAYOUTS)})
+
+
+def _legacy_seat(conn, flight_ids: list[int]) -> int:
+    """One INSERT per seat, like the previous create_seats_for_flight."""
+    created = 0
+    for flight_id, aircraft_type in conn.execute(
+        text("SELECT id, aircraft_type FROM flights WHERE id = ANY(:ids)"), {'ids': flight_ids}
+    ).fetchall():
+        for seat in get_aircraft_layout(aircraft_type).seats:
+            conn.execute(text("""
+                INSERT INTO seats (flight_id, seat_number, seat_class, status, price_modifier, created_at)
+                VALUES (:flight_id, :seat_number, :seat_class, 'AVAILABLE', :price_modifier, :created_at)
+            """), {
+                'flight_id': flight_id,
+                'seat_number': seat.seat_number,
+                'seat_class': seat.seat_class,
+                'price_modifier': seat.price_modifier,
+                'created_at': datetime.utcnow(),
+            })
+            created += 1
+        conn.execute(text("UPDATE flights SET seats_available = :n WHERE id = :id"),
+                     {'n': len(get_aircraft_layout(aircraft_type).seats), 'id': flight_id})
+    return created
+
+
+def _check(conn) -> list[str]:
+    failures = []
+    expected = {code: len(layout.seats) for code, layout in AIRCRAFT_LAYOUTS.items()}
+    rows = conn.execute(text("""
+        SELECT f.aircraft_type, f.seats_available, COUNT(s.id) AS seats, COUNT(*) OVER () AS n
+        FROM flights f LEFT JOIN seats s ON s.flight_id = f.id
+        GROUP BY f.id
+    """)).fetchall()
+    wrong = [row for row in rows if row.seats != expected[row.aircraft_type] or row.seats_available != row.seats]
+    if wrong:
+        failures.append(f"{len(wrong)} flights with wrong seats, e.g. {tuple(wrong[0])}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seat generation before/after benchmark")
+    parser.add_argument('--flights', type=int, default=100000, help="Synthetic seatless flights")
+    parser.add_argument('--legacy-flights', type=int, default=200, help="Flights seated the old way")
+    parser.add_argument('--batch-flights', type=int, default=SEAT_GENERATION_BATCH_FLIGHTS)
+    parser.add_argument('--keep', action='store_true', help="Keep the scratch schema afterwards")
+    args = parser.parse_args()
+
+    bench_engine = create_engine(engine.url, connect_args={'options': f'-csearch_path={SCHEMA}'})
+    report = {'flights': args.flights}
+    failures = []
+    try:
+        with engine.begin() as conn:
+            _seed(conn, args.flights)
+
+        with bench_engine.begin() as conn:
+            started = time.perf_counter()
+            legacy_seats = _legacy_seat(conn, list(range(1, args.legacy_flights + 1)))
+            legacy_seconds = time.perf_counter() - started
+        per_flight = legacy_seconds / max(args.legacy_flights, 1)
+        report['legacy'] = {
+            'flights': args.legacy_flights,
+            'seats': legacy_seats,
+            'seconds': round(legacy_seconds, 2),
+            'estimated_seconds_for_all': round(per_flight * args.flights, 1),
+        }
+
+        report['set_based'] = generate_all_seats(bench_engine, args.batch_flights, log=None)
+        report['set_based']['seats_per_flight'] = {code: len(layout.seats) for code, layout in AIRCRAFT_LAYOUTS.items()}
+        if report['set_based']['seconds']:
+            report['estimated_speedup'] = round(
+                report['legacy']['estimated_seconds_for_all'] / report['set_based']['seconds'], 1
+            )
+
+        with bench_engine.connect() as conn:
+            failures += _check(conn)
+    finally:
+        bench_engine.dispose()
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+    report['failures'] = failures
+    print(json.dumps(report, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
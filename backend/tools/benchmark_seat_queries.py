@@ -0,0 +1,176 @@
+"""Before/after benchmark for seat status queries.
+
+Usage:
+    python -m backend.tools.benchmark_seat_queries [--flights 5000] [--keep]
+
+This script:
+1. Creates a scratch schema with synthetic flights and 180 seats per flight,
+   a few percent of them held (half of the holds expired)
+2. For each hot seat query, times the legacy ``UPPER(status)`` form against
+   the canonical ``status = ...`` form used now
+3. EXPLAINs the canonical forms and asserts they use the expected (partial)
+   index with no sequential scan
+4. Drops the scratch schema (unless --keep)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+from backend.models.db import engine
+from backend.models.user import User  # noqa: F401
+from backend.models.flights import Flight
+from backend.models.seats import Seat
+
+
+SCHEMA = 'bench_seat_queries'
+HELD = "'TEMPORARILY_RESERVED'"
+
+# name -> (legacy query, canonical query, index the canonical query must use)
+QUERIES = {
+    'reserve_user_holds': (
+        f"SELECT id FROM seats WHERE flight_id = :flight_id AND reserved_by = :user_id AND UPPER(status) = {HELD}",
+        f"SELECT id FROM seats WHERE flight_id = :flight_id AND reserved_by = :user_id AND status = {HELD}",
+        'idx_seats_flight_held',
+    ),
+    'flight_expired_holds': (
+        f"SELECT id FROM seats WHERE flight_id = :flight_id AND UPPER(status) = {HELD} AND reserved_until < :now",
+        f"SELECT id FROM seats WHERE flight_id = :flight_id AND status = {HELD} AND reserved_until < :now",
+        'idx_seats_flight_held',
+    ),
+    'reap_expired_holds': (
+        f"SELECT id FROM seats WHERE UPPER(status) = {HELD} AND reserved_until < :now",
+        f"SELECT id FROM seats WHERE status = {HELD} AND reserved_until < :now ORDER BY reserved_until LIMIT 500",
+        'idx_seats_held_until',
+    ),
+    'seat_map_available': (
+        "SELECT COUNT(*) FROM seats WHERE flight_id = :flight_id AND UPPER(status) = 'AVAILABLE'",
+        "SELECT COUNT(*) FROM seats WHERE flight_id = :flight_id AND status = 'AVAILABLE'",
+        'idx_seats_flight_status',
+    ),
+}
+
+
+def _seed(conn, flights: int, now: datetime) -> None:
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"SET search_path TO {SCHEMA}"))
+    Flight.__table__.create(bind=conn)
+    Seat.__table__.create(bind=conn)
+
+    conn.execute(text("""
+        INSERT INTO flights (flight_number, airline, departure_airport, arrival_airport,
+                             departure_time, arrival_time, price, seats_available, aircraft_type)
+        SELECT 'VN' || g, 'Vietnam Airlines', 'HAN', 'SGN',
+               :now + g * INTERVAL '1 hour', :now + g * INTERVAL '1 hour' + INTERVAL '2 hours',
+               1000000, 0, 'A320'
+        FROM generate_series(1, :flights) AS g
+    """), {'flights': flights, 'now': now})
+    # ~85% available, ~10% confirmed, ~5% held with half of the holds expired
+    conn.execute(text("""
+        INSERT INTO seats (flight_id, seat_number, seat_class, status, price_modifier,
+                           reserved_by, reserved_at, reserved_until, created_at)
+        SELECT f.id, r || l, 'ECONOMY', s.status, 0,
+               CASE WHEN s.status = 'TEMPORARILY_RESERVED' THEN 1 + (f.id * 31 + r) % 5000 END,
+               CASE WHEN s.status = 'TEMPORARILY_RESERVED' THEN :now END,
+               CASE WHEN s.status = 'TEMPORARILY_RESERVED'
+                    THEN :now + (CASE WHEN random() < 0.5 THEN -1 ELSE 1 END) * INTERVAL '5 minutes' END,
+               :now
+        FROM flights f
+        CROSS JOIN generate_series(1, 30) AS r
+        CROSS JOIN unnest(ARRAY['A','B','C','D','E','F']) AS l
+        CROSS JOIN LATERAL (
+            SELECT CASE WHEN x < 0.85 THEN 'AVAILABLE'
+                        WHEN x < 0.95 THEN 'CONFIRMED'
+                        ELSE 'TEMPORARILY_RESERVED' END AS status
+            FROM (SELECT random() + 0 * f.id AS x) rnd
+        ) s
+    """), {'now': now})
+    conn.execute(text("ANALYZE flights"))
+    conn.execute(text("ANALYZE seats"))
+
+
+def _plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+def _check_plan(conn, name: str, sql: str, params: dict, expected_index: str) -> list[str]:
+    row = conn.execute(text("EXPLAIN (ANALYZE, FORMAT JSON) " + sql), params).scalar()
+    plan = (row if isinstance(row, list) else json.loads(row))[0]['Plan']
+    nodes = list(_plan_nodes(plan))
+    failures = []
+    if any(node['Node Type'] == 'Seq Scan' for node in nodes):
+        failures.append(f"{name}: plan contains a Seq Scan")
+    indexes = {node.get('Index Name') for node in nodes if node.get('Index Name')}
+    if expected_index not in indexes:
+        failures.append(f"{name}: expected index {expected_index}, plan used {sorted(indexes) or 'none'}")
+    return failures
+
+
+def _time(conn, sql: str, make_params, samples: int) -> dict:
+    timings = []
+    for i in range(samples):
+        params = make_params(i)
+        started = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seat status query before/after benchmark")
+    parser.add_argument('--flights', type=int, default=5000, help="Synthetic flights (180 seats each)")
+    parser.add_argument('--samples', type=int, default=100, help="Timed runs per query form")
+    parser.add_argument('--keep', action='store_true', help="Keep the scratch schema afterwards")
+    args = parser.parse_args()
+
+    now = datetime.utcnow()
+    failures = []
+    report = {'flights': args.flights, 'seats': args.flights * 180}
+
+    with engine.connect() as conn:
+        try:
+            seed_started = time.perf_counter()
+            _seed(conn, args.flights, now)
+            conn.commit()
+            conn.execute(text(f"SET search_path TO {SCHEMA}"))
+            report['seed_seconds'] = round(time.perf_counter() - seed_started, 2)
+
+            def _params(i):
+                return {'flight_id': 1 + (i * 7919) % args.flights, 'user_id': 1 + i % 5000, 'now': now}
+
+            for name, (legacy_sql, canonical_sql, expected_index) in QUERIES.items():
+                failures += _check_plan(conn, name, canonical_sql, _params(0), expected_index)
+                before = _time(conn, legacy_sql, _params, args.samples)
+                after = _time(conn, canonical_sql, _params, args.samples)
+                report[name] = {
+                    'before': before,
+                    'after': after,
+                    'p50_speedup': round(before['p50_ms'] / after['p50_ms'], 1) if after['p50_ms'] else None,
+                }
+        finally:
+            conn.rollback()
+            if not args.keep:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+                conn.commit()
+
+    report['failures'] = failures
+    print(json.dumps(report, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Issue tickets for queued paid bookings.
+
+Usage:
+    python backend/tools/process_ticket_jobs.py              # one pass, then exit
+    python backend/tools/process_ticket_jobs.py --loop 5     # keep running every 5s
+    python backend/tools/process_ticket_jobs.py --backfill   # first queue paid bookings missing tickets
+
+Same work as the in-process ticket worker started by the app; useful from cron
+or when the web workers run with TICKET_WORKER_ENABLED=false. --backfill
+queues bookings paid before issuance moved off the read endpoints.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+
+load_dotenv(project_root / '.env')
+
+from backend.models.user import User  # noqa: F401
+from backend.models.passenger import Passenger  # noqa: F401
+from backend.utils.ticket_queue import TICKET_JOB_BATCH_SIZE, enqueue_unticketed_bookings, process_ticket_jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=TICKET_JOB_BATCH_SIZE)
+    parser.add_argument('--backfill', action='store_true',
+                        help='queue every paid booking that still has passengers without tickets')
+    parser.add_argument('--loop', type=float, metavar='SECONDS',
+                        help='repeat every SECONDS instead of exiting after one pass')
+    args = parser.parse_args()
+
+    if args.backfill:
+        print(f"[process_ticket_jobs] Queued {enqueue_unticketed_bookings()} bookings")
+
+    while True:
+        started = time.perf_counter()
+        report = process_ticket_jobs(batch_size=args.batch_size)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"[process_ticket_jobs] Processed {report['jobs']} jobs in {elapsed_ms:.1f} ms, "
+              f"issued {report['tickets']} tickets, {report['failed']} failed")
+        if not args.loop:
+            break
+        time.sleep(args.loop)
+
+
+if __name__ == '__main__':
+    main()
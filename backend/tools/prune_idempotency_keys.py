@@ -0,0 +1,44 @@
+"""Delete expired Idempotency-Key responses.
+
+Usage:
+    python backend/tools/prune_idempotency_keys.py             # one pass, then exit
+    python backend/tools/prune_idempotency_keys.py --loop 600  # keep running every 600s
+
+Same work as the in-process pruner started by the app; useful from cron or
+when the web workers run with IDEMPOTENCY_PRUNER_ENABLED=false.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+
+load_dotenv(project_root / '.env')
+
+from backend.models.db import engine
+from backend.utils.idempotency import prune_idempotency_keys
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--loop', type=float, metavar='SECONDS',
+                        help='repeat every SECONDS instead of exiting after one pass')
+    args = parser.parse_args()
+
+    while True:
+        with engine.begin() as conn:
+            pruned = prune_idempotency_keys(conn)
+        print(f"[prune_idempotency_keys] Pruned {pruned} expired keys")
+        if not args.loop:
+            break
+        time.sleep(args.loop)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Release expired temporary seat holds.
+
+Usage:
+    python backend/tools/reap_seat_holds.py            # one pass, then exit
+    python backend/tools/reap_seat_holds.py --loop 30  # keep running every 30s
+
+Same work as the in-process reaper started by the app (including pruning the
+seat change log); useful from cron or when the web workers run with
+SEAT_REAPER_ENABLED=false.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+
+load_dotenv(project_root / '.env')
+
+from backend.models.db import engine
+from backend.utils.seat_changes import prune_seat_changes
+from backend.utils.seat_reaper import SEAT_REAPER_BATCH_SIZE, reap_expired_holds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=SEAT_REAPER_BATCH_SIZE)
+    parser.add_argument('--loop', type=float, metavar='SECONDS',
+                        help='repeat every SECONDS instead of exiting after one pass')
+    args = parser.parse_args()
+
+    while True:
+        started = time.perf_counter()
+        released = reap_expired_holds(batch_size=args.batch_size)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with engine.begin() as conn:
+            pruned = prune_seat_changes(conn)
+        print(f"[reap_seat_holds] Released {released} expired holds in {elapsed_ms:.1f} ms, pruned {pruned} seat change rows")
+        if not args.loop:
+            break
+        time.sleep(args.loop)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""Collision-free, unguessable public codes from database sequences.
+
+A ``SequenceCodeAllocator`` leases blocks of values from a Postgres sequence
+(one round trip per ``block_size`` codes, shared by all threads of a worker)
+and maps each value through a keyed permutation of ``[0, radix**digits)``.
+Sequence values never repeat and the permutation is a bijection, so codes
+are unique without probing the table; consecutive values come out scattered,
+so codes cannot be enumerated from one another. Values wrap every
+``radix**digits`` codes; public codes carry the year, so codes repeat only past
+that many codes in one year.
+
+The permutation is a Feistel network with HMAC-SHA256 rounds that
+alternately updates the high and low halves (in base ``radix``) of the value. Its key is ``CODE_PERMUTATION_SECRET``: set it once per
+deployment and never change it, since a new key maps old sequence values to
+new codes that can collide with issued ones. Without it the module refuses to
+load, except in development (``FLASK_DEBUG``/``FLASK_ENV=development``), where a
+public key is used with a warning.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import text
+
+from backend.models.db import engine
+
+
+_DEV_CODE_SECRET = 'skyplan-code-permutation'
+
+
+def _is_dev_environment() -> bool:
+    return (
+        os.getenv('FLASK_DEBUG', '').lower() in ('1', 'true', 'yes', 'on')
+        or os.getenv('FLASK_ENV', '').lower() == 'development'
+    )
+
+
+def _code_secret() -> str:
+    secret = os.getenv('CODE_PERMUTATION_SECRET')
+    if secret:
+        return secret
+    if not _is_dev_environment():
+        # The fallback key is in the repository: codes made with it can be enumerated
+        raise ValueError(
+            "CODE_PERMUTATION_SECRET is not set. Set it to a long random string "
+            "(see .env.example); only FLASK_DEBUG/FLASK_ENV=development may run without it."
+        )
+    print("[CodeAllocator] WARNING: CODE_PERMUTATION_SECRET is not set; using the public "
+          "development key. Booking and ticket codes are guessable. Never run like this in production.")
+    return _DEV_CODE_SECRET
+
+
+CODE_SECRET = _code_secret()
+CODE_BLOCK_SIZE = int(os.getenv('CODE_BLOCK_SIZE', '50'))
+
+# SP{year} + 7 digits: 10 million booking codes per year
+BOOKING_CODE_DIGITS = 7
+# SKY{yymmdd} + 6 base-36 characters: 2.2 billion ticket codes before wrapping
+TICKET_CODE_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+TICKET_CODE_CHARS = 6
+
+_ROUNDS = 6
+
+
+class FeistelPermutation:
+    """Keyed bijection on ``range(radix**digits)``."""
+
+    def __init__(self, digits: int, key: bytes, radix: int = 10):
+        self.size = radix ** digits
+        # value = left * right_size + right, with left < left_size and right < right_size
+        self.left_size = radix ** (digits // 2)
+        self.right_size = radix ** (digits - digits // 2)
+        self.key = key
+
+    def _round(self, i: int, value: int) -> int:
+        digest = hmac.new(self.key, f"{i}:{value}".encode(), hashlib.sha256).digest()
+        return int.from_bytes(digest[:8], 'big')
+
+    def __call__(self, value: int) -> int:
+        if not 0 <= value < self.size:
+            raise ValueError(f"value {value} outside permutation domain {self.size}")
+        left, right = divmod(value, self.right_size)
+        # Each round adds a keyed function of one half to the other, which is invertible
+        for i in range(_ROUNDS):
+            if i % 2 == 0:
+                left = (left + self._round(i, right)) % self.left_size
+            else:
+                right = (right + self._round(i, left)) % self.right_size
+        return left * self.right_size + right
+
+
+class SequenceCodeAllocator:
+    """Leases sequence blocks and turns each value into a permuted code number."""
+
+    def __init__(self, sequence: str, digits: int, label: str, block_size: int, radix: int = 10):
+        self.sequence = sequence
+        self.block_size = block_size
+        self.permute = FeistelPermutation(digits, f"{CODE_SECRET}:{label}".encode(), radix)
+        self._leased: deque[int] = deque()
+        self._lock = threading.Lock()
+
+    def _lease(self, conn, count: int) -> None:
+        rows = conn.execute(
+            text(f"SELECT nextval('{self.sequence}') FROM generate_series(1, :count)"),
+            {'count': count},
+        ).fetchall()
+        self._leased.extend(row[0] for row in rows)
+
+    def take(self, count: int = 1, conn=None) -> list[int]:
+        """``count`` unique permuted numbers; leases a new block when needed."""
+        with self._lock:
+            missing = count - len(self._leased)
+            if missing > 0:
+                size = max(self.block_size, missing)
+                if conn is not None:
+                    self._lease(conn, size)
+                else:
+                    with engine.connect() as own:
+                        self._lease(own, size)
+                        own.commit()
+            values = [self._leased.popleft() for _ in range(count)]
+        return [self.permute(value % self.permute.size) for value in values]
+
+
+booking_codes = SequenceCodeAllocator('booking_code_seq', BOOKING_CODE_DIGITS, 'booking', CODE_BLOCK_SIZE)
+
+
+def next_booking_code(conn=None) -> str:
+    """A new booking code like SP20260384751 (no uniqueness probe needed)."""
+    number = booking_codes.take(1, conn)[0]
+    return f"SP{datetime.now().year}{number:0{BOOKING_CODE_DIGITS}d}"
+
+
+ticket_codes = SequenceCodeAllocator(
+    'ticket_code_seq', TICKET_CODE_CHARS, 'ticket', CODE_BLOCK_SIZE, radix=len(TICKET_CODE_ALPHABET)
+)
+
+
+def next_ticket_codes(count: int, conn=None) -> list[str]:
+    """``count`` new ticket codes like SKY261018K3F9Q2, at most one round trip."""
+    date_part = datetime.now().strftime("%y%m%d")
+    codes = []
+    for number in ticket_codes.take(count, conn):
+        chars = []
+        for _ in range(TICKET_CODE_CHARS):
+            number, digit = divmod(number, len(TICKET_CODE_ALPHABET))
+            chars.append(TICKET_CODE_ALPHABET[digit])
+        codes.append(f"SKY{date_part}{''.join(reversed(chars))}")
+    return codes
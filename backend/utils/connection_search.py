@@ -0,0 +1,311 @@
+"""In-memory connecting-flight search over the upcoming schedule.
+
+Each worker keeps a time-ordered adjacency list of departures per airport for
+the next ``CONNECTION_GRAPH_DAYS`` days. Itinerary enumeration walks that
+graph with ``bisect`` on departure times, so enumerating 1-stop and 2-stop
+itineraries never touches the database; only the legs of the itineraries
+returned are read, by id, for their current fields (seats left), and
+itineraries with a sold-out leg are skipped. New flights are picked up incrementally (rows with an id
+above the last one seen); a full rebuild happens periodically or after an
+in-process change to existing flights is committed.
+
+Rebuilds and refreshes run on a background thread per process
+(``start_connection_worker``), so searches never wait for the schedule query
+and keep using the current graph until the new one is swapped in. With the
+thread disabled (``CONNECTION_WORKER_ENABLED=false``) searches do the
+maintenance themselves, one thread at a time; the others do not wait for it.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import NamedTuple
+
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from backend.models.flights import Flight
+
+
+CONNECTION_GRAPH_DAYS = int(os.getenv('CONNECTION_GRAPH_DAYS', '60'))
+CONNECTION_REFRESH_SECONDS = int(os.getenv('CONNECTION_REFRESH_SECONDS', '60'))
+CONNECTION_REBUILD_SECONDS = int(os.getenv('CONNECTION_REBUILD_SECONDS', '900'))
+CONNECTION_WORKER_ENABLED = os.getenv('CONNECTION_WORKER_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+CONNECTION_WORKER_INTERVAL_SECONDS = float(os.getenv('CONNECTION_WORKER_INTERVAL_SECONDS', '5'))
+
+
+class Leg(NamedTuple):
+    departure_time: datetime
+    arrival_time: datetime
+    price: float
+    departure_airport: str
+    arrival_airport: str
+    flight_id: int
+
+
+class ConnectionGraph:
+    """Departures per airport, each list sorted by departure time."""
+
+    def __init__(self, days: int = CONNECTION_GRAPH_DAYS):
+        self.days = days
+        self._departures: dict[str, list[Leg]] = {}
+        self._flight_ids: set[int] = set()
+        self._max_id = 0
+        self._lock = Lock()
+        # Held by the one thread rebuilding or refreshing; searches never wait on it
+        self._maintenance = Lock()
+        self._last_refresh = 0.0
+        self._last_rebuild = 0.0
+        self._stale = True
+
+    def _window(self) -> tuple[datetime, datetime]:
+        start = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        return start, start + timedelta(days=self.days)
+
+    def _add(self, flight) -> None:
+        leg = Leg(
+            flight.departure_time,
+            flight.arrival_time,
+            float(flight.price),
+            flight.departure_airport,
+            flight.arrival_airport,
+            flight.id,
+        )
+        insort(self._departures.setdefault(leg.departure_airport, []), leg)
+        self._flight_ids.add(flight.id)
+        self._max_id = max(self._max_id, flight.id)
+
+    def rebuild(self) -> int:
+        from backend.models.db import session_scope
+
+        # Cleared before reading, so an invalidation during the query is not lost
+        self._stale = False
+        start, end = self._window()
+        with session_scope() as session:
+            flights = (
+                session.query(*_GRAPH_COLUMNS)
+                .filter(Flight.departure_time >= start, Flight.departure_time < end)
+                .all()
+            )
+            max_id = session.query(Flight.id).order_by(Flight.id.desc()).limit(1).scalar() or 0
+
+        with self._lock:
+            self._departures = {}
+            self._flight_ids = set()
+            self._max_id = 0
+            for flight in flights:
+                self._add(flight)
+            self._max_id = max(self._max_id, max_id)
+            now = time.monotonic()
+            self._last_refresh = self._last_rebuild = now
+            return len(self._flight_ids)
+
+    def refresh(self) -> int:
+        """Add flights inserted since the last refresh. Returns the count added."""
+        from backend.models.db import session_scope
+
+        start, end = self._window()
+        with session_scope() as session:
+            flights = (
+                session.query(*_GRAPH_COLUMNS)
+                .filter(
+                    Flight.id > self._max_id,
+                    Flight.departure_time >= start,
+                    Flight.departure_time < end,
+                )
+                .all()
+            )
+        with self._lock:
+            for flight in flights:
+                if flight.id not in self._flight_ids:
+                    self._add(flight)
+            self._last_refresh = time.monotonic()
+            return len(flights)
+
+    def invalidate(self) -> None:
+        """Schedule a full rebuild (existing flights changed)."""
+        self._stale = True
+        _wakeup.set()
+
+    def maintain(self, wait: bool = True) -> None:
+        """Rebuild or refresh when due. With ``wait=False``, skip if another thread is on it."""
+        now = time.monotonic()
+        rebuild = self._stale or now - self._last_rebuild > CONNECTION_REBUILD_SECONDS
+        if not rebuild and now - self._last_refresh <= CONNECTION_REFRESH_SECONDS:
+            return
+        if not self._maintenance.acquire(blocking=wait):
+            return
+        try:
+            if rebuild:
+                self.rebuild()
+            else:
+                self.refresh()
+        finally:
+            self._maintenance.release()
+
+    def ensure_fresh(self) -> None:
+        """Called per search: a no-op while the background worker keeps the graph fresh."""
+        if _thread is not None and _thread.is_alive():
+            return
+        self.maintain(wait=False)
+
+    def search(
+        self,
+        origin: str,
+        destination: str,
+        day_start: datetime,
+        day_end: datetime,
+        max_stops: int = 2,
+        min_layover: timedelta = timedelta(minutes=45),
+        max_layover: timedelta = timedelta(hours=6),
+        limit: int = 20,
+    ) -> list[dict]:
+        """Enumerate itineraries whose first leg departs in [day_start, day_end), with seats on every leg."""
+        itineraries: list[tuple[float, list[Leg]]] = []
+
+        def extend(path: list[Leg], visited: set[str]) -> None:
+            last = path[-1]
+            if last.arrival_airport == destination:
+                itineraries.append((sum(leg.price for leg in path), list(path)))
+                return
+            if len(path) > max_stops:
+                return
+            options = departures.get(last.arrival_airport, ())
+            earliest = last.arrival_time + min_layover
+            latest = last.arrival_time + max_layover
+            idx = bisect_left(options, (earliest,))
+            while idx < len(options) and options[idx].departure_time <= latest:
+                nxt = options[idx]
+                idx += 1
+                if nxt.arrival_airport in visited:
+                    continue
+                path.append(nxt)
+                visited.add(nxt.arrival_airport)
+                extend(path, visited)
+                visited.discard(nxt.arrival_airport)
+                path.pop()
+
+        with self._lock:
+            departures = self._departures
+            options = departures.get(origin, ())
+            idx = bisect_left(options, (day_start,))
+            while idx < len(options) and options[idx].departure_time < day_end:
+                first = options[idx]
+                idx += 1
+                if first.arrival_airport == origin:
+                    continue
+                extend([first], {origin, first.arrival_airport})
+
+        itineraries.sort(key=lambda item: (item[0], item[1][-1].arrival_time))
+        results = []
+        legs: dict[int, dict] = {}
+        loaded: set[int] = set()
+        # Cheapest first; read legs a batch at a time until ``limit`` have seats on every leg
+        batch = max(limit * 2, 20)
+        for offset in range(0, len(itineraries), batch):
+            chunk = itineraries[offset:offset + batch]
+            wanted = {leg.flight_id for _, path in chunk for leg in path} - loaded
+            legs.update(_current_legs(wanted))
+            loaded |= wanted
+            for _, path in chunk:
+                rows = [legs.get(leg.flight_id) for leg in path]
+                if any(row is None or not row['seats_available'] for row in rows):
+                    continue
+                results.append({
+                    'stops': len(path) - 1,
+                    'total_price': sum(row['price'] for row in rows),
+                    'departure_time': path[0].departure_time.isoformat(),
+                    'arrival_time': path[-1].arrival_time.isoformat(),
+                    'duration_minutes': int((path[-1].arrival_time - path[0].departure_time).total_seconds() // 60),
+                    'layovers': [
+                        {
+                            'airport': prev.arrival_airport,
+                            'minutes': int((nxt.departure_time - prev.arrival_time).total_seconds() // 60),
+                        }
+                        for prev, nxt in zip(path, path[1:])
+                    ],
+                    'legs': rows,
+                })
+                if len(results) == limit:
+                    return results
+        return results
+
+
+def _current_legs(flight_ids: set[int]) -> dict[int, dict]:
+    """Current ``as_dict()`` of each flight id, in one query."""
+    if not flight_ids:
+        return {}
+    from backend.models.db import session_scope
+
+    with session_scope() as session:
+        return {flight.id: flight.as_dict() for flight in session.query(Flight).filter(Flight.id.in_(flight_ids))}
+
+
+_GRAPH_COLUMNS = (
+    Flight.id, Flight.departure_time, Flight.arrival_time, Flight.price,
+    Flight.departure_airport, Flight.arrival_airport,
+)
+
+
+_wakeup = threading.Event()
+
+connection_graph = ConnectionGraph()
+
+
+_GRAPH_ATTRS = ('departure_airport', 'arrival_airport', 'departure_time', 'arrival_time', 'price')
+
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_on_flight_change(session, flush_context):
+    # New rows are picked up by refresh(); edits to schedule/price and deletes need a rebuild
+    if session.info.get('connection_graph_stale'):
+        return
+    for obj in session.deleted:
+        if isinstance(obj, Flight):
+            session.info['connection_graph_stale'] = True
+            return
+    for obj in session.dirty:
+        if isinstance(obj, Flight):
+            state = sa_inspect(obj)
+            if any(state.attrs[attr].history.has_changes() for attr in _GRAPH_ATTRS):
+                session.info['connection_graph_stale'] = True
+                return
+
+
+@event.listens_for(Session, 'after_commit')
+def _rebuild_after_commit(session):
+    # Only once committed: a rebuild started earlier would read the old rows
+    if session.info.pop('connection_graph_stale', False):
+        connection_graph.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_flight_change(session):
+    session.info.pop('connection_graph_stale', None)
+
+
+def _run_forever(interval: float) -> None:
+    while True:
+        _wakeup.clear()
+        try:
+            connection_graph.maintain()
+        except Exception as e:
+            print(f"[Connections] Error: {e}")
+        _wakeup.wait(interval)
+
+
+_thread: threading.Thread | None = None
+
+
+def start_connection_worker(interval: float = CONNECTION_WORKER_INTERVAL_SECONDS) -> bool:
+    """Start the in-process graph maintenance thread once per process."""
+    global _thread
+    if not CONNECTION_WORKER_ENABLED or (_thread is not None and _thread.is_alive()):
+        return False
+    _thread = threading.Thread(target=_run_forever, args=(interval,), name='connection-graph', daemon=True)
+    _thread.start()
+    return True
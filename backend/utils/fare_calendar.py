@@ -0,0 +1,145 @@
+"""Maintenance of the flight_daily_fares table behind the fare calendar.
+
+The table holds one row per (route, departure date) with the minimum fare and
+flight count. It is rebuilt in full by ``backend/db/refresh_daily_fares.py``
+and refreshed incrementally for the routes/dates touched by an import or by a
+Flight insert/update/delete flushed through the ORM.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import event, inspect as sa_inspect, text
+from sqlalchemy.orm import Session
+
+from backend.models.flights import Flight
+from backend.utils.flight_cache import flights_version, invalidate_flight_index
+
+
+_AGGREGATE_SELECT = """
+    SELECT departure_airport, arrival_airport, CAST(departure_time AS DATE),
+           MIN(price), COUNT(*), NOW()
+    FROM flights
+"""
+
+_UPSERT_SUFFIX = """
+    GROUP BY departure_airport, arrival_airport, CAST(departure_time AS DATE)
+    ON CONFLICT (departure_airport, arrival_airport, flight_date) DO UPDATE
+    SET min_price = EXCLUDED.min_price,
+        flight_count = EXCLUDED.flight_count,
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+def rebuild_daily_fares(conn) -> int:
+    """Recompute the whole table from flights. Returns the number of rows."""
+    conn.execute(text("DELETE FROM flight_daily_fares"))
+    result = conn.execute(text(
+        "INSERT INTO flight_daily_fares "
+        "(departure_airport, arrival_airport, flight_date, min_price, flight_count, updated_at)"
+        + _AGGREGATE_SELECT + _UPSERT_SUFFIX
+    ))
+    return result.rowcount or 0
+
+
+def refresh_daily_fares(conn, keys: Iterable[tuple[str, str, date]]) -> int:
+    """Recompute only the given (from, to, date) keys.
+
+    Keys are grouped per route and each route is refreshed over the smallest
+    date span covering its keys, so one import window costs one statement per
+    route. Days that no longer have flights are removed.
+    """
+    spans: dict[tuple[str, str], list[date]] = {}
+    for from_code, to_code, day in keys:
+        if not from_code or not to_code or day is None:
+            continue
+        span = spans.setdefault((from_code, to_code), [day, day])
+        span[0] = min(span[0], day)
+        span[1] = max(span[1], day)
+
+    refreshed = 0
+    for (from_code, to_code), (first_day, last_day) in spans.items():
+        params = {
+            'from_code': from_code,
+            'to_code': to_code,
+            'first_day': first_day,
+            'last_day': last_day,
+            'start_dt': datetime.combine(first_day, datetime.min.time()),
+            'end_dt': datetime.combine(last_day + timedelta(days=1), datetime.min.time()),
+        }
+        conn.execute(text("""
+            DELETE FROM flight_daily_fares
+            WHERE departure_airport = :from_code
+              AND arrival_airport = :to_code
+              AND flight_date BETWEEN :first_day AND :last_day
+        """), params)
+        result = conn.execute(text(
+            "INSERT INTO flight_daily_fares "
+            "(departure_airport, arrival_airport, flight_date, min_price, flight_count, updated_at)"
+            + _AGGREGATE_SELECT +
+            """
+            WHERE departure_airport = :from_code
+              AND arrival_airport = :to_code
+              AND departure_time >= :start_dt
+              AND departure_time < :end_dt
+            """
+            + _UPSERT_SUFFIX
+        ), params)
+        refreshed += result.rowcount or 0
+    return refreshed
+
+
+def _flight_keys(flight: Flight, use_history: bool) -> set[tuple[str, str, date]]:
+    """Current (and, for updates, previous) fare keys of a Flight instance."""
+    keys = set()
+    if flight.departure_airport and flight.arrival_airport and flight.departure_time:
+        keys.add((flight.departure_airport, flight.arrival_airport, flight.departure_time.date()))
+    if not use_history:
+        return keys
+
+    state = sa_inspect(flight)
+    old = {}
+    for attr in ('departure_airport', 'arrival_airport', 'departure_time'):
+        history = state.attrs[attr].history
+        old[attr] = history.deleted[0] if history.deleted else getattr(flight, attr)
+    if old['departure_airport'] and old['arrival_airport'] and old['departure_time']:
+        keys.add((old['departure_airport'], old['arrival_airport'], old['departure_time'].date()))
+    return keys
+
+
+_TRACKED_ATTRS = ('price', 'departure_airport', 'arrival_airport', 'departure_time')
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_fare_changes(session, flush_context, instances):
+    keys = session.info.setdefault('fare_calendar_keys', set())
+    for obj in session.new:
+        if isinstance(obj, Flight):
+            keys |= _flight_keys(obj, use_history=False)
+    for obj in session.dirty:
+        if isinstance(obj, Flight):
+            state = sa_inspect(obj)
+            if any(state.attrs[attr].history.has_changes() for attr in _TRACKED_ATTRS):
+                keys |= _flight_keys(obj, use_history=True)
+    for obj in session.deleted:
+        if isinstance(obj, Flight):
+            keys |= _flight_keys(obj, use_history=True)
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_fare_changes(session, flush_context):
+    keys = session.info.pop('fare_calendar_keys', None)
+    if not keys:
+        return
+    refresh_daily_fares(session.connection(), keys)
+    session.info['flights_changed'] = True
+    for from_code, to_code in {(k[0], k[1]) for k in keys}:
+        invalidate_flight_index(from_code, to_code)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_flights_version(session):
+    # The version trigger's bump becomes visible on commit; re-read it on the next request
+    if session.info.pop('flights_changed', False):
+        flights_version.mark_stale()
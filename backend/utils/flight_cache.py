@@ -0,0 +1,195 @@
+"""In-process flight search index for the read-only flight endpoints.
+
+Each gunicorn worker keeps its own index of serialized flight lists keyed by
+(from, to, date). Entries expire after a TTL and the index is bounded in size
+with least-recently-used eviction, so a worker never holds the whole schedule.
+"""
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+
+FLIGHT_INDEX_TTL_SECONDS = int(os.getenv('FLIGHT_INDEX_TTL_SECONDS', '60'))
+FLIGHT_INDEX_MAX_ENTRIES = int(os.getenv('FLIGHT_INDEX_MAX_ENTRIES', '5000'))
+FLIGHT_INDEX_WARM_DAYS = int(os.getenv('FLIGHT_INDEX_WARM_DAYS', '14'))
+FLIGHTS_VERSION_REFRESH_SECONDS = float(os.getenv('FLIGHTS_VERSION_REFRESH_SECONDS', '2'))
+
+
+class TTLIndex:
+    """Thread-safe LRU mapping whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] | None = None) -> int:
+        """Drop all entries, or only those whose key matches ``predicate``."""
+        with self._lock:
+            if predicate is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                stale = [key for key in self._entries if predicate(key)]
+                for key in stale:
+                    del self._entries[key]
+                dropped = len(stale)
+            self.invalidations += 1
+            return dropped
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+flight_index = TTLIndex(FLIGHT_INDEX_TTL_SECONDS, FLIGHT_INDEX_MAX_ENTRIES)
+
+
+def search_key(from_value: str | None, to_value: str | None, date: str | None) -> tuple:
+    return (from_value or None, to_value or None, date or None)
+
+
+def invalidate_flight_index(from_value: str | None = None, to_value: str | None = None) -> int:
+    """Invalidate cached searches, optionally only those touching one route.
+
+    Keys with a wildcard (missing from/to) may include the route too, so they
+    are dropped along with the exact route keys.
+    """
+    if not from_value and not to_value:
+        return flight_index.invalidate()
+
+    def _touches_route(key) -> bool:
+        key_from, key_to = key[0], key[1]
+        return key_from in (None, from_value) and key_to in (None, to_value)
+
+    return flight_index.invalidate(_touches_route)
+
+
+class TableVersion:
+    """Per-worker view of a row in ``table_versions``.
+
+    The row is bumped by a database trigger whenever the table changes (from
+    any process), and re-read at most every ``refresh_seconds``. When the
+    version moves, ``on_change`` runs so in-process caches can be dropped.
+    """
+
+    def __init__(self, name: str, refresh_seconds: float, on_change: Callable[[], Any] | None = None):
+        self.name = name
+        self.refresh_seconds = refresh_seconds
+        self.on_change = on_change
+        self._version: int | None = None
+        self._checked_at = 0.0
+        self._lock = Lock()
+
+    def mark_stale(self) -> None:
+        self._checked_at = 0.0
+
+    def current(self) -> int:
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.refresh_seconds:
+            return self._version
+
+        from sqlalchemy import text
+        from backend.models.db import engine
+
+        try:
+            with engine.connect() as conn:
+                version = conn.execute(
+                    text("SELECT version FROM table_versions WHERE name = :name"),
+                    {'name': self.name},
+                ).scalar()
+        except Exception:
+            version = None
+        version = int(version or 0)
+
+        with self._lock:
+            changed = self._version is not None and version != self._version
+            self._version = version
+            self._checked_at = now
+        if changed and self.on_change:
+            self.on_change()
+        return version
+
+
+flights_version = TableVersion('flights', FLIGHTS_VERSION_REFRESH_SECONDS, on_change=flight_index.invalidate)
+
+
+def warm_flight_index(days: int = FLIGHT_INDEX_WARM_DAYS) -> int:
+    """Preload route/date searches for the next ``days`` days in one query."""
+    from backend.models.db import session_scope
+    from backend.models.flights import Flight
+
+    start = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    end = start + timedelta(days=days)
+
+    grouped: dict[tuple, list[dict]] = {}
+    with session_scope() as session:
+        flights = (
+            session.query(Flight)
+            .filter(Flight.departure_time >= start, Flight.departure_time < end)
+            .order_by(Flight.departure_time)
+            .all()
+        )
+        for flight in flights:
+            key = search_key(
+                flight.departure_airport,
+                flight.arrival_airport,
+                flight.departure_time.date().isoformat(),
+            )
+            grouped.setdefault(key, []).append(flight.as_dict())
+
+    for key, payload in list(grouped.items())[:flight_index.max_entries]:
+        flight_index.put(key, payload)
+    return len(grouped)
@@ -0,0 +1,91 @@
+"""Pre-serialized, ETag-validated responses for read-only endpoints.
+
+Responses are stored as encoded bytes keyed by request path, query string and
+the current version of the table they are derived from. The strong ETag is
+built from the same inputs, so a matching ``If-None-Match`` is answered with
+304 from process memory without running the view or touching the database.
+
+Seat counters change with every hold and booking, far too often to version, so
+endpoints that carry them pass an ``overlay`` that refreshes those fields on
+each request; what it read goes into the ETag.
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import os
+from typing import Any, Callable, Hashable
+
+from flask import Response, current_app, make_response, request
+
+from backend.utils.flight_cache import TTLIndex, TableVersion
+
+
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '300'))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '2000'))
+RESPONSE_CACHE_MAX_AGE = int(os.getenv('RESPONSE_CACHE_MAX_AGE', '30'))
+
+response_cache = TTLIndex(RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def _request_key() -> tuple:
+    return request.path, tuple(sorted(request.args.items(multi=True)))
+
+
+def _etag_for(version: int, key: tuple) -> str:
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return f'v{version}-{digest}'
+
+
+def _cache_headers(response: Response, etag: str, revalidate: bool = False) -> Response:
+    response.set_etag(etag)
+    if revalidate:
+        response.headers['Cache-Control'] = 'no-cache'
+    else:
+        response.headers['Cache-Control'] = (
+            f'public, max-age={RESPONSE_CACHE_MAX_AGE}, stale-while-revalidate={RESPONSE_CACHE_MAX_AGE}'
+        )
+    return response
+
+
+def versioned_response(table_version: TableVersion, overlay: Callable[[Any], Hashable] | None = None):
+    """Serve a GET view from pre-encoded bytes tied to ``table_version``.
+
+    Only 200 responses are stored; errors pass through uncached. With
+    ``overlay``, the cached body is decoded on every request and handed to it
+    to patch live fields in place; its return value is folded into the ETag
+    and clients are told to revalidate instead of reusing the response.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            version = table_version.current()
+            key = _request_key()
+            etag = _etag_for(version, key)
+
+            if overlay is None and request.if_none_match.contains(etag):
+                return _cache_headers(Response(status=304), etag)
+
+            cached = response_cache.get((version, key))
+            if cached is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                cached = (response.get_data(), response.mimetype)
+                response_cache.put((version, key), cached)
+
+            body, mimetype = cached
+            if overlay is None:
+                return _cache_headers(Response(body, status=200, mimetype=mimetype), etag)
+
+            payload = json.loads(body)
+            etag = _etag_for(version, (key, overlay(payload)))
+            if request.if_none_match.contains(etag):
+                return _cache_headers(Response(status=304), etag, revalidate=True)
+            return _cache_headers(current_app.json.response(payload), etag, revalidate=True)
+        return wrapper
+    return decorator
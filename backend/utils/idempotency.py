@@ -0,0 +1,195 @@
+"""Idempotency-Key support for creation endpoints.
+
+A client that retries a POST with the same ``Idempotency-Key`` header gets the
+stored response of the first attempt instead of running the endpoint again
+(a second PENDING booking holding the same seats, a second payment row).
+
+Keys live in the ``idempotency_keys`` table, so a retry is recognised whichever
+worker serves it. The first request claims its key with one
+``INSERT ... ON CONFLICT`` before running the view and stores the response when
+it is done; a concurrent retry of a claimed key gets 409 until then. Keys are
+bound to the caller (the authenticated user id, not the token, so a retry
+after a token refresh still matches) and the request body: reusing one for a
+different request is rejected with 422. Responses are kept for ``IDEMPOTENCY_TTL_HOURS``; 5xx
+responses are not stored, so the request can be retried for real. A claim left
+behind by a crashed worker can be taken over after ``IDEMPOTENCY_LOCK_SECONDS``.
+Expired keys are deleted by a pruner thread per process (its own toggle,
+``IDEMPOTENCY_PRUNER_ENABLED``) or by ``backend/tools/prune_idempotency_keys.py``.
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import Response, jsonify, make_response, request
+from sqlalchemy import text
+
+from backend.models.db import engine
+from backend.models.user import User
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_TTL_HOURS', '24'))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_SECONDS', '60'))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_PRUNER_ENABLED = os.getenv('IDEMPOTENCY_PRUNER_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+IDEMPOTENCY_PRUNE_INTERVAL_SECONDS = float(os.getenv('IDEMPOTENCY_PRUNE_INTERVAL_SECONDS', '600'))
+
+_CLAIM_SQL = text("""
+    INSERT INTO idempotency_keys (scope, key, request_hash, status, created_at, expires_at)
+    VALUES (:scope, :key, :request_hash, 'IN_PROGRESS', :now, :expires_at)
+    ON CONFLICT (scope, key) DO UPDATE
+    SET request_hash = EXCLUDED.request_hash,
+        status = 'IN_PROGRESS',
+        response_status = NULL,
+        response_body = NULL,
+        created_at = EXCLUDED.created_at,
+        expires_at = EXCLUDED.expires_at
+    WHERE idempotency_keys.expires_at < :now
+       OR (idempotency_keys.status = 'IN_PROGRESS' AND idempotency_keys.created_at < :stale_before)
+    RETURNING 1
+""")
+
+
+def _caller_id() -> int | None:
+    """Authenticated user id, as the routes resolve it (None for guests and invalid tokens)."""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    return User.verify_auth_token(auth_header.split(' ')[1])
+
+
+def _request_hash() -> str:
+    digest = hashlib.sha256()
+    digest.update(str(_caller_id() or '').encode())
+    digest.update(b'\n')
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _claim(scope: str, key: str, request_hash: str):
+    """Claim ``key``. Returns None when claimed, else the existing row."""
+    while True:
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            claimed = conn.execute(_CLAIM_SQL, {
+                'scope': scope,
+                'key': key,
+                'request_hash': request_hash,
+                'now': now,
+                'expires_at': now + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+                'stale_before': now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+            }).first()
+            if claimed:
+                return None
+            existing = conn.execute(text("""
+                SELECT request_hash, status, response_status, response_body
+                FROM idempotency_keys WHERE scope = :scope AND key = :key
+            """), {'scope': scope, 'key': key}).first()
+        if existing is not None:
+            return existing
+        # Deleted (pruned, or a failed first attempt) since the INSERT; claim it again
+
+
+def _store(scope: str, key: str, response: Response) -> None:
+    with engine.begin() as conn:
+        if response.status_code >= 500:
+            conn.execute(text("DELETE FROM idempotency_keys WHERE scope = :scope AND key = :key"),
+                         {'scope': scope, 'key': key})
+            return
+        conn.execute(text("""
+            UPDATE idempotency_keys
+            SET status = 'COMPLETED', response_status = :status, response_body = :body, expires_at = :expires_at
+            WHERE scope = :scope AND key = :key
+        """), {
+            'scope': scope,
+            'key': key,
+            'status': response.status_code,
+            'body': response.get_data(as_text=True),
+            'expires_at': datetime.utcnow() + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+        })
+
+
+def idempotent(scope: str):
+    """Replay the stored response of POSTs that repeat an ``Idempotency-Key``.
+
+    Requests without the header run as before.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.headers.get(IDEMPOTENCY_HEADER) or '').strip()
+            if not key:
+                return view(*args, **kwargs)
+            if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+                return jsonify({
+                    'success': False,
+                    'message': f'{IDEMPOTENCY_HEADER} must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters'
+                }), 400
+
+            request_hash = _request_hash()
+            existing = _claim(scope, key, request_hash)
+            if existing is not None:
+                if existing.request_hash != request_hash:
+                    return jsonify({
+                        'success': False,
+                        'message': f'{IDEMPOTENCY_HEADER} was already used for a different request'
+                    }), 422
+                if existing.status != 'COMPLETED':
+                    response = jsonify({
+                        'success': False,
+                        'message': f'A request with this {IDEMPOTENCY_HEADER} is still in progress'
+                    })
+                    response.status_code = 409
+                    response.headers['Retry-After'] = '1'
+                    return response
+                replay = Response(existing.response_body, status=existing.response_status, mimetype='application/json')
+                replay.headers['Idempotent-Replayed'] = 'true'
+                return replay
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                with engine.begin() as conn:
+                    conn.execute(text("DELETE FROM idempotency_keys WHERE scope = :scope AND key = :key"),
+                                 {'scope': scope, 'key': key})
+                raise
+            _store(scope, key, response)
+            return response
+        return wrapper
+    return decorator
+
+
+def prune_idempotency_keys(conn) -> int:
+    """Delete expired keys. Returns rows deleted."""
+    result = conn.execute(text("DELETE FROM idempotency_keys WHERE expires_at < :now"), {'now': datetime.utcnow()})
+    return result.rowcount or 0
+
+
+def _run_forever(interval: float) -> None:
+    while True:
+        try:
+            with engine.begin() as conn:
+                pruned = prune_idempotency_keys(conn)
+            if pruned:
+                print(f"[Idempotency] Pruned {pruned} expired keys")
+        except Exception as e:
+            print(f"[Idempotency] Prune error: {e}")
+        time.sleep(interval)
+
+
+_thread: threading.Thread | None = None
+
+
+def start_idempotency_pruner(interval: float = IDEMPOTENCY_PRUNE_INTERVAL_SECONDS) -> bool:
+    """Start the in-process pruner thread once per process."""
+    global _thread
+    if not IDEMPOTENCY_PRUNER_ENABLED or (_thread is not None and _thread.is_alive()):
+        return False
+    _thread = threading.Thread(target=_run_forever, args=(interval,), name='idempotency-pruner', daemon=True)
+    _thread.start()
+    return True
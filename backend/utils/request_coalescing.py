@@ -0,0 +1,101 @@
+"""Single-flight coalescing of identical concurrent read requests.
+
+When several threads of a worker receive the same GET at once, only the first
+(the leader) runs the view; the others wait for it and reuse its serialized
+response bytes. Nothing is kept once the leader finishes, so this is not a
+cache - it only collapses requests that overlap in time.
+"""
+from __future__ import annotations
+
+import functools
+from threading import Event, Lock
+from typing import Any, Callable, Hashable
+
+from flask import Response, make_response, request
+
+
+COALESCE_WAIT_SECONDS = 30
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run ``fn`` once per key among concurrent callers."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            if not call.done.wait(COALESCE_WAIT_SECONDS):
+                # Leader is stuck; do the work ourselves rather than time out
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+            }
+
+
+flight_requests = SingleFlight()
+
+
+def coalesce_requests(group: SingleFlight = flight_requests):
+    """Decorate a read-only Flask view so identical concurrent GETs share one run.
+
+    The key is the full request path including the query string. The leader's
+    response is frozen to (bytes, status, headers) and every waiter gets its
+    own Response built from those bytes.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            def _render():
+                response = make_response(view(*args, **kwargs))
+                return response.get_data(), response.status_code, list(response.headers.items())
+
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            body, status, headers = group.do(key, _render)
+            return Response(body, status=status, headers=headers)
+        return wrapper
+    return decorator
@@ -0,0 +1,121 @@
+"""Group seat allocation over a cached seat map.
+
+``find_seat_block`` picks seats for a party in one pass over the rows of a
+``SeatMap`` (backend/utils/seat_map.py), front to back. Each row is read in
+the seat order of its cabin in the aircraft layout
+(backend/models/aircraft_layouts.py), which also says where its aisles are.
+A block of adjacent seats in one row scores best; straddling an aisle or splitting the party over
+two consecutive rows costs points, and window/aisle preferences add points.
+When no block fits, the best individual seats are returned instead. The
+result is only a proposal: callers hold it with ``hold_seats`` and retry if a
+concurrent request got there first.
+"""
+from __future__ import annotations
+
+from typing import Iterable, NamedTuple
+
+from backend.utils.seat_map import SeatMap
+
+
+MAX_PARTY_SIZE = 9
+
+TOGETHER_SCORE = 10
+AISLE_PENALTY = 2      # per aisle the block straddles
+TWO_ROWS_PENALTY = 4   # party split over two consecutive rows
+PREFERENCE_BONUS = 1   # per window/aisle preference the block satisfies
+
+
+class SeatBlock(NamedTuple):
+    seats: list[dict]
+    together: bool
+
+
+def _row_seats(seat_map: SeatMap):
+    """Per row: its cabin, its seat cells in physical order and the positions followed by an aisle.
+
+    Order and aisles come from the row's cabin in the aircraft layout, not from
+    the seat map's columns (the union of every cabin's letters). A seat missing
+    from the map keeps its position as None so it still separates its neighbours.
+    """
+    width = len(seat_map.columns)
+    column_index = {column: i for i, column in enumerate(seat_map.columns)}
+    for row in range(1, seat_map.rows + 1):
+        cabin = seat_map.layout.cabin_for(row)
+        base = (row - 1) * width
+        cells, gaps = [], set()
+        for letter in cabin.columns:
+            if letter == ' ':
+                if cells:
+                    gaps.add(len(cells) - 1)
+                continue
+            cell = base + column_index[letter] if letter in column_index else None
+            cells.append(cell if cell is not None and seat_map.seats[cell] is not None else None)
+        yield cabin, cells, gaps
+
+
+def find_seat_block(seat_map: SeatMap, count: int, seat_class: str | None = None, window: bool = False,
+                    aisle: bool = False, together: bool = True, user_id: int | None = None,
+                    exclude: Iterable[int] = ()) -> SeatBlock | None:
+    """Best seats for ``count`` passengers, or None when too few are free.
+
+    ``exclude`` holds seat ids to skip, e.g. seats a previous attempt failed
+    to hold.
+    """
+    width = len(seat_map.columns)
+    if count < 1 or not width:
+        return None
+    exclude = set(exclude)
+    # Seeded seats spell classes 'Economy', the model enum 'ECONOMY'
+    seat_class = seat_class.upper() if seat_class else None
+    free = bytearray(seat_map.free_cells(user_id))
+    for cell, seat in enumerate(seat_map.seats):
+        if free[cell] and (seat['id'] in exclude or (seat_class and (seat['seat_class'] or '').upper() != seat_class)):
+            free[cell] = 0
+
+    def bonus(cells) -> int:
+        seats = [seat_map.seats[cell] for cell in cells]
+        return PREFERENCE_BONUS * (
+            (window and any(seat['is_window'] for seat in seats))
+            + (aisle and any(seat['is_aisle'] for seat in seats))
+        )
+
+    def crossings(gaps: set[int], start: int, length: int) -> int:
+        return sum(1 for i in range(start, start + length - 1) if i in gaps)
+
+    best_score, best_cells = None, None
+    perfect = TOGETHER_SCORE + bonus(cell for cell, seat in enumerate(seat_map.seats) if seat)
+    front, back = (count + 1) // 2, count // 2
+    singles = []
+    previous = None
+    for cabin, cells, gaps in _row_seats(seat_map):
+        current = [cell is not None and free[cell] for cell in cells]
+        if together and count > 1:
+            for start in range(len(cells) - count + 1):
+                if all(current[start:start + count]):
+                    block = cells[start:start + count]
+                    score = TOGETHER_SCORE - AISLE_PENALTY * crossings(gaps, start, count) + bonus(block)
+                    if best_score is None or score > best_score:
+                        best_score, best_cells = score, block
+            if previous is not None and previous[0] is cabin:
+                # Front half in the previous row of the same cabin, the rest right behind it
+                _, previous_cells, previous_free = previous
+                for start in range(len(cells) - front + 1):
+                    if all(previous_free[start:start + front]) and all(current[start:start + back]):
+                        block = [*previous_cells[start:start + front], *cells[start:start + back]]
+                        score = (TOGETHER_SCORE - TWO_ROWS_PENALTY
+                                 - AISLE_PENALTY * crossings(gaps, start, front) + bonus(block))
+                        if best_score is None or score > best_score:
+                            best_score, best_cells = score, block
+            if best_score == perfect:
+                break
+        singles.extend(cell for cell, is_free in zip(cells, current) if is_free)
+        previous = (cabin, cells, current)
+
+    if best_cells is not None:
+        return SeatBlock([seat_map.seats[cell] for cell in best_cells], True)
+    if len(singles) < count:
+        return None
+    # Scattered seats: preferred seats first, then front to back
+    singles.sort(key=lambda cell: (-bonus([cell]), cell))
+    cells = sorted(singles[:count])
+    return SeatBlock([seat_map.seats[cell] for cell in cells], count == 1)
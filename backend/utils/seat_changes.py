@@ -0,0 +1,203 @@
+"""Per-flight seat change log behind seat map deltas.
+
+Every transaction that changes seats of a flight bumps
+``flights.seat_map_version`` once per flush and logs the new state of each
+changed seat under that version in ``seat_changes``. The bump takes the
+flight row lock until commit, so versions of one flight commit in order and
+without gaps; a client holding version N can be brought up to date with the
+log rows above N, whichever worker serves it. Rows older than
+``SEAT_CHANGE_RETENTION_MINUTES`` are pruned; clients that fall behind the
+log get a full seat map instead.
+
+Committed batches are also published in process to ``on_seat_changes``
+subscribers (the seat map cache, real-time pushes).
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime
+from typing import Callable, Iterable, Mapping, NamedTuple
+
+from sqlalchemy import event, inspect as sa_inspect, text
+from sqlalchemy.orm import Session
+
+from backend.models.seats import Seat, SeatStatus
+
+
+SEAT_CHANGE_RETENTION_MINUTES = int(os.getenv('SEAT_CHANGE_RETENTION_MINUTES', '60'))
+
+_TRACKED_ATTRS = ('status', 'reserved_by', 'reserved_until')
+
+
+class ChangedSeat(NamedTuple):
+    seat_id: int
+    seat_number: str
+    status: str
+    reserved_by: int | None
+    reserved_until: datetime | None
+
+    @property
+    def effective_status(self) -> str:
+        """Logged status, with holds that have since expired read as AVAILABLE."""
+        if self.status == SeatStatus.TEMPORARILY_RESERVED.value and (
+            self.reserved_until is None or self.reserved_until < datetime.utcnow()
+        ):
+            return SeatStatus.AVAILABLE.value
+        return self.status
+
+
+class SeatChangeBatch(NamedTuple):
+    flight_id: int
+    version: int
+    changes: list[ChangedSeat]
+    # Seats were added or removed, so cached layouts must be rebuilt
+    reload: bool = False
+
+
+_subscribers: list[Callable[[list[SeatChangeBatch]], None]] = []
+
+
+def on_seat_changes(callback: Callable[[list[SeatChangeBatch]], None]) -> None:
+    """Register ``callback(batches)``, called after each committed change set."""
+    _subscribers.append(callback)
+
+
+def publish_seat_changes(batches: list[SeatChangeBatch]) -> None:
+    if not batches:
+        return
+    for callback in list(_subscribers):
+        try:
+            callback(batches)
+        except Exception as e:
+            print(f"[SeatChanges] subscriber error: {e}")
+
+
+def record_seat_changes(conn, changes: Mapping[int, Iterable[ChangedSeat]]) -> dict[int, int]:
+    """Bump each flight's version and log its changes. Returns {flight_id: version}."""
+    versions = {}
+    for flight_id in sorted(changes):
+        version = conn.execute(
+            text("UPDATE flights SET seat_map_version = seat_map_version + 1 WHERE id = :flight_id RETURNING seat_map_version"),
+            {'flight_id': flight_id},
+        ).scalar()
+        if version is None:
+            continue
+        versions[flight_id] = version
+        rows = [
+            {
+                'flight_id': flight_id,
+                'version': version,
+                'seat_id': change.seat_id,
+                'seat_number': change.seat_number,
+                'status': change.status,
+                'reserved_by': change.reserved_by,
+                'reserved_until': change.reserved_until,
+            }
+            for change in changes[flight_id]
+        ]
+        if rows:
+            conn.execute(text("""
+                INSERT INTO seat_changes
+                    (flight_id, version, seat_id, seat_number, status, reserved_by, reserved_until, changed_at)
+                VALUES
+                    (:flight_id, :version, :seat_id, :seat_number, :status, :reserved_by, :reserved_until,
+                     (NOW() AT TIME ZONE 'UTC'))
+            """), rows)
+    return versions
+
+
+def log_seat_changes(session, changes: Mapping[int, Iterable[ChangedSeat]]) -> dict[int, int]:
+    """Record changes made with set-based SQL in ``session``'s transaction.
+
+    The batches are published when the session commits, like ORM changes.
+    """
+    changes = {flight_id: list(seats) for flight_id, seats in changes.items()}
+    versions = record_seat_changes(session.connection(), changes)
+    flushed = session.info.setdefault('seat_changes_flushed', [])
+    for flight_id, version in versions.items():
+        flushed.append(SeatChangeBatch(flight_id, version, changes[flight_id]))
+    return versions
+
+
+def read_seat_changes(conn, flight_id: int, since_version: int):
+    """Return (current version, latest change per seat) above ``since_version``.
+
+    The change list is None when the log cannot cover the gap (pruned, or a
+    version without per-seat rows); the whole function returns None when the
+    flight does not exist.
+    """
+    rows = conn.execute(text("""
+        SELECT f.seat_map_version, c.version, c.seat_id, c.seat_number, c.status,
+               c.reserved_by, c.reserved_until
+        FROM flights f
+        LEFT JOIN seat_changes c ON c.flight_id = f.id AND c.version > :since_version
+        WHERE f.id = :flight_id
+        ORDER BY c.version, c.id
+    """), {'flight_id': flight_id, 'since_version': since_version}).fetchall()
+    if not rows:
+        return None
+
+    current = rows[0][0]
+    if since_version > current:
+        return current, None
+    latest: dict[int, ChangedSeat] = {}
+    versions = set()
+    for _, version, seat_id, seat_number, status, reserved_by, reserved_until in rows:
+        if version is None:
+            continue
+        versions.add(version)
+        latest[seat_id] = ChangedSeat(seat_id, seat_number, status, reserved_by, reserved_until)
+    if len(versions) != current - since_version:
+        return current, None
+    return current, list(latest.values())
+
+
+def prune_seat_changes(conn, retention_minutes: int = SEAT_CHANGE_RETENTION_MINUTES) -> int:
+    """Delete log rows older than the retention window. Returns rows deleted."""
+    result = conn.execute(
+        text("DELETE FROM seat_changes WHERE changed_at < (NOW() AT TIME ZONE 'UTC') - make_interval(mins => :minutes)"),
+        {'minutes': retention_minutes},
+    )
+    return result.rowcount or 0
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_seat_changes(session, flush_context, instances):
+    pending = session.info.setdefault('seat_changes_pending', {})
+    for obj in session.dirty:
+        if not isinstance(obj, Seat):
+            continue
+        state = sa_inspect(obj)
+        if any(state.attrs[attr].history.has_changes() for attr in _TRACKED_ATTRS):
+            pending.setdefault(obj.flight_id, {})[obj.id] = ChangedSeat(
+                obj.id, obj.seat_number, obj.normalized_status, obj.reserved_by, obj.reserved_until,
+            )
+    reload = session.info.setdefault('seat_changes_reload', set())
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Seat) and obj.flight_id is not None:
+            pending.setdefault(obj.flight_id, {})
+            reload.add(obj.flight_id)
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_collected_seat_changes(session, flush_context):
+    pending = session.info.pop('seat_changes_pending', None)
+    reload = session.info.pop('seat_changes_reload', None) or set()
+    if not pending:
+        return
+    changes = {flight_id: list(seats.values()) for flight_id, seats in pending.items()}
+    versions = record_seat_changes(session.connection(), changes)
+    flushed = session.info.setdefault('seat_changes_flushed', [])
+    for flight_id, version in versions.items():
+        flushed.append(SeatChangeBatch(flight_id, version, changes[flight_id], flight_id in reload))
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_committed_seat_changes(session):
+    publish_seat_changes(session.info.pop('seat_changes_flushed', None) or [])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_seat_changes(session):
+    for key in ('seat_changes_pending', 'seat_changes_reload', 'seat_changes_flushed'):
+        session.info.pop(key, None)
@@ -0,0 +1,115 @@
+"""Set-based seat generation from aircraft layout templates.
+
+Seats for flights that have none are created with one
+``INSERT ... SELECT`` per batch of flights: each flight is joined to the
+seat template of its aircraft type (backend/models/aircraft_layouts.py),
+passed in as arrays, and ``seats_available`` is set from the inserted rows
+in the same statement. No ORM objects are built, so seating a whole
+schedule is bounded by the database's insert speed.
+"""
+from __future__ import annotations
+
+import os
+import time
+
+from sqlalchemy import text
+
+from backend.models.aircraft_layouts import AIRCRAFT_LAYOUTS, get_aircraft_layout
+from backend.models.seats import SeatStatus
+
+
+SEAT_GENERATION_BATCH_FLIGHTS = int(os.getenv('SEAT_GENERATION_BATCH_FLIGHTS', '5000'))
+
+_GENERATE_SQL = """
+    WITH template AS (
+        SELECT * FROM unnest(
+            CAST(:codes AS TEXT[]), CAST(:seat_numbers AS TEXT[]),
+            CAST(:seat_classes AS TEXT[]), CAST(:price_modifiers AS NUMERIC[])
+        ) WITH ORDINALITY AS t(code, seat_number, seat_class, price_modifier, position)
+    ),
+    aircraft AS (
+        SELECT * FROM unnest(CAST(:aircraft_types AS TEXT[]), CAST(:aircraft_codes AS TEXT[]))
+            AS a(aircraft_type, code)
+    ),
+    inserted AS (
+        INSERT INTO seats (flight_id, seat_number, seat_class, status, price_modifier, created_at)
+        SELECT f.id, t.seat_number, t.seat_class, :status, t.price_modifier, (NOW() AT TIME ZONE 'UTC')
+        FROM flights f
+        JOIN aircraft a ON a.aircraft_type = f.aircraft_type
+        JOIN template t ON t.code = a.code
+        WHERE {flight_filter}
+          AND NOT EXISTS (SELECT 1 FROM seats s WHERE s.flight_id = f.id)
+        ORDER BY f.id, t.position
+        ON CONFLICT (flight_id, seat_number) DO NOTHING
+        RETURNING flight_id
+    )
+    UPDATE flights f
+    SET seats_available = c.seats
+    FROM (SELECT flight_id, COUNT(*) AS seats FROM inserted GROUP BY flight_id) c
+    WHERE f.id = c.flight_id
+    RETURNING c.seats
+"""
+
+_TEMPLATE_PARAMS = {
+    'codes': [code for code, layout in AIRCRAFT_LAYOUTS.items() for _ in layout.seats],
+    'seat_numbers': [seat.seat_number for layout in AIRCRAFT_LAYOUTS.values() for seat in layout.seats],
+    'seat_classes': [seat.seat_class for layout in AIRCRAFT_LAYOUTS.values() for seat in layout.seats],
+    'price_modifiers': [seat.price_modifier for layout in AIRCRAFT_LAYOUTS.values() for seat in layout.seats],
+}
+
+
+def generate_seats(conn, flight_ids: list[int] | None = None, id_range: tuple[int, int] | None = None) -> tuple[int, int]:
+    """Create template seats for seatless flights. Returns (flights, seats) created.
+
+    Limits the flights to ``flight_ids`` or the inclusive ``id_range``; with
+    neither, every flight is considered in a single statement.
+    """
+    params = {**_TEMPLATE_PARAMS, 'status': SeatStatus.AVAILABLE.value}
+    if flight_ids is not None:
+        flight_filter = 'f.id = ANY(:flight_ids)'
+        params['flight_ids'] = list(flight_ids)
+    elif id_range is not None:
+        flight_filter = 'f.id BETWEEN :first_id AND :last_id'
+        params['first_id'], params['last_id'] = id_range
+    else:
+        flight_filter = 'TRUE'
+
+    # Raw aircraft_type values (e.g. 'B787-9') resolve to registry codes in Python
+    type_query = "SELECT DISTINCT aircraft_type FROM flights"
+    if flight_ids is not None:
+        type_query += " WHERE id = ANY(:flight_ids)"
+    aircraft_types = [row[0] for row in conn.execute(text(type_query), params) if row[0] is not None]
+    if not aircraft_types:
+        return 0, 0
+    params['aircraft_types'] = aircraft_types
+    params['aircraft_codes'] = [get_aircraft_layout(aircraft_type).code for aircraft_type in aircraft_types]
+
+    counts = [row[0] for row in conn.execute(text(_GENERATE_SQL.format(flight_filter=flight_filter)), params)]
+    return len(counts), sum(counts)
+
+
+def generate_all_seats(engine, batch_flights: int = SEAT_GENERATION_BATCH_FLIGHTS, log=print) -> dict:
+    """Seat every seatless flight, one transaction per ``batch_flights`` ids.
+
+    Returns a report with flights and seats created, batches and timings.
+    """
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        first_id, last_id = conn.execute(text("SELECT MIN(id), MAX(id) FROM flights")).one()
+
+    report = {'flights': 0, 'seats': 0, 'batches': 0}
+    if first_id is not None:
+        for batch_start in range(first_id, last_id + 1, batch_flights):
+            batch_started = time.perf_counter()
+            with engine.begin() as conn:
+                flights, seats = generate_seats(conn, id_range=(batch_start, batch_start + batch_flights - 1))
+            report['flights'] += flights
+            report['seats'] += seats
+            report['batches'] += 1
+            if flights and log:
+                log(f"[SeatGeneration] ids {batch_start}-{batch_start + batch_flights - 1}: "
+                    f"{flights} flights, {seats} seats in {time.perf_counter() - batch_started:.2f}s")
+
+    report['seconds'] = round(time.perf_counter() - started, 2)
+    report['seats_per_second'] = round(report['seats'] / report['seconds']) if report['seconds'] else None
+    return report
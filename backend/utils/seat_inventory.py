@@ -0,0 +1,86 @@
+"""Denormalized ``flights.seats_available`` maintenance.
+
+The counter is the number of a flight's seats in AVAILABLE status. Every ORM
+flush that changes a seat's status (reserve, release, confirm, expire, cancel)
+adjusts the counter of the affected flights in the same transaction. Code that
+changes seat status with set-based SQL must call ``apply_seat_deltas`` itself,
+and scripts that bulk-create seats call ``recount_seats_available``.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from typing import Iterable, Mapping
+
+from sqlalchemy import event, inspect as sa_inspect, text
+from sqlalchemy.orm import Session
+
+from backend.models.seats import Seat, SeatStatus
+
+
+AVAILABLE = SeatStatus.AVAILABLE.value
+
+
+def _is_available(status) -> bool:
+    return (status or '').upper() == AVAILABLE
+
+
+def apply_seat_deltas(conn, deltas: Mapping[int, int]) -> None:
+    """Add ``delta`` to seats_available for each flight id, in id order."""
+    for flight_id in sorted(deltas):
+        delta = deltas[flight_id]
+        if not delta or flight_id is None:
+            continue
+        conn.execute(
+            text("UPDATE flights SET seats_available = GREATEST(seats_available + :delta, 0) WHERE id = :flight_id"),
+            {'delta': delta, 'flight_id': flight_id},
+        )
+
+
+def recount_seats_available(conn, flight_ids: Iterable[int] | None = None) -> int:
+    """Recompute the counter from the seats table. Returns flights updated."""
+    params = {}
+    flight_filter = ''
+    if flight_ids is not None:
+        flight_ids = list(flight_ids)
+        if not flight_ids:
+            return 0
+        flight_filter = 'WHERE f.id = ANY(:flight_ids)'
+        params['flight_ids'] = flight_ids
+
+    result = conn.execute(text(f"""
+        UPDATE flights f
+        SET seats_available = (
+            SELECT COUNT(*) FROM seats s
+            WHERE s.flight_id = f.id AND s.status = '{AVAILABLE}'
+        )
+        {flight_filter}
+    """), params)
+    return result.rowcount or 0
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_seat_deltas(session, flush_context, instances):
+    deltas = session.info.setdefault('seat_inventory_deltas', Counter())
+    for obj in session.new:
+        if isinstance(obj, Seat) and _is_available(obj.status or AVAILABLE):
+            deltas[obj.flight_id] += 1
+    for obj in session.dirty:
+        if not isinstance(obj, Seat):
+            continue
+        history = sa_inspect(obj).attrs.status.history
+        if not history.has_changes():
+            continue
+        was_available = _is_available(history.deleted[0]) if history.deleted else False
+        now_available = _is_available(obj.status)
+        if was_available != now_available:
+            deltas[obj.flight_id] += 1 if now_available else -1
+    for obj in session.deleted:
+        if isinstance(obj, Seat) and _is_available(obj.status):
+            deltas[obj.flight_id] -= 1
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_collected_seat_deltas(session, flush_context):
+    deltas = session.info.pop('seat_inventory_deltas', None)
+    if deltas:
+        apply_seat_deltas(session.connection(), deltas)
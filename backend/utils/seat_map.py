@@ -0,0 +1,311 @@
+"""Compact in-process seat maps, one per flight.
+
+A ``SeatMap`` keeps a flight's static layout (seat ids, numbers, classes,
+price modifiers, grid position) once, and its mutable state as one status
+byte per grid cell plus the active holds. ``version`` is the flight's
+``seat_map_version`` from the seat change log (backend/utils/seat_changes.py).
+Change batches committed in this process (reserve, release, confirm,
+cancel, reaped holds) are applied to cached maps in place when they follow
+the cached version; otherwise the map is rebuilt. Maps are also rebuilt from
+the database after ``SEAT_MAP_TTL_SECONDS`` so changes made by other workers
+show up.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from backend.models.aircraft_layouts import AircraftLayout, get_aircraft_layout
+from backend.models.booking import Booking
+from backend.models.seats import Seat, SeatStatus
+from backend.utils.seat_changes import ChangedSeat, SeatChangeBatch, on_seat_changes
+
+
+SEAT_MAP_TTL_SECONDS = float(os.getenv('SEAT_MAP_TTL_SECONDS', '5'))
+SEAT_MAP_MAX_ENTRIES = int(os.getenv('SEAT_MAP_MAX_ENTRIES', '1000'))
+
+STATUS_CODES = {
+    SeatStatus.AVAILABLE.value: ord('A'),
+    SeatStatus.TEMPORARILY_RESERVED.value: ord('H'),
+    SeatStatus.CONFIRMED.value: ord('C'),
+    SeatStatus.BLOCKED.value: ord('B'),
+}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+NO_SEAT = ord('.')
+AVAILABLE = STATUS_CODES[SeatStatus.AVAILABLE.value]
+HELD = STATUS_CODES[SeatStatus.TEMPORARILY_RESERVED.value]
+CONFIRMED = STATUS_CODES[SeatStatus.CONFIRMED.value]
+
+
+def _split_seat_number(seat_number: str) -> tuple[int, str]:
+    row = ''.join(filter(str.isdigit, seat_number))
+    column = ''.join(filter(str.isalpha, seat_number))
+    return (int(row) if row else 0), column
+
+
+class SeatMap:
+    """Status bytes and holds for one flight, laid out row-major over rows x columns."""
+
+    def __init__(self, flight_id: int, seats: Iterable[Seat], booked_ids=(), booked_numbers=(),
+                 layout_info: dict | None = None, version: int = 0, layout: AircraftLayout | None = None):
+        seats = list(seats)
+        positions = {seat.id: _split_seat_number(seat.seat_number) for seat in seats}
+        row_numbers = {row for row, _ in positions.values() if row}
+        self.flight_id = flight_id
+        self.version = version
+        self.rows = max(row_numbers) if row_numbers else 0
+        self.columns = sorted({column for _, column in positions.values() if column})
+        column_index = {column: i for i, column in enumerate(self.columns)}
+        width = len(self.columns)
+        size = self.rows * width
+
+        self.status = bytearray([NO_SEAT]) * size
+        self.cell_of: dict[int, int] = {}
+        self.seats: list[dict | None] = [None] * size
+        self.holds: dict[int, tuple[int | None, datetime | None]] = {}
+        # Seats referenced by confirmed bookings stay CONFIRMED whatever the row says
+        self.booked: set[int] = set()
+        self.layout_info = layout_info or {}
+        self._rendered: dict = {}
+        self._lock = threading.Lock()
+
+        self.layout = layout = layout or get_aircraft_layout()
+        booked_ids, booked_numbers = set(booked_ids), set(booked_numbers)
+        for seat in seats:
+            row, column = positions[seat.id]
+            if not row or column not in column_index:
+                continue
+            cell = (row - 1) * width + column_index[column]
+            self.cell_of[seat.id] = cell
+            is_window, is_aisle = layout.flags(seat.seat_number)
+            self.seats[cell] = {
+                'id': seat.id,
+                'flight_id': seat.flight_id,
+                'seat_number': seat.seat_number,
+                'seat_class': seat.seat_class,
+                'price_modifier': float(seat.price_modifier or 0),
+                'is_window': is_window,
+                'is_aisle': is_aisle,
+            }
+            if seat.id in booked_ids or seat.seat_number in booked_numbers:
+                self.booked.add(cell)
+            self._set(cell, seat.normalized_status, seat.reserved_by, seat.reserved_until)
+
+    def _set(self, cell: int, status: str, reserved_by=None, reserved_until=None) -> bool:
+        code = CONFIRMED if cell in self.booked else STATUS_CODES.get(status, AVAILABLE)
+        hold = (reserved_by, reserved_until) if code == HELD else None
+        if self.status[cell] == code and self.holds.get(cell) == hold:
+            return False
+        self.status[cell] = code
+        if hold is None:
+            self.holds.pop(cell, None)
+        else:
+            self.holds[cell] = hold
+        return True
+
+    def apply(self, changes: Iterable[ChangedSeat], version: int) -> list[int]:
+        """Apply one change batch and move to ``version``; returns changed cells."""
+        changed = []
+        with self._lock:
+            for change in changes:
+                cell = self.cell_of.get(change.seat_id)
+                if cell is not None and self._set(cell, change.status, change.reserved_by, change.reserved_until):
+                    changed.append(cell)
+            self.version = version
+            self._rendered.clear()
+        return changed
+
+    def status_bytes(self, now: datetime | None = None) -> bytes:
+        """Status bytes with expired (not yet reaped) holds shown as available."""
+        now = now or datetime.utcnow()
+        expired = [cell for cell, (_, until) in self.holds.items() if until is None or until < now]
+        if not expired:
+            return bytes(self.status)
+        status = bytearray(self.status)
+        for cell in expired:
+            status[cell] = AVAILABLE
+        return bytes(status)
+
+    def free_cells(self, user_id: int | None = None) -> bytes:
+        """One byte per cell, 1 where ``user_id`` could hold the seat right now."""
+        with self._lock:
+            status = self.status_bytes()
+            return bytes(
+                1 if code == AVAILABLE or (
+                    code == HELD and user_id is not None and self.holds[cell][0] == user_id
+                ) else 0
+                for cell, code in enumerate(status)
+            )
+
+    def _next_expiry(self, now: datetime) -> datetime | None:
+        pending = [until for _, until in self.holds.values() if until is not None and until >= now]
+        return min(pending) if pending else None
+
+    def _cached(self, key, build):
+        # Anonymous renderings only change with the version or when a hold expires
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._rendered.get(key)
+            if entry is not None and (entry[0] is None or now < entry[0]):
+                return entry[1]
+            value = build(now)
+            self._rendered[key] = (self._next_expiry(now), value)
+            return value
+
+    def to_compact(self, user_id: int | None = None, include_layout: bool = True) -> dict:
+        """Status string (one char per cell, '.' for no seat) plus layout once."""
+        if user_id is None:
+            payload = self._cached(('compact', include_layout), lambda now: self._compact(now, None, include_layout))
+            return dict(payload)
+        with self._lock:
+            return self._compact(datetime.utcnow(), user_id, include_layout)
+
+    def _compact(self, now: datetime, user_id: int | None, include_layout: bool) -> dict:
+        status = self.status_bytes(now)
+        payload = {
+            'flight_id': self.flight_id,
+            'version': self.version,
+            'rows': self.rows,
+            'columns': ''.join(self.columns),
+            'status': status.decode('ascii'),
+            'available_count': status.count(AVAILABLE),
+            'held_by_me': sorted(
+                cell for cell, (reserved_by, _) in self.holds.items()
+                if user_id is not None and reserved_by == user_id and status[cell] == HELD
+            ),
+        }
+        if include_layout:
+            payload['layout'] = {
+                'seat_ids': [seat['id'] if seat else None for seat in self.seats],
+                'classes': ''.join(seat['seat_class'][0] if seat else '.' for seat in self.seats),
+                'price_modifiers': [seat['price_modifier'] if seat else None for seat in self.seats],
+                'layout_info': self.layout_info,
+            }
+        return payload
+
+    def to_seat_list(self, user_id: int | None = None) -> list[dict]:
+        """The per-seat dicts of the classic seat map response."""
+        if user_id is None:
+            return self._cached('seats', lambda now: self._seat_list(now, None))
+        with self._lock:
+            return self._seat_list(datetime.utcnow(), user_id)
+
+    def _seat_list(self, now: datetime, user_id: int | None) -> list[dict]:
+        status = self.status_bytes(now)
+        seats = []
+        for cell, seat in enumerate(self.seats):
+            if seat is None:
+                continue
+            code = status[cell]
+            reserved_by, reserved_until = self.holds.get(cell, (None, None))
+            mine = user_id is not None and reserved_by == user_id and cell in self.holds
+            seats.append({
+                **seat,
+                'status': STATUS_NAMES[code],
+                'reserved_until': reserved_until.isoformat() if reserved_until and code == HELD else None,
+                'reserved_by_current_user': mine,
+                'available_for_user': user_id is not None and (code == AVAILABLE or (code == HELD and mine)),
+            })
+        seats.sort(key=lambda seat: seat['seat_number'])
+        return seats
+
+
+class SeatMapCache:
+    """LRU of per-flight SeatMaps that are rebuilt after ``ttl`` seconds."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._maps: dict[int, tuple[float, SeatMap]] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, flight_id: int) -> SeatMap | None:
+        with self._lock:
+            entry = self._maps.pop(flight_id, None)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._maps[flight_id] = entry
+            self.hits += 1
+            return entry[1]
+
+    def load(self, flight_id: int, version: int, seats: list[Seat], booked_ids=(), booked_numbers=(),
+             layout_info: dict | None = None, layout: AircraftLayout | None = None) -> SeatMap:
+        """Build and cache the map for ``flight_id`` from freshly loaded rows.
+
+        ``version`` must be read before the seats, so the map is never older
+        than its version claims.
+        """
+        seat_map = SeatMap(flight_id, seats, booked_ids, booked_numbers, layout_info, version, layout)
+        with self._lock:
+            self._maps.pop(flight_id, None)
+            self._maps[flight_id] = (time.monotonic() + self.ttl, seat_map)
+            while len(self._maps) > self.max_entries:
+                self._maps.pop(next(iter(self._maps)))
+        return seat_map
+
+    def apply_batches(self, batches: list[SeatChangeBatch]) -> None:
+        """Apply committed change batches to cached maps, in version order."""
+        with self._lock:
+            for batch in sorted(batches, key=lambda b: (b.flight_id, b.version)):
+                entry = self._maps.get(batch.flight_id)
+                if entry is None:
+                    continue
+                seat_map = entry[1]
+                if batch.version <= seat_map.version:
+                    continue  # already part of the cached map
+                if batch.reload or batch.version != seat_map.version + 1:
+                    # Another worker's change came in between; rebuild from the DB
+                    self._maps.pop(batch.flight_id, None)
+                    continue
+                seat_map.apply(batch.changes, batch.version)
+
+    def invalidate(self, flight_id: int) -> None:
+        with self._lock:
+            self._maps.pop(flight_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._maps),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+seat_maps = SeatMapCache(SEAT_MAP_TTL_SECONDS, SEAT_MAP_MAX_ENTRIES)
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_booking_changes(session, flush_context, instances):
+    # Booking confirmation/cancellation moves seats in or out of the booked set
+    stale = session.info.setdefault('seat_map_stale', set())
+    for obj in session.dirty:
+        if isinstance(obj, Booking) and sa_inspect(obj).attrs.status.history.has_changes():
+            stale.update(f for f in (obj.outbound_flight_id, obj.inbound_flight_id) if f)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_booked_seat_maps(session):
+    for flight_id in session.info.pop('seat_map_stale', None) or ():
+        seat_maps.invalidate(flight_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_booking_changes(session):
+    session.info.pop('seat_map_stale', None)
+
+
+on_seat_changes(seat_maps.apply_batches)
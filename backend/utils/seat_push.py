@@ -0,0 +1,178 @@
+"""Real-time seat map updates over Socket.IO.
+
+Clients viewing a seat map connect to the ``/seats`` namespace and emit
+``seats.watch`` with a flight id to join that flight's room. Each worker runs
+one pusher thread that follows the seat change log for the flights watched
+through it and emits ``seat.changes`` to the room:
+
+    {'flight_id': 1, 'from_version': 41, 'version': 42,
+     'changes': [{'id': 7, 'seat_number': '2A', 'status': 'AVAILABLE', 'reserved_until': None}]}
+
+Because the pusher reads the shared log, changes made by any worker (reserve,
+release, payment confirmation, the seat reaper) reach every room. Changes
+committed in this worker wake the pusher immediately. When the log cannot
+cover a gap the event carries ``full: true`` and clients refetch the map.
+The watch acknowledgement returns the flight's current version; a client
+whose version is below an event's ``from_version`` refetches with
+``?since_version=``.
+"""
+from __future__ import annotations
+
+import os
+import threading
+
+from flask import request
+from flask_socketio import join_room, leave_room
+from sqlalchemy import text
+
+from backend.models.db import engine
+from backend.models.seats import SeatStatus
+from backend.utils.seat_changes import on_seat_changes, read_seat_changes
+
+
+SEAT_PUSH_INTERVAL_SECONDS = float(os.getenv('SEAT_PUSH_INTERVAL_SECONDS', '1'))
+SEAT_NAMESPACE = '/seats'
+
+
+def _room(flight_id: int) -> str:
+    return f'flight:{flight_id}'
+
+
+class SeatPusher:
+    """Tracks watched flights per connection and pushes their log entries."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.socketio = None
+        self._watchers: dict[int, set[str]] = {}
+        self._versions: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def watch(self, sid: str, flight_id: int) -> int | None:
+        """Add ``sid`` to the flight's watchers; returns the current version."""
+        version = _current_versions([flight_id]).get(flight_id)
+        if version is None:
+            return None
+        with self._lock:
+            self._watchers.setdefault(flight_id, set()).add(sid)
+            self._versions.setdefault(flight_id, version)
+        return version
+
+    def unwatch(self, sid: str, flight_id: int | None = None) -> None:
+        with self._lock:
+            flight_ids = [flight_id] if flight_id is not None else list(self._watchers)
+            for watched in flight_ids:
+                sids = self._watchers.get(watched)
+                if sids is None:
+                    continue
+                sids.discard(sid)
+                if not sids:
+                    del self._watchers[watched]
+                    self._versions.pop(watched, None)
+
+    def notify(self, batches) -> None:
+        with self._lock:
+            if any(batch.flight_id in self._watchers for batch in batches):
+                self._wake.set()
+
+    def push_once(self) -> int:
+        """Emit pending changes for every watched flight. Returns events sent."""
+        with self._lock:
+            known = dict(self._versions)
+        if not known or self.socketio is None:
+            return 0
+
+        sent = 0
+        for flight_id, version in _current_versions(list(known)).items():
+            since = known[flight_id]
+            if version == since:
+                continue
+            with engine.connect() as conn:
+                delta = read_seat_changes(conn, flight_id, since)
+            if delta is None:
+                continue
+            version, changes = delta
+            payload = {'flight_id': flight_id, 'from_version': since, 'version': version}
+            if changes is None:
+                payload['full'] = True
+            else:
+                payload['changes'] = [_change_dict(change) for change in changes]
+            with self._lock:
+                if flight_id in self._versions:
+                    self._versions[flight_id] = version
+            self.socketio.emit('seat.changes', payload, to=_room(flight_id), namespace=SEAT_NAMESPACE)
+            sent += 1
+        return sent
+
+    def _run_forever(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.push_once()
+            except Exception as e:
+                print(f"[SeatPush] Error: {e}")
+
+    def start(self, socketio) -> None:
+        self.socketio = socketio
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run_forever, name='seat-push', daemon=True)
+            self._thread.start()
+
+
+def _change_dict(change) -> dict:
+    status = change.effective_status
+    held = status == SeatStatus.TEMPORARILY_RESERVED.value
+    return {
+        'id': change.seat_id,
+        'seat_number': change.seat_number,
+        'status': status,
+        'reserved_until': change.reserved_until.isoformat() if held else None,
+    }
+
+
+def _current_versions(flight_ids: list[int]) -> dict[int, int]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT id, seat_map_version FROM flights WHERE id = ANY(:flight_ids)"),
+            {'flight_ids': flight_ids},
+        ).fetchall()
+    return {flight_id: version for flight_id, version in rows}
+
+
+seat_pusher = SeatPusher(SEAT_PUSH_INTERVAL_SECONDS)
+on_seat_changes(seat_pusher.notify)
+
+
+def register_seat_socket_handlers(socketio) -> None:
+    """Attach the ``/seats`` namespace handlers and start the pusher."""
+
+    @socketio.on('seats.watch', namespace=SEAT_NAMESPACE)
+    def _on_watch(data):
+        try:
+            flight_id = int((data or {}).get('flight_id'))
+        except (TypeError, ValueError):
+            return {'success': False, 'message': 'flight_id required'}
+        version = seat_pusher.watch(request.sid, flight_id)
+        if version is None:
+            return {'success': False, 'message': 'Flight not found'}
+        join_room(_room(flight_id))
+        return {'success': True, 'flight_id': flight_id, 'version': version}
+
+    @socketio.on('seats.unwatch', namespace=SEAT_NAMESPACE)
+    def _on_unwatch(data):
+        try:
+            flight_id = int((data or {}).get('flight_id'))
+        except (TypeError, ValueError):
+            return {'success': False, 'message': 'flight_id required'}
+        leave_room(_room(flight_id))
+        seat_pusher.unwatch(request.sid, flight_id)
+        return {'success': True, 'flight_id': flight_id}
+
+    @socketio.on('disconnect', namespace=SEAT_NAMESPACE)
+    def _on_disconnect(*args):
+        seat_pusher.unwatch(request.sid)
+
+    seat_pusher.start(socketio)
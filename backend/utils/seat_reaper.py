@@ -0,0 +1,104 @@
+"""Background expiry of temporary seat holds.
+
+Expired TEMPORARILY_RESERVED seats are released with a set-based
+``UPDATE ... RETURNING`` in bounded batches, instead of being loaded and
+released one row at a time inside user-facing requests. Batches lock with
+SKIP LOCKED, so reapers in several workers (or the CLI) can run side by side.
+Each batch is recorded in the seat change log and published to its
+subscribers like any other seat change.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import text
+
+from backend.models.db import engine
+from backend.models.seats import SeatStatus
+from backend.utils.seat_changes import (
+    ChangedSeat, SeatChangeBatch, prune_seat_changes, publish_seat_changes, record_seat_changes,
+)
+from backend.utils.seat_inventory import apply_seat_deltas
+
+
+SEAT_REAPER_ENABLED = os.getenv('SEAT_REAPER_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+SEAT_REAPER_INTERVAL_SECONDS = float(os.getenv('SEAT_REAPER_INTERVAL_SECONDS', '30'))
+SEAT_REAPER_BATCH_SIZE = int(os.getenv('SEAT_REAPER_BATCH_SIZE', '500'))
+
+def reap_expired_holds(batch_size: int = SEAT_REAPER_BATCH_SIZE, max_batches: int | None = None) -> int:
+    """Release expired holds in batches of ``batch_size``. Returns seats released."""
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with engine.begin() as conn:
+            rows = conn.execute(text("""
+                WITH expired AS (
+                    SELECT id FROM seats
+                    WHERE status = :held
+                      AND (reserved_until < :now OR reserved_until IS NULL)
+                    ORDER BY reserved_until NULLS FIRST
+                    LIMIT :batch_size
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE seats s
+                SET status = :available,
+                    reserved_by = NULL,
+                    reserved_at = NULL,
+                    reserved_until = NULL,
+                    confirmed_booking_id = NULL
+                FROM expired
+                WHERE s.id = expired.id
+                RETURNING s.id, s.flight_id, s.seat_number
+            """), {
+                'held': SeatStatus.TEMPORARILY_RESERVED.value,
+                'available': SeatStatus.AVAILABLE.value,
+                'now': datetime.utcnow(),
+                'batch_size': batch_size,
+            }).fetchall()
+
+            released: dict[int, list[ChangedSeat]] = {}
+            for seat_id, flight_id, seat_number in rows:
+                released.setdefault(flight_id, []).append(
+                    ChangedSeat(seat_id, seat_number, SeatStatus.AVAILABLE.value, None, None)
+                )
+            apply_seat_deltas(conn, Counter({flight_id: len(seats) for flight_id, seats in released.items()}))
+            versions = record_seat_changes(conn, released)
+
+        batches += 1
+        total += len(rows)
+        publish_seat_changes([
+            SeatChangeBatch(flight_id, version, released[flight_id]) for flight_id, version in versions.items()
+        ])
+        if len(rows) < batch_size:
+            break
+    return total
+
+
+def _run_forever(interval: float) -> None:
+    while True:
+        try:
+            released = reap_expired_holds()
+            if released:
+                print(f"[SeatReaper] Released {released} expired seat holds")
+            with engine.begin() as conn:
+                prune_seat_changes(conn)
+        except Exception as e:
+            print(f"[SeatReaper] Error: {e}")
+        time.sleep(interval)
+
+
+_thread: threading.Thread | None = None
+
+
+def start_seat_reaper(interval: float = SEAT_REAPER_INTERVAL_SECONDS) -> bool:
+    """Start the in-process reaper thread once per process."""
+    global _thread
+    if not SEAT_REAPER_ENABLED or (_thread is not None and _thread.is_alive()):
+        return False
+    _thread = threading.Thread(target=_run_forever, args=(interval,), name='seat-reaper', daemon=True)
+    _thread.start()
+    return True
@@ -0,0 +1,152 @@
+"""Atomic temporary seat holds.
+
+``hold_seats`` takes every requested seat or none with one conditional
+``UPDATE ... RETURNING``: rows are claimed with ``FOR UPDATE SKIP LOCKED``
+and only updated when all of them are free for the caller, so there is no
+read-modify-write in Python and a request racing another one for the same
+seat fails immediately instead of queueing behind its row lock.
+
+A hold also updates its flight row (``seats_available`` and the seat map
+version, see backend/utils/seat_changes.py), and that row lock is kept until
+commit so versions stay ordered and gapless. Holds on one flight therefore
+cannot commit in parallel whatever seats they touch. Rather than queue behind
+each other without bound, ``hold_seats`` takes the flight row only once its
+seats are held (failed holds never touch it), with ``NOWAIT`` in a savepoint,
+retrying ``SEAT_HOLD_LOCK_ATTEMPTS`` times with a short jittered backoff, and
+raises ``FlightBusy`` when it is still taken; callers answer with a retryable
+409. Deferring the counter and version bump to a separate aggregated job would
+let holds commit in parallel, but seat map deltas could then miss or reorder
+changes and ``seats_available`` would lag, so the lock stays in the hold
+transaction: under a burst on one flight some holds get a retryable 409
+instead of waiting behind every other hold.
+"""
+from __future__ import annotations
+
+import os
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from backend.models.seats import SeatStatus
+from backend.utils.seat_changes import ChangedSeat, log_seat_changes
+from backend.utils.seat_inventory import apply_seat_deltas
+
+
+AVAILABLE = SeatStatus.AVAILABLE.value
+HELD = SeatStatus.TEMPORARILY_RESERVED.value
+
+# Free for this caller: available, an expired/malformed hold, or the caller's own hold
+_FREE_FOR_USER = f"""
+    (status = '{AVAILABLE}'
+     OR (status = '{HELD}'
+         AND (reserved_until IS NULL
+              OR reserved_until < :now
+              OR (CAST(:user_id AS INTEGER) IS NOT NULL AND reserved_by = CAST(:user_id AS INTEGER)))))
+"""
+
+SEAT_HOLD_LOCK_ATTEMPTS = int(os.getenv('SEAT_HOLD_LOCK_ATTEMPTS', '4'))
+SEAT_HOLD_LOCK_BACKOFF_SECONDS = float(os.getenv('SEAT_HOLD_LOCK_BACKOFF_SECONDS', '0.005'))
+
+# Postgres lock_not_available, raised by NOWAIT
+LOCK_NOT_AVAILABLE = '55P03'
+
+# The lock the UPDATE of the flight row takes anyway; unlike FOR UPDATE it does
+# not block inserts that reference the flight (bookings, tickets)
+_LOCK_FLIGHT_SQL = text("SELECT id FROM flights WHERE id = :flight_id FOR NO KEY UPDATE NOWAIT")
+
+_HOLD_SQL = text(f"""
+    WITH target AS (
+        SELECT id, status AS old_status FROM seats
+        WHERE id = ANY(:seat_ids) AND flight_id = :flight_id AND {_FREE_FOR_USER}
+        FOR UPDATE SKIP LOCKED
+    ),
+    complete AS (
+        SELECT COUNT(*) = :seat_count AS all_free FROM target
+    )
+    UPDATE seats s
+    SET status = '{HELD}',
+        reserved_by = CAST(:user_id AS INTEGER),
+        reserved_at = :now,
+        reserved_until = :until,
+        confirmed_booking_id = NULL
+    FROM target, complete
+    WHERE s.id = target.id AND complete.all_free
+    RETURNING s.id, s.flight_id, s.seat_number, s.seat_class, s.status, s.price_modifier,
+              s.reserved_by, s.reserved_at, s.reserved_until, target.old_status
+""")
+
+_RELEASE_OTHER_HOLDS_SQL = text(f"""
+    UPDATE seats
+    SET status = '{AVAILABLE}', reserved_by = NULL, reserved_at = NULL, reserved_until = NULL
+    WHERE flight_id = :flight_id AND reserved_by = :user_id AND status = '{HELD}'
+      AND id <> ALL(:seat_ids)
+    RETURNING id, seat_number
+""")
+
+
+class FlightBusy(Exception):
+    """Another transaction is changing seats of this flight; retry shortly."""
+
+    def __init__(self, flight_id: int):
+        super().__init__(f"Seats of flight {flight_id} are being changed by another request")
+        self.flight_id = flight_id
+
+
+def _lock_flight(conn, flight_id: int) -> None:
+    """Take the flight row without waiting on it, retrying briefly; raises FlightBusy."""
+    for attempt in range(SEAT_HOLD_LOCK_ATTEMPTS):
+        if attempt:
+            time.sleep(SEAT_HOLD_LOCK_BACKOFF_SECONDS * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+        try:
+            # A failed NOWAIT aborts the transaction; the savepoint keeps the held seats
+            with conn.begin_nested():
+                conn.execute(_LOCK_FLIGHT_SQL, {'flight_id': flight_id})
+            return
+        except OperationalError as e:
+            if getattr(e.orig, 'pgcode', None) != LOCK_NOT_AVAILABLE:
+                raise
+    raise FlightBusy(flight_id)
+
+
+def hold_seats(session, flight_id: int, seat_ids: list[int], user_id: int | None, hold_minutes: int):
+    """Hold all ``seat_ids`` for ``user_id`` (None for guests), or none of them.
+
+    Returns the held rows, or None when any seat is missing, taken or being
+    changed by a concurrent request; the caller should then roll back. Raises
+    ``FlightBusy`` (also to be rolled back) when the flight row is locked by
+    another seat change. An authenticated user's other holds on the flight are
+    released in the same transaction.
+    """
+    seat_ids = sorted(set(seat_ids))
+    now = datetime.utcnow()
+    conn = session.connection()
+    rows = conn.execute(_HOLD_SQL, {
+        'seat_ids': seat_ids,
+        'seat_count': len(seat_ids),
+        'flight_id': flight_id,
+        'user_id': user_id,
+        'now': now,
+        'until': now + timedelta(minutes=hold_minutes),
+    }).fetchall()
+    if len(rows) != len(seat_ids):
+        return None
+    _lock_flight(conn, flight_id)
+
+    changes = [
+        ChangedSeat(row.id, row.seat_number, HELD, row.reserved_by, row.reserved_until) for row in rows
+    ]
+    delta = -sum(1 for row in rows if row.old_status == AVAILABLE)
+    if user_id is not None:
+        released = conn.execute(_RELEASE_OTHER_HOLDS_SQL, {
+            'flight_id': flight_id, 'user_id': user_id, 'seat_ids': seat_ids,
+        }).fetchall()
+        changes += [ChangedSeat(seat_id, seat_number, AVAILABLE, None, None) for seat_id, seat_number in released]
+        delta += len(released)
+
+    apply_seat_deltas(conn, Counter({flight_id: delta}))
+    log_seat_changes(session, {flight_id: changes})
+    return rows
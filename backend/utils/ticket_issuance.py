@@ -0,0 +1,151 @@
+"""Ticket issuance for paid bookings.
+
+``issue_tickets`` allocates every code of a booking in at most one sequence
+round trip (backend/utils/code_allocator.py) and inserts all of its tickets
+with a single multi-row INSERT, instead of building and probing one ticket
+at a time. ``issue_missing_tickets`` decides which passengers of an eligible
+booking still need a ticket; it runs from the ticket queue worker
+(backend/utils/ticket_queue.py) after payment confirmation and at online
+check-in, never on read endpoints.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from backend.models.booking import Booking, BookingStatus
+from backend.models.flights import Flight
+from backend.models.payments import Payment
+from backend.models.seats import SeatStatus
+from backend.models.tickets import Ticket
+from backend.utils.code_allocator import next_ticket_codes
+
+
+def normalize_passenger_name(value: str) -> str:
+    """Lowercase, accent-free, single-spaced name for matching passengers to tickets."""
+    text = (value or '').strip().lower()
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFD', text)
+    text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+    text = re.sub(r'\s+', ' ', text)
+    return text
+
+
+def booking_is_effectively_paid(session, booking: Booking) -> bool:
+    has_successful_payment = session.query(Payment.id).filter(
+        Payment.booking_id == booking.id,
+        Payment.status == 'SUCCESS'
+    ).first() is not None
+    return (
+        has_successful_payment
+        or bool(getattr(booking, 'confirmed_at', None))
+        or bool(getattr(booking, 'onchain_recorded', False))
+        or bool(getattr(booking, 'nft_minted', False))
+        or bool(getattr(booking, 'sky_minted', False))
+    )
+
+
+def confirm_booking_seats(booking: Booking) -> None:
+    """Mark the seats of a paid booking as confirmed for it."""
+    for booking_passenger in booking.passengers or []:
+        seat = booking_passenger.seat
+        if seat:
+            seat.status = SeatStatus.CONFIRMED.value
+            seat.confirmed_booking_id = booking.id
+
+
+def issue_tickets(session, booking, values: list[dict]) -> list[str]:
+    """Insert tickets built with ``Ticket.ticket_values``. Returns their codes."""
+    if not values:
+        return []
+    codes = next_ticket_codes(len(values), session.connection())
+    now = datetime.utcnow()
+    session.execute(insert(Ticket.__table__).values([
+        {**row, 'ticket_code': code, 'issued_at': now}
+        for row, code in zip(values, codes)
+    ]))
+    # The rows bypassed the ORM; reload the relationship on next access
+    session.expire(booking, ['tickets'])
+    return codes
+
+
+def issue_missing_tickets(session, booking: Booking) -> list[str]:
+    """Issue tickets for passengers of a paid booking that have none. Returns new codes."""
+    has_successful_payment = booking_is_effectively_paid(session, booking)
+    if booking.status not in [BookingStatus.CONFIRMED, BookingStatus.COMPLETED] and not has_successful_payment:
+        return []
+
+    if has_successful_payment and booking.status == BookingStatus.PENDING:
+        booking.status = BookingStatus.CONFIRMED
+        if not booking.confirmed_at:
+            booking.confirmed_at = datetime.utcnow()
+        session.add(booking)
+
+    existing_tickets = session.query(Ticket).filter_by(booking_id=booking.id).all()
+    existing_passenger_ids = set()
+    existing_seat_ids = set()
+    existing_name_norm = set()
+
+    for ticket in existing_tickets:
+        if ticket.passenger_id is not None:
+            existing_passenger_ids.add(ticket.passenger_id)
+        if ticket.seat_id is not None:
+            existing_seat_ids.add(ticket.seat_id)
+        existing_name_norm.add(normalize_passenger_name(ticket.passenger_name))
+
+    flight = booking.outbound_flight
+    if not flight and booking.outbound_flight_id:
+        flight = session.query(Flight).filter_by(id=booking.outbound_flight_id).first()
+
+    ticket_values: list[dict] = []
+    for booking_passenger in booking.passengers or []:
+        passenger = booking_passenger.passenger
+        passenger_name = f"{getattr(passenger, 'firstname', '') or ''} {getattr(passenger, 'lastname', '') or ''}".strip() or f"Passenger {booking_passenger.id}"
+        normalized_name = normalize_passenger_name(passenger_name)
+
+        if (
+            booking_passenger.id in existing_passenger_ids
+            or booking_passenger.passenger_id in existing_passenger_ids
+            or (booking_passenger.seat_id and booking_passenger.seat_id in existing_seat_ids)
+            or normalized_name in existing_name_norm
+        ):
+            continue
+
+        seat = booking_passenger.seat
+        base_price = float(flight.price) if (flight and getattr(flight, 'price', None) is not None) else float(booking.total_amount or 0)
+        seat_fee = float(seat.price_modifier) if (seat and getattr(seat, 'price_modifier', None) is not None) else 0
+
+        ticket_values.append(Ticket.ticket_values(
+            booking_id=booking.id,
+            passenger_id=booking_passenger.id,
+            flight_id=flight.id if flight else booking.outbound_flight_id,
+            seat_id=seat.id if seat else None,
+            passenger_name=passenger_name,
+            base_price=base_price,
+            seat_fee=seat_fee,
+            phone=getattr(passenger, 'phone_number', None),
+            email=getattr(passenger, 'email', None),
+            id_number=getattr(passenger, 'cccd', None),
+        ))
+
+        if seat:
+            seat.status = SeatStatus.CONFIRMED.value
+            seat.confirmed_booking_id = booking.id
+
+        if booking_passenger.id is not None:
+            existing_passenger_ids.add(booking_passenger.id)
+        if booking_passenger.passenger_id is not None:
+            existing_passenger_ids.add(booking_passenger.passenger_id)
+        if seat and seat.id is not None:
+            existing_seat_ids.add(seat.id)
+        existing_name_norm.add(normalized_name)
+
+    if not ticket_values:
+        return []
+
+    session.flush()
+    return issue_tickets(session, booking, ticket_values)
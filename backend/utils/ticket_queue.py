@@ -0,0 +1,162 @@
+"""Durable queue for issuing tickets after payment confirmation.
+
+Confirming a payment enqueues its booking in ``ticket_issuance_jobs`` in the
+same transaction, so a committed payment always has a job. A background
+worker per process (and ``backend/tools/process_ticket_jobs.py``) claims due
+jobs with SKIP LOCKED, issues the missing tickets of each booking in its own
+transaction and marks the job done in that transaction. Failed jobs are
+retried with exponential backoff up to ``TICKET_JOB_MAX_ATTEMPTS`` times.
+The worker is woken right after the enqueuing transaction commits and polls
+every ``TICKET_WORKER_INTERVAL_SECONDS`` for jobs enqueued by other workers.
+
+Read endpoints (my-trips, booking lists and details) only read tickets.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
+
+from backend.models.db import engine, session_scope
+from backend.models.booking import Booking
+from backend.utils.ticket_issuance import issue_missing_tickets
+
+
+TICKET_WORKER_ENABLED = os.getenv('TICKET_WORKER_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+TICKET_WORKER_INTERVAL_SECONDS = float(os.getenv('TICKET_WORKER_INTERVAL_SECONDS', '5'))
+TICKET_JOB_BATCH_SIZE = int(os.getenv('TICKET_JOB_BATCH_SIZE', '50'))
+TICKET_JOB_MAX_ATTEMPTS = int(os.getenv('TICKET_JOB_MAX_ATTEMPTS', '8'))
+TICKET_JOB_RETRY_SECONDS = int(os.getenv('TICKET_JOB_RETRY_SECONDS', '10'))
+# A claimed job is hidden from other workers this long; after that it counts as abandoned
+TICKET_JOB_LEASE_SECONDS = int(os.getenv('TICKET_JOB_LEASE_SECONDS', '120'))
+
+_wakeup = threading.Event()
+
+
+def enqueue_ticket_issuance(session, booking_id: int) -> None:
+    """Queue ticket issuance for ``booking_id`` in the caller's transaction."""
+    now = datetime.utcnow()
+    session.execute(text("""
+        INSERT INTO ticket_issuance_jobs (booking_id, status, attempts, available_at, created_at, updated_at)
+        VALUES (:booking_id, 'PENDING', 0, :now, :now, :now)
+        ON CONFLICT (booking_id) DO UPDATE
+        SET status = 'PENDING', attempts = 0, last_error = NULL,
+            available_at = EXCLUDED.available_at, updated_at = EXCLUDED.updated_at
+    """), {'booking_id': booking_id, 'now': now})
+    event.listen(session, 'after_commit', lambda _session: _wakeup.set(), once=True)
+
+
+def _claim_jobs(batch_size: int) -> list[tuple[int, int]]:
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        return conn.execute(text("""
+            WITH due AS (
+                SELECT booking_id FROM ticket_issuance_jobs
+                WHERE status = 'PENDING' AND available_at <= :now
+                ORDER BY available_at
+                LIMIT :batch_size
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE ticket_issuance_jobs j
+            SET attempts = j.attempts + 1, available_at = :lease_until, updated_at = :now
+            FROM due
+            WHERE j.booking_id = due.booking_id
+            RETURNING j.booking_id, j.attempts
+        """), {
+            'now': now,
+            'lease_until': now + timedelta(seconds=TICKET_JOB_LEASE_SECONDS),
+            'batch_size': batch_size,
+        }).fetchall()
+
+
+def _fail_job(booking_id: int, attempts: int, error: Exception) -> None:
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE ticket_issuance_jobs
+            SET status = :status, last_error = :error, available_at = :retry_at, updated_at = :now
+            WHERE booking_id = :booking_id
+        """), {
+            'booking_id': booking_id,
+            'status': 'FAILED' if attempts >= TICKET_JOB_MAX_ATTEMPTS else 'PENDING',
+            'error': str(error)[:2000],
+            'retry_at': now + timedelta(seconds=TICKET_JOB_RETRY_SECONDS * 2 ** (attempts - 1)),
+            'now': now,
+        })
+
+
+def process_ticket_jobs(batch_size: int = TICKET_JOB_BATCH_SIZE, max_batches: int | None = None) -> dict:
+    """Run due jobs in batches of ``batch_size``. Returns counts of jobs, tickets and failures."""
+    report = {'jobs': 0, 'tickets': 0, 'failed': 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        jobs = _claim_jobs(batch_size)
+        for booking_id, attempts in jobs:
+            try:
+                with session_scope() as session:
+                    booking = session.get(Booking, booking_id)
+                    codes = issue_missing_tickets(session, booking) if booking else []
+                    session.execute(text("""
+                        UPDATE ticket_issuance_jobs
+                        SET status = 'DONE', last_error = NULL, updated_at = :now
+                        WHERE booking_id = :booking_id
+                    """), {'booking_id': booking_id, 'now': datetime.utcnow()})
+                report['tickets'] += len(codes)
+            except Exception as e:
+                print(f"[TicketQueue] Booking {booking_id} attempt {attempts} failed: {e}")
+                _fail_job(booking_id, attempts, e)
+                report['failed'] += 1
+        report['jobs'] += len(jobs)
+        batches += 1
+        if len(jobs) < batch_size:
+            break
+    return report
+
+
+def enqueue_unticketed_bookings() -> int:
+    """Queue every paid booking that has passengers without tickets. Returns jobs queued."""
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        result = conn.execute(text("""
+            INSERT INTO ticket_issuance_jobs (booking_id, status, attempts, available_at, created_at, updated_at)
+            SELECT b.id, 'PENDING', 0, :now, :now, :now
+            FROM bookings b
+            WHERE (b.status IN ('CONFIRMED', 'COMPLETED')
+                   OR EXISTS (SELECT 1 FROM payments p WHERE p.booking_id = b.id AND p.status = 'SUCCESS'))
+              AND EXISTS (
+                  SELECT 1 FROM booking_passengers bp
+                  WHERE bp.booking_id = b.id
+                    AND NOT EXISTS (SELECT 1 FROM tickets t WHERE t.passenger_id = bp.id)
+              )
+            ON CONFLICT (booking_id) DO UPDATE
+            SET status = 'PENDING', attempts = 0, available_at = EXCLUDED.available_at, updated_at = EXCLUDED.updated_at
+            WHERE ticket_issuance_jobs.status <> 'PENDING'
+        """), {'now': now})
+    return result.rowcount or 0
+
+
+def _run_forever(interval: float) -> None:
+    while True:
+        _wakeup.clear()
+        try:
+            report = process_ticket_jobs()
+            if report['jobs']:
+                print(f"[TicketQueue] Processed {report['jobs']} jobs, issued {report['tickets']} tickets, {report['failed']} failed")
+        except Exception as e:
+            print(f"[TicketQueue] Error: {e}")
+        _wakeup.wait(interval)
+
+
+_thread: threading.Thread | None = None
+
+
+def start_ticket_worker(interval: float = TICKET_WORKER_INTERVAL_SECONDS) -> bool:
+    """Start the in-process ticket worker thread once per process."""
+    global _thread
+    if not TICKET_WORKER_ENABLED or (_thread is not None and _thread.is_alive()):
+        return False
+    _thread = threading.Thread(target=_run_forever, args=(interval,), name='ticket-worker', daemon=True)
+    _thread.start()
+    return True
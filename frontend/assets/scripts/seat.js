@@ -23,6 +23,42 @@ const SeatManager = {
         this.flightId = flightId;
         await this.loadSeats();
         this.updateExistingSeats();
+        this.subscribe();
+    },
+    
+    // Receive other users' holds/releases/bookings live instead of re-polling
+    subscribe: function() {
+        if (typeof io !== 'function' || this.socket) return;
+        try {
+            this.socket = io('/seats');
+            this.socket.on('connect', () => {
+                this.socket.emit('seats.watch', { flight_id: this.flightId }, (ack) => {
+                    if (ack && ack.success) this.version = ack.version;
+                });
+            });
+            this.socket.on('seat.changes', (event) => {
+                if (!event || String(event.flight_id) !== String(this.flightId)) return;
+                if (event.full || (this.version != null && event.from_version > this.version)) {
+                    // Missed some changes; reload the whole map
+                    this.loadSeats().then(() => this.updateExistingSeats());
+                    this.version = event.version;
+                    return;
+                }
+                (event.changes || []).forEach(change => {
+                    const seat = this.seatMap.get(change.seat_number);
+                    if (!seat) return;
+                    Object.assign(seat, {
+                        status: change.status,
+                        reserved_until: change.reserved_until,
+                        reserved_by_current_user: change.status === 'TEMPORARILY_RESERVED' && seat.reserved_by_current_user
+                    });
+                });
+                this.version = event.version;
+                this.updateExistingSeats();
+            });
+        } catch (e) {
+            console.warn('Seat live updates unavailable:', e);
+        }
     },
     
     // Load seats from API